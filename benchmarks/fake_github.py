@@ -0,0 +1,772 @@
+import os
+import sys
+import json
+import time
+import base64
+import re
+import random
+import difflib
+import hashlib
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote, urlencode
+
+# A stand-in for the parts of the GitHub REST and GraphQL APIs the GH_* modules
+# use, backed by an in-memory git object model. Point GITHUB_API_URL at it.
+
+# The contents API inlines files up to this size; larger ones come back with encoding "none"
+INLINE_CONTENT_LIMIT = 1024 * 1024
+# The compare API lists at most this many files
+COMPARE_FILE_LIMIT = 300
+# The pull request files API stops listing here
+PR_FILES_LIMIT = 3000
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+
+
+def blob_sha(data):
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def object_sha(kind, payload):
+    data = json.dumps(payload, sort_keys=True).encode()
+    return hashlib.sha1(b"%s %d\0" % (kind.encode(), len(data)) + data).hexdigest()
+
+
+def pull_state(pull):
+    # GraphQL's state for a pull request tuple
+    return "OPEN" if pull[1] == "open" else "MERGED" if pull[4] else "CLOSED"
+
+
+def iso(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeRepo:
+    """One repository: blobs, flat trees ({path: (mode, blob sha)}), commits, branches and PRs."""
+
+    def __init__(self, owner, name, default_branch="main"):
+        self.owner = owner
+        self.name = name
+        self.default_branch = default_branch
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        # Pull requests as compact tuples, rendered to JSON only when requested:
+        # (number, state, created, updated, merged, author, comment count, files)
+        self.pulls = []
+        self.pulls_by_number = {}
+        # reviewDecision by PR number; PRs not listed are approved
+        self.review_decisions = {}
+        self.comments = {}
+        self._pull_views = {}
+
+    def add_pulls(self, pulls):
+        for pull in pulls:
+            self.pulls.append(pull)
+            self.pulls_by_number[pull[0]] = pull
+        self.pulls.sort(key=lambda pull: -pull[3])
+        self._pull_views.clear()
+
+    def pull_view(self, states, field=3, reverse=True):
+        """Pull requests in the given states (a tuple, or None for all), sorted; cached between pages."""
+        key = (states, field, reverse)
+        if key not in self._pull_views:
+            pulls = [pull for pull in self.pulls if states is None or pull_state(pull) in states]
+            if (field, reverse) != (3, True):
+                pulls.sort(key=lambda pull: pull[field], reverse=reverse)
+            self._pull_views[key] = pulls
+        return self._pull_views[key]
+
+    def add_blob(self, data):
+        sha = blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+
+    def add_tree(self, files):
+        sha = object_sha("tree", sorted(files.items()))
+        self.trees[sha] = dict(files)
+        return sha
+
+    def add_commit(self, tree_sha, parents, message):
+        sha = object_sha("commit", {"tree": tree_sha, "parents": parents, "message": message,
+                                    "time": len(self.commits)})
+        self.commits[sha] = {"tree": tree_sha, "parents": list(parents), "message": message}
+        return sha
+
+    def resolve(self, ref):
+        """Commit SHA of a branch name or commit SHA, or None."""
+        if ref in self.refs:
+            return self.refs[ref]
+        if ref.startswith("heads/") and ref[len("heads/"):] in self.refs:
+            return self.refs[ref[len("heads/"):]]
+        return ref if ref in self.commits else None
+
+    def files_at(self, ref):
+        sha = self.resolve(ref)
+        return self.trees[self.commits[sha]["tree"]] if sha else None
+
+    def commit_files(self, branch, changes, message, parent=None):
+        """Commit {path: bytes or str, or None to delete} on top of parent (default: the branch head)."""
+        parent = parent or self.refs.get(branch)
+        files = dict(self.trees[self.commits[parent]["tree"]]) if parent else {}
+        for path, data in changes.items():
+            if data is None:
+                files.pop(path, None)
+            else:
+                mode = files[path][0] if path in files else "100644"
+                files[path] = (mode, self.add_blob(data.encode() if isinstance(data, str) else data))
+        sha = self.add_commit(self.add_tree(files), [parent] if parent else [], message)
+        self.refs[branch] = sha
+        return sha
+
+    def ancestors(self, sha):
+        seen = set()
+        pending = [sha]
+        while pending:
+            current = pending.pop()
+            if current not in seen:
+                seen.add(current)
+                pending.extend(self.commits[current]["parents"])
+        return seen
+
+    def merge_base(self, a, b):
+        ancestors = self.ancestors(a)
+        pending = [b]
+        seen = set()
+        while pending:
+            current = pending.pop(0)
+            if current in ancestors:
+                return current
+            if current not in seen:
+                seen.add(current)
+                pending.extend(self.commits[current]["parents"])
+        return None
+
+    def listing(self, tree_sha, recursive=True):
+        """Trees API entries for a flat tree, with directory entries made up from the paths."""
+        files = self.trees[tree_sha]
+        directories = {}
+        for path in files:
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                directories.setdefault("/".join(parts[:i]), []).append(path)
+        entries = []
+        for path, paths in directories.items():
+            if recursive or "/" not in path:
+                entries.append({"path": path, "mode": "040000", "type": "tree",
+                                "sha": object_sha("tree", sorted(paths))})
+        for path, (mode, sha) in files.items():
+            if recursive or "/" not in path:
+                entries.append({"path": path, "mode": mode, "type": "commit" if mode == "160000" else "blob",
+                                "sha": sha, "size": len(self.blobs[sha])})
+        entries.sort(key=lambda entry: entry["path"])
+        return entries
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def arg(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+    @property
+    def raw(self):
+        return RAW_MEDIA_TYPE in (self.headers.get("Accept") or "")
+
+
+class FakeGitHub:
+    """In-memory GitHub with configurable latency, page sizes and rate limits.
+
+    Every response carries X-RateLimit-* headers for its resource ("core" or
+    "graphql"); once a window's budget is spent requests get a 403 until it
+    resets. GET responses have ETags and answer If-None-Match with a 304,
+    which doesn't count against the budget. `requests` counts every request
+    served, 304s included.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=5000, rate_limit_window=3600,
+                 max_per_page=100, login="bench", seed=0, tree_limit=None):
+        self.login = login
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.max_per_page = max_per_page
+        # Recursive tree listings longer than this come back truncated, as GitHub's do past its limits
+        self.tree_limit = tree_limit
+        self.random = random.Random(seed)
+        self.repos = {}
+        self.requests = 0
+        self.requests_by_method = {}
+        self.budgets = {}  # resource -> [used, reset]
+        # The next `failures` requests get `failure_status`, as during an outage (see fail_next)
+        self.failures = 0
+        self.failure_status = 502
+        # Called as on_create_ref(repo, branch) after POST git/refs, so a scenario
+        # can give new branches history of their own
+        self.on_create_ref = None
+        self.base_url = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._routes = [
+            ("GET", ("repos", None, None), self.get_repo),
+            ("GET", ("user",), self.get_user),
+            ("POST", ("user", "repos"), self.create_repo_endpoint),
+            ("POST", ("orgs", None, "repos"), self.create_repo_endpoint),
+            ("GET", ("repos", None, None, "pulls"), self.list_pulls),
+            ("POST", ("repos", None, None, "pulls"), self.create_pull),
+            ("GET", ("repos", None, None, "pulls", None), self.get_pull),
+            ("GET", ("repos", None, None, "pulls", None, "files"), self.list_pull_files),
+            ("GET", ("repos", None, None, "issues", None, "comments"), self.list_comments),
+            ("POST", ("repos", None, None, "issues", None, "comments"), self.create_comment),
+            ("POST", ("graphql",), self.graphql),
+            ("GET", ("repos", None, None, "git", "ref", "heads", "*"), self.get_ref),
+            ("GET", ("repos", None, None, "git", "refs", "heads", "*"), self.get_ref),
+            ("PATCH", ("repos", None, None, "git", "refs", "heads", "*"), self.update_ref),
+            ("POST", ("repos", None, None, "git", "refs"), self.create_ref),
+            ("GET", ("repos", None, None, "git", "commits", None), self.get_commit),
+            ("POST", ("repos", None, None, "git", "commits"), self.create_commit),
+            ("GET", ("repos", None, None, "git", "trees", None), self.get_tree),
+            ("POST", ("repos", None, None, "git", "trees"), self.create_tree),
+            ("GET", ("repos", None, None, "git", "blobs", None), self.get_blob),
+            ("POST", ("repos", None, None, "git", "blobs"), self.create_blob),
+            ("GET", ("repos", None, None, "contents"), self.get_contents),
+            ("GET", ("repos", None, None, "contents", "*"), self.get_contents),
+            ("PUT", ("repos", None, None, "contents", "*"), self.put_contents),
+            ("GET", ("repos", None, None, "compare", "*"), self.compare),
+        ]
+
+    # Seeding
+
+    def create_repo(self, owner, name, files=None, default_branch="main", message="Initial commit"):
+        """Create a repository whose default branch holds `files` ({path: bytes or str})."""
+        repo = FakeRepo(owner, name, default_branch)
+        self.repos[(owner.lower(), name.lower())] = repo
+        if files is not None:
+            repo.commit_files(default_branch, files, message)
+        return repo
+
+    def seed_pulls(self, repo, count, files_per_pr=1, days=60, max_comments=5, authors=50):
+        """Add `count` pull requests updated over the last `days` days, newest update first."""
+        now = time.time()
+        span = days * 86400
+        rng = self.random
+        pulls = []
+        for i in range(count):
+            number = len(repo.pulls) + i + 1
+            updated = now - span * (i + 0.5) / count
+            created = updated - rng.uniform(0, 7 * 86400)
+            roll = rng.random()
+            state, merged = "open", None
+            if roll < 0.6:
+                state, merged = "closed", rng.uniform(created, updated)
+            elif roll < 0.8:
+                state = "closed"
+            pulls.append((number, state, created, updated, merged, f"user{rng.randrange(authors)}",
+                          rng.randrange(max_comments + 1), files_per_pr))
+        repo.add_pulls(pulls)
+
+    # Serving
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Start serving on a background thread; returns the base URL."""
+        self._server = ThreadingHTTPServer((host, port), make_handler(self))
+        self._server.daemon_threads = True
+        self.base_url = f"http://{host}:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.requests_by_method = {}
+
+    def fail_next(self, count, status=502):
+        """Answer the next `count` requests with `status` instead of serving them."""
+        with self._lock:
+            self.failures, self.failure_status = count, status
+
+    def handle(self, request):
+        """(status, body bytes, headers) for one request."""
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.random.uniform(0, self.jitter))
+        segments = [unquote(segment) for segment in request.path.strip("/").split("/")]
+        resource = "graphql" if segments == ["graphql"] else "core"
+        with self._lock:
+            self.requests += 1
+            self.requests_by_method[request.method] = self.requests_by_method.get(request.method, 0) + 1
+            if self.failures:
+                self.failures -= 1
+                body = {"message": "Server Error"}
+                return self.failure_status, json.dumps(body).encode(), {"Content-Type": "application/json"}
+            if self._budget(resource)[0] >= self.rate_limit:
+                body = {"message": "API rate limit exceeded",
+                        "documentation_url": "https://docs.github.com/rest/rate-limit"}
+                return 403, json.dumps(body).encode(), self._rate_headers(resource, {"Content-Type": "application/json"})
+            status, body, headers = self._dispatch(request, segments)
+            if status == 200 and request.method == "GET":
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                headers["ETag"] = etag
+                if request.headers.get("If-None-Match") == etag:
+                    return 304, b"", self._rate_headers(resource, {"ETag": etag})
+            self.budgets[resource][0] += 1
+            return status, body, self._rate_headers(resource, headers)
+
+    def _budget(self, resource):
+        now = time.time()
+        budget = self.budgets.get(resource)
+        if budget is None or now >= budget[1]:
+            budget = self.budgets[resource] = [0, int(now + self.rate_limit_window)]
+        return budget
+
+    def _rate_headers(self, resource, headers):
+        used, reset = self.budgets[resource]
+        headers.update({
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.rate_limit - used)),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": str(reset),
+            "X-RateLimit-Resource": resource,
+        })
+        return headers
+
+    def _dispatch(self, request, segments):
+        for method, pattern, endpoint in self._routes:
+            if method != request.method:
+                continue
+            args = self._match(pattern, segments)
+            if args is None:
+                continue
+            if pattern[0] == "repos":
+                repo = self.repos.get((args[0].lower(), args[1].lower()))
+                if repo is None:
+                    return self._error(404, "Not Found")
+                args = [repo] + args[2:]
+            result = endpoint(request, *args)
+            status, payload = result[0], result[1]
+            headers = dict(result[2]) if len(result) > 2 else {}
+            if isinstance(payload, bytes):
+                headers.setdefault("Content-Type", "application/octet-stream")
+                return status, payload, headers
+            headers["Content-Type"] = "application/json; charset=utf-8"
+            return status, json.dumps(payload).encode(), headers
+        return self._error(404, "Not Found")
+
+    @staticmethod
+    def _match(pattern, segments):
+        # None matches one segment, "*" the rest of the path
+        args = []
+        for i, part in enumerate(pattern):
+            if part == "*":
+                if i >= len(segments):
+                    return None
+                args.append("/".join(segments[i:]))
+                return args
+            if i >= len(segments):
+                return None
+            if part is None:
+                args.append(segments[i])
+            elif part != segments[i]:
+                return None
+        return args if len(segments) == len(pattern) else None
+
+    @staticmethod
+    def _error(status, message):
+        return status, json.dumps({"message": message}).encode(), {"Content-Type": "application/json"}
+
+    def _page(self, request, items):
+        """(page of items, Link header) for a list endpoint."""
+        per_page = min(int(request.arg("per_page", 30)), self.max_per_page)
+        page = int(request.arg("page", 1))
+        start = (page - 1) * per_page
+        headers = {}
+        if start + per_page < len(items):
+            query = {key: values[0] for key, values in request.query.items()}
+            links = []
+            for rel, number in (("next", page + 1), ("last", (len(items) + per_page - 1) // per_page)):
+                query["page"] = number
+                links.append(f'<{self.base_url}{request.path}?{urlencode(query)}>; rel="{rel}"')
+            headers["Link"] = ", ".join(links)
+        return items[start:start + per_page], headers
+
+    # Repositories
+
+    def get_repo(self, request, repo):
+        return 200, {"name": repo.name, "full_name": f"{repo.owner}/{repo.name}",
+                     "owner": {"login": repo.owner}, "default_branch": repo.default_branch,
+                     "private": False, "html_url": f"https://github.com/{repo.owner}/{repo.name}"}
+
+    def get_user(self, request):
+        return 200, {"login": self.login, "type": "User"}
+
+    def create_repo_endpoint(self, request, owner=None):
+        data = request.json()
+        owner = owner or self.login
+        if (owner.lower(), data["name"].lower()) in self.repos:
+            return 422, {"message": "Repository creation failed.",
+                         "errors": [{"message": "name already exists on this account"}]}
+        files = {"README.md": f"# {data['name']}\n"} if data.get("auto_init") else None
+        repo = self.create_repo(owner, data["name"], files)
+        return 201, self.get_repo(request, repo)[1]
+
+    # Pull requests
+
+    def _pull_json(self, repo, pull):
+        number, state, created, updated, merged, author, comments, files = pull
+        return {
+            "number": number, "state": state, "title": f"Change {number}", "body": "",
+            "user": {"login": author}, "created_at": iso(created), "updated_at": iso(updated),
+            "closed_at": iso(updated) if state == "closed" else None, "merged_at": iso(merged),
+            "comments_url": f"{self.base_url}/repos/{repo.owner}/{repo.name}/issues/{number}/comments",
+            "html_url": f"https://github.com/{repo.owner}/{repo.name}/pull/{number}",
+            "head": {"ref": f"change-{number}", "sha": object_sha("commit", number)},
+            "base": {"ref": repo.default_branch}, "labels": [], "mergeable": True,
+        }
+
+    def list_pulls(self, request, repo):
+        states = {"open": ("OPEN",), "closed": ("CLOSED", "MERGED"), "all": None}[request.arg("state", "open")]
+        field = 3 if request.arg("sort") == "updated" else 2
+        pulls = repo.pull_view(states, field, request.arg("direction", "desc") == "desc")
+        page, headers = self._page(request, pulls)
+        return 200, [self._pull_json(repo, pull) for pull in page], headers
+
+    def get_pull(self, request, repo, number):
+        pull = repo.pulls_by_number.get(int(number))
+        if pull is None:
+            return 404, {"message": "Not Found"}
+        return 200, self._pull_json(repo, pull)
+
+    def create_pull(self, request, repo):
+        data = request.json()
+        if repo.resolve(data["head"]) is None or repo.resolve(data["base"]) is None:
+            return 422, {"message": "Validation Failed"}
+        now = time.time()
+        pull = (len(repo.pulls_by_number) + 1, "open", now, now, None, self.login, 0, 0)
+        repo.add_pulls([pull])
+        return 201, self._pull_json(repo, pull)
+
+    def list_pull_files(self, request, repo, number):
+        pull = repo.pulls_by_number.get(int(number))
+        if pull is None:
+            return 404, {"message": "Not Found"}
+        count = min(pull[7], PR_FILES_LIMIT)
+        # Built for the requested page only; every tenth file carries a TODO
+        per_page = min(int(request.arg("per_page", 30)), self.max_per_page)
+        start = (int(request.arg("page", 1)) - 1) * per_page
+        _, headers = self._page(request, range(count))
+        files = []
+        for i in range(start, min(start + per_page, count)):
+            added = f"+    value = compute_{i}()  # TODO tidy up" if i % 10 == 0 else f"+    value = compute_{i}()"
+            patch = f"@@ -1,3 +1,4 @@\n def handler_{i}():\n-    pass\n{added}\n+    return value\n \n"
+            files.append({"sha": blob_sha(patch.encode()), "filename": f"src/module_{i}.py",
+                          "status": "modified", "additions": 2, "deletions": 1, "changes": 3, "patch": patch})
+        return 200, files, headers
+
+    def list_comments(self, request, repo, number):
+        number = int(number)
+        if number not in repo.pulls_by_number:
+            return 404, {"message": "Not Found"}
+        comments = [{"id": number * 1000 + i, "body": "Looks good"} for i in range(repo.pulls_by_number[number][6])]
+        comments += repo.comments.get(number, [])
+        page, headers = self._page(request, comments)
+        return 200, page, headers
+
+    def create_comment(self, request, repo, number):
+        number = int(number)
+        if number not in repo.pulls_by_number:
+            return 404, {"message": "Not Found"}
+        comment = {"id": len(repo.comments.get(number, [])) + 1, "body": request.json()["body"]}
+        repo.comments.setdefault(number, []).append(comment)
+        return 201, comment
+
+    def graphql(self, request):
+        # Only the pull request listing query used by pr_analytics and the aliased
+        # merge readiness query used by merge_queue are understood
+        data = request.json()
+        variables = data.get("variables") or {}
+        query = data.get("query", "")
+        if "pullRequests" not in query and "pullRequest(" not in query:
+            return 200, {"errors": [{"message": "Unsupported query"}]}
+        repo = self.repos.get((variables["owner"].lower(), variables["repo"].lower()))
+        if repo is None:
+            return 200, {"data": {"repository": None},
+                         "errors": [{"message": "Could not resolve to a Repository"}]}
+        if "pullRequests" not in query:
+            return 200, self._merge_readiness(repo, query)
+        states = variables.get("states")
+        pulls = repo.pull_view(tuple(states) if states else None)
+        start = int(variables.get("cursor") or 0)
+        page = pulls[start:start + 100]
+        nodes = [{"number": pull[0], "state": pull_state(pull), "createdAt": iso(pull[2]),
+                  "updatedAt": iso(pull[3]), "mergedAt": iso(pull[4]), "author": {"login": pull[5]},
+                  "comments": {"totalCount": pull[6]}}
+                 for pull in page]
+        has_next = start + 100 < len(pulls)
+        return 200, {"data": {"repository": {"pullRequests": {
+            "pageInfo": {"hasNextPage": has_next, "endCursor": str(start + 100) if has_next else None},
+            "nodes": nodes}}}}
+
+    def _merge_readiness(self, repo, query):
+        # Every open PR is mergeable and has no checks configured; all are approved
+        # unless repo.review_decisions says otherwise
+        result, errors = {}, []
+        for alias, number in re.findall(r"(\w+): pullRequest\(number: (\d+)\)", query):
+            pull = repo.pulls_by_number.get(int(number))
+            if pull is None:
+                result[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": ["repository", alias],
+                               "message": f"Could not resolve to a PullRequest with the number of {number}."})
+                continue
+            result[alias] = {"number": pull[0], "state": pull_state(pull), "mergeable": "MERGEABLE",
+                             "baseRefName": repo.default_branch, "headRefOid": repo.refs[repo.default_branch],
+                             "reviewDecision": repo.review_decisions.get(pull[0], "APPROVED"),
+                             "commits": {"nodes": []}}
+        body = {"data": {"repository": result}}
+        if errors:
+            body["errors"] = errors
+        return body
+
+    # Git data
+
+    def get_ref(self, request, repo, branch):
+        if not repo.refs:
+            return 409, {"message": "Git Repository is empty."}
+        sha = repo.refs.get(branch)
+        if sha is None:
+            return 404, {"message": "Not Found"}
+        return 200, {"ref": f"refs/heads/{branch}", "object": {"sha": sha, "type": "commit"}}
+
+    def create_ref(self, request, repo):
+        data = request.json()
+        branch = data["ref"][len("refs/heads/"):]
+        if branch in repo.refs:
+            return 422, {"message": "Reference already exists"}
+        if data["sha"] not in repo.commits:
+            return 422, {"message": "Object does not exist"}
+        repo.refs[branch] = data["sha"]
+        if self.on_create_ref is not None:
+            self.on_create_ref(repo, branch)
+        return 201, self.get_ref(request, repo, branch)[1]
+
+    def update_ref(self, request, repo, branch):
+        data = request.json()
+        if branch not in repo.refs:
+            return 422, {"message": "Reference does not exist"}
+        if data["sha"] not in repo.commits:
+            return 422, {"message": "Object does not exist"}
+        if not data.get("force") and repo.refs[branch] not in repo.ancestors(data["sha"]):
+            return 422, {"message": "Update is not a fast forward"}
+        repo.refs[branch] = data["sha"]
+        return 200, self.get_ref(request, repo, branch)[1]
+
+    def get_commit(self, request, repo, sha):
+        commit = repo.commits.get(sha)
+        if commit is None:
+            return 404, {"message": "Not Found"}
+        return 200, {"sha": sha, "tree": {"sha": commit["tree"]}, "message": commit["message"],
+                     "parents": [{"sha": parent} for parent in commit["parents"]]}
+
+    def create_commit(self, request, repo):
+        data = request.json()
+        if data["tree"] not in repo.trees or any(parent not in repo.commits for parent in data["parents"]):
+            return 422, {"message": "Object does not exist"}
+        sha = repo.add_commit(data["tree"], data["parents"], data["message"])
+        return 201, self.get_commit(request, repo, sha)[1]
+
+    def get_tree(self, request, repo, sha):
+        # Like GitHub, a commit SHA stands for its tree
+        if sha in repo.commits:
+            sha = repo.commits[sha]["tree"]
+        if sha not in repo.trees:
+            return 404, {"message": "Not Found"}
+        listing = repo.listing(sha, bool(request.arg("recursive")))
+        truncated = self.tree_limit is not None and len(listing) > self.tree_limit
+        return 200, {"sha": sha, "tree": listing[:self.tree_limit] if truncated else listing, "truncated": truncated}
+
+    def create_tree(self, request, repo):
+        data = request.json()
+        base = data.get("base_tree")
+        if base is not None and base not in repo.trees:
+            return 422, {"message": "base_tree does not exist"}
+        files = dict(repo.trees[base]) if base else {}
+        for item in data["tree"]:
+            if item.get("content") is not None:
+                files[item["path"]] = (item["mode"], repo.add_blob(item["content"].encode()))
+            elif item.get("sha") is None:
+                # Like GitHub, deleting a path the base tree lacks fails the whole tree
+                if item["path"] not in files:
+                    return 422, {"message": "GitHub.Tree.MissingPath: tree.path contains a malformed path component"}
+                files.pop(item["path"], None)
+            elif item["sha"] not in repo.blobs:
+                return 422, {"message": f"Object {item['sha']} does not exist"}
+            else:
+                files[item["path"]] = (item["mode"], item["sha"])
+        sha = repo.add_tree(files)
+        return 201, {"sha": sha, "tree": repo.listing(sha, False), "truncated": False}
+
+    def get_blob(self, request, repo, sha):
+        data = repo.blobs.get(sha)
+        if data is None:
+            return 404, {"message": "Not Found"}
+        if request.raw:
+            return 200, data
+        return 200, {"sha": sha, "size": len(data), "encoding": "base64",
+                     "content": base64.encodebytes(data).decode()}
+
+    def create_blob(self, request, repo):
+        data = request.json()
+        content = data["content"]
+        content = base64.b64decode(content) if data.get("encoding") == "base64" else content.encode()
+        return 201, {"sha": repo.add_blob(content)}
+
+    # Contents
+
+    def get_contents(self, request, repo, path=""):
+        path = path.strip("/")
+        files = repo.files_at(request.arg("ref") or repo.default_branch)
+        if files is None:
+            return 404, {"message": "No commit found for the ref"}
+        entry = files.get(path)
+        if entry is not None:
+            mode, sha = entry
+            data = repo.blobs[sha]
+            if request.raw:
+                return 200, data
+            inline = len(data) <= INLINE_CONTENT_LIMIT
+            kind = {"120000": "symlink", "160000": "submodule"}.get(mode, "file")
+            return 200, {"type": kind, "name": path.rsplit("/", 1)[-1], "path": path, "sha": sha,
+                         "size": len(data), "encoding": "base64" if inline else "none",
+                         "content": base64.encodebytes(data).decode() if inline else ""}
+        prefix = f"{path}/" if path else ""
+        children = {}
+        for file_path, (mode, sha) in files.items():
+            if file_path.startswith(prefix):
+                name, slash, _ = file_path[len(prefix):].partition("/")
+                children.setdefault(name, {"type": "dir" if slash else "file", "name": name,
+                                           "path": f"{prefix}{name}", "sha": sha})
+        if not children:
+            return 404, {"message": "Not Found"}
+        return 200, sorted(children.values(), key=lambda child: child["name"])
+
+    def put_contents(self, request, repo, path):
+        data = request.json()
+        branch = data.get("branch") or repo.default_branch
+        # The first file of an empty repository creates its branch
+        if branch not in repo.refs and (repo.refs or branch != repo.default_branch):
+            return 404, {"message": f"Branch {branch} not found"}
+        existing = (repo.files_at(branch) or {}).get(path)
+        if existing is not None and data.get("sha") != existing[1]:
+            return 409, {"message": f"{path} does not match {data.get('sha')}"}
+        if existing is None and data.get("sha"):
+            return 422, {"message": "sha wasn't supplied"}
+        content = base64.b64decode(data["content"])
+        commit = repo.commit_files(branch, {path: content}, data["message"])
+        body = {"content": {"name": path.rsplit("/", 1)[-1], "path": path, "sha": blob_sha(content),
+                            "size": len(content)},
+                "commit": {"sha": commit, "message": data["message"]}}
+        return (200 if existing else 201), body
+
+    def compare(self, request, repo, spec):
+        base, _, head = spec.partition("...")
+        base_sha, head_sha = repo.resolve(base), repo.resolve(head)
+        if base_sha is None or head_sha is None:
+            return 404, {"message": "Not Found"}
+        merge_base = repo.merge_base(base_sha, head_sha)
+        old = repo.trees[repo.commits[merge_base]["tree"]] if merge_base else {}
+        new = repo.trees[repo.commits[head_sha]["tree"]]
+        files = []
+        for path in sorted(set(old) | set(new)):
+            if old.get(path) == new.get(path):
+                continue
+            status = "added" if path not in old else "removed" if path not in new else "modified"
+            sha = (new.get(path) or old.get(path))[1]
+            before = repo.blobs[old[path][1]] if path in old else b""
+            after = repo.blobs[new[path][1]] if path in new else b""
+            file = {"sha": sha, "filename": path, "status": status}
+            try:
+                lines = list(difflib.unified_diff(before.decode().splitlines(keepends=True),
+                                                  after.decode().splitlines(keepends=True), n=3))[2:]
+                file["patch"] = "".join(lines).rstrip("\n")
+                file["additions"] = sum(1 for line in lines if line.startswith("+"))
+                file["deletions"] = sum(1 for line in lines if line.startswith("-"))
+                file["changes"] = file["additions"] + file["deletions"]
+            except UnicodeDecodeError:
+                pass
+            files.append(file)
+        ahead = repo.ancestors(head_sha) - repo.ancestors(base_sha)
+        behind = repo.ancestors(base_sha) - repo.ancestors(head_sha)
+        status = "identical" if not ahead and not behind else "ahead" if not behind else "behind" if not ahead else "diverged"
+        return 200, {"status": status, "ahead_by": len(ahead), "behind_by": len(behind),
+                     "base_commit": {"sha": base_sha}, "merge_base_commit": {"sha": merge_base},
+                     "commits": [{"sha": sha} for sha in sorted(ahead)][:250],
+                     "total_commits": len(ahead), "files": files[:COMPARE_FILE_LIMIT]}
+
+
+def make_handler(fake):
+    class FakeGitHubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without this each response waits on a delayed ACK
+        disable_nagle_algorithm = True
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            url = urlsplit(self.path)
+            request = Request(self.command, url.path, parse_qs(url.query), self.headers, body)
+            try:
+                status, data, headers = fake.handle(request)
+            except (KeyError, ValueError, TypeError) as e:
+                status, data, headers = 400, json.dumps({"message": f"Bad request: {e!r}"}).encode(), {}
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeGitHubHandler
+
+
+def main():
+    # Standalone: serve a seeded repository until interrupted, e.g.
+    #   python benchmarks/fake_github.py 8000 1000
+    # then run any GH_* script with GITHUB_API_URL=http://127.0.0.1:8000 Owner=bench Repository=repo
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    pulls = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    fake = FakeGitHub(latency=float(os.getenv("FAKE_GITHUB_LATENCY_MS", "0")) / 1000)
+    repo = fake.create_repo("bench", "repo", {"README.md": "# repo\n", "src/app.py": "print('hello')\n"})
+    fake.seed_pulls(repo, pulls, files_per_pr=10)
+    fake.serve(port=port)
+    print(f"Fake GitHub API for bench/repo with {pulls} pull requests at {fake.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from fake_github import FakeGitHub
+
+# Runs the main entry points against a local FakeGitHub at growing scales and
+# reports wall time, requests served and peak memory for each. Every run gets
+# its own server, cache directory and interpreter, so runs are cold and their
+# peak RSS is their own. With --baseline the run fails on regressions.
+#
+#   python benchmarks/run_benchmarks.py --scale default --latency 20
+#   python benchmarks/run_benchmarks.py --save-baseline my-baseline.json
+#   python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+#
+# The checked-in baseline.json holds only request counts for the default scale,
+# which are the same on every machine; save a local baseline to track timings.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+
+OWNER = "bench"
+REPO = "repo"
+TOKEN = "bench-token"
+
+# How many of each case's sizes a scale runs
+SCALES = {"quick": 1, "default": 2, "full": 3}
+
+# Timing and memory noise allowed before a slowdown counts as a regression
+MIN_WALL_SLACK = 0.05
+MIN_MEMORY_SLACK_MB = 5
+
+
+def _text_file(lines, label, change=None):
+    # `lines` numbered lines; change maps line numbers to replacements
+    change = change or {}
+    return "".join(change.get(i, f"line {i} of {label}\n") for i in range(lines)).encode()
+
+
+# pr_analytics: PRs updated over the last 60 days, half of them inside the 30-day window
+
+def setup_pulls(fake, size):
+    repo = fake.create_repo(OWNER, REPO, {"README.md": "# repo\n"})
+    fake.seed_pulls(repo, size, files_per_pr=5)
+
+def run_pr_analytics(backend):
+    def run(size):
+        from GH_pull_requests import pr_analytics
+        analytics = pr_analytics(OWNER, REPO, state="all", days=30, backend=backend)
+        return analytics["total_prs"] if analytics else None
+    return run
+
+def check_pr_analytics(fake, size, value):
+    if not value:
+        return "no PRs were analysed"
+    return None
+
+
+# automatic_pr_review: one PR with `size` changed files, every tenth with a TODO
+
+def setup_review(fake, size):
+    repo = fake.create_repo(OWNER, REPO, {"README.md": "# repo\n"})
+    fake.seed_pulls(repo, 1, files_per_pr=size)
+
+def run_review(size):
+    from GH_pull_requests import automatic_pr_review
+    issues = automatic_pr_review(OWNER, REPO, 1)
+    return len(issues) if issues is not None else None
+
+def check_review(fake, size, value):
+    expected = (size + 9) // 10
+    if value != expected:
+        return f"expected {expected} issue(s), got {value}"
+    if not fake.repos[(OWNER, REPO)].comments.get(1):
+        return "no review comment was posted"
+    return None
+
+
+# update_multiple_files: `size` existing files rewritten on a new branch
+
+UPDATED_CONTENT = "This is the updated content for multiple files.\n"
+
+def update_targets(size):
+    return [f"_includes/page_{i}.html" for i in range(size)]
+
+def setup_update(fake, size):
+    files = {path: f"<p>{path}</p>\n" for path in update_targets(size)}
+    files.update({f"assets/style_{i}.css": f"/* {i} */\n" for i in range(50)})
+    fake.create_repo(OWNER, REPO, files)
+
+def run_update(atomic):
+    def run(size):
+        from GH_multi_file_updater import update_multiple_files
+        update_multiple_files(OWNER, REPO, update_targets(size), UPDATED_CONTENT, atomic=atomic)
+    return run
+
+def check_update(fake, size, value):
+    repo = fake.repos[(OWNER, REPO)]
+    branches = [branch for branch in repo.refs if branch.startswith("feature-multi-update")]
+    if not branches:
+        return "no branch was created"
+    files = repo.files_at(branches[0])
+    stale = [path for path in update_targets(size) if repo.blobs[files[path][1]] != UPDATED_CONTENT.encode()]
+    if stale:
+        return f"{len(stale)} file(s) not updated"
+    return None
+
+
+# GH_conflict_resolver.main: `size` files changed on both sides of a fork, one
+# in ten on the same line. The new feature branch is moved onto the fork.
+
+CONFLICT_LINES = 60
+
+def conflict_targets(size):
+    return [f"src/file_{i}.txt" for i in range(size)]
+
+def setup_conflicts(fake, size):
+    paths = [f"src/file_{i}.txt" for i in range(max(size, 10))]
+    repo = fake.create_repo(OWNER, REPO, {path: _text_file(CONFLICT_LINES, path) for path in paths})
+    ancestor = repo.refs["main"]
+    repo.commit_files("main", {path: _text_file(CONFLICT_LINES, path, {10: "base change\n"})
+                               for path in conflict_targets(size)}, "Change the base side")
+
+    def diverge(repo, branch):
+        if not branch.startswith("feature-branch-"):
+            return
+        changes = {}
+        for i, path in enumerate(conflict_targets(size)):
+            change = {50: "head change\n"}
+            if i % 10 == 0:
+                change[10] = "conflicting head change\n"
+            changes[path] = _text_file(CONFLICT_LINES, path, change)
+        repo.commit_files(branch, changes, "Change the head side", parent=ancestor)
+
+    fake.on_create_ref = diverge
+
+def run_conflicts(size):
+    import GH_conflict_resolver
+    GH_conflict_resolver.main()
+
+def check_conflicts(fake, size, value):
+    repo = fake.repos[(OWNER, REPO)]
+    if not repo.pulls:
+        return "no pull request was opened"
+    branches = [branch for branch in repo.refs if branch.startswith("feature-branch-")]
+    files = repo.files_at(branches[0])
+    for i, path in enumerate(conflict_targets(size)):
+        text = repo.blobs[files[path][1]].decode()
+        if "head change" not in text or ("base change" not in text and i % 10):
+            return f"{path} was not merged"
+        if (i % 10 == 0) != ("<<<<<<<" in text):
+            return f"{path} has unexpected conflict markers"
+    return None
+
+
+# check_repo_and_get_file: one text file of `size` KB (over 1 MB it is streamed)
+
+def setup_get_file(fake, size):
+    line = b"0123456789abcdef" * 4 + b"\n"
+    data = (line * (size * 1024 // len(line) + 1))[:size * 1024]
+    fake.create_repo(OWNER, REPO, {"README.md": "# repo\n", "data/file.txt": data})
+
+def run_get_file(size):
+    import GH_repo_pathfinder
+    data = GH_repo_pathfinder.check_repo_and_get_file(OWNER, REPO, "data/file.txt", TOKEN)
+    return len(data) if data is not None else None
+
+def check_get_file(fake, size, value):
+    if value != size * 1024:
+        return f"expected {size * 1024} bytes, got {value}"
+    return None
+
+
+# provision_repos: `size` repositories of 20 files; every other one already
+# exists with half of its files
+
+PROVISION_FILES = 20
+
+def provision_specs(size):
+    return [{"owner": OWNER, "name": f"service-{i}", "message": "Bootstrap",
+             "files": {f"config/setting_{j}.yml": f"service: {i}\nsetting: {j}\n" for j in range(PROVISION_FILES)}}
+            for i in range(size)]
+
+def setup_provision(fake, size):
+    for i, spec in enumerate(provision_specs(size)):
+        if i % 2:
+            present = dict(list(spec["files"].items())[:PROVISION_FILES // 2])
+            fake.create_repo(OWNER, spec["name"], present)
+
+def run_provision(size):
+    from GH_repo_manager import provision_repos
+    results = provision_repos(provision_specs(size))
+    return sum(len(result["written"]) for result in results if result["status"] != "failed")
+
+def check_provision(fake, size, value):
+    for spec in provision_specs(size):
+        repo = fake.repos.get((OWNER, spec["name"]))
+        files = repo.files_at(repo.default_branch) if repo else None
+        if files is None or any(repo.blobs[files[path][1]] != content.encode()
+                                for path, content in spec["files"].items() if path in files):
+            return f"{spec['name']} was not provisioned"
+        if set(spec["files"]) - set(files):
+            return f"{spec['name']} is missing files"
+    return None
+
+
+CASES = {
+    "pr_analytics_rest": {"sizes": [10, 1000, 50000], "unit": "PRs", "modules": ["GH_pull_requests"],
+                          "setup": setup_pulls, "run": run_pr_analytics("rest"), "check": check_pr_analytics},
+    "pr_analytics_graphql": {"sizes": [10, 1000, 50000], "unit": "PRs", "modules": ["GH_pull_requests"],
+                             "setup": setup_pulls, "run": run_pr_analytics("graphql"), "check": check_pr_analytics},
+    "automatic_pr_review": {"sizes": [1, 100, 1000], "unit": "files", "modules": ["GH_pull_requests"],
+                            "setup": setup_review, "run": run_review, "check": check_review},
+    "update_multiple_files": {"sizes": [1, 100, 1000], "unit": "files", "modules": ["GH_multi_file_updater"],
+                              "setup": setup_update, "run": run_update(False), "check": check_update},
+    "update_multiple_files_atomic": {"sizes": [1, 100, 1000], "unit": "files", "modules": ["GH_multi_file_updater"],
+                                     "setup": setup_update, "run": run_update(True), "check": check_update},
+    "resolve_conflicts": {"sizes": [1, 100, 1000], "unit": "files", "modules": ["GH_conflict_resolver"],
+                          "setup": setup_conflicts, "run": run_conflicts, "check": check_conflicts},
+    "provision_repos": {"sizes": [1, 10, 50], "unit": "repos", "modules": ["GH_repo_manager"],
+                        "setup": setup_provision, "run": run_provision, "check": check_provision},
+    "check_repo_and_get_file": {"sizes": [1, 1000, 20000], "unit": "KB", "modules": ["GH_repo_pathfinder"],
+                                "setup": setup_get_file, "run": run_get_file, "check": check_get_file},
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss carries over the parent's high-water mark across fork and exec on
+    # Linux; VmHWM belongs to this process image alone
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(name, size, result_path):
+    """Run one case in this (fresh) interpreter and write its measurements to result_path."""
+    sys.path.insert(0, SRC_DIR)
+    case = CASES[name]
+    for module in case["modules"]:
+        __import__(module)
+    import_rss = _peak_rss_mb()
+    started = time.perf_counter()
+    value = case["run"](size)
+    wall = time.perf_counter() - started
+    with open(result_path, "w") as f:
+        json.dump({"wall_seconds": wall, "peak_rss_mb": _peak_rss_mb(), "import_rss_mb": import_rss,
+                   "value": value}, f)
+
+
+def run_case(name, size, latency=0.0, rate_limit=1_000_000, verbose=False):
+    """Serve a freshly seeded fake, run the case against it in a subprocess and check the outcome."""
+    case = CASES[name]
+    fake = FakeGitHub(latency=latency, rate_limit=rate_limit)
+    case["setup"](fake, size)
+    url = fake.serve()
+    result = {"case": name, "size": size, "unit": case["unit"]}
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            result_path = os.path.join(cache_dir, "result.json")
+            env = dict(os.environ, GITHUB_API_URL=url, GITHUB_API_KEY=TOKEN, Owner=OWNER, Repository=REPO,
+                       GITHUB_CACHE_DIR=cache_dir, GITHUB_PR_STORE=os.path.join(cache_dir, "prs.sqlite"),
+                       GITHUB_PATHFINDER_MIRROR="0", GITHUB_METRICS_REPORT="",
+                       # Writes are paced to GitHub's secondary limits by default; the fake has none
+                       GITHUB_WRITE_RATE_PER_MIN="0",
+                       # pr_analytics compares local time against UTC timestamps
+                       TZ="UTC")
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, str(size), result_path],
+                                       env=env, cwd=cache_dir, stdout=None if verbose else subprocess.DEVNULL)
+            if completed.returncode != 0 or not os.path.exists(result_path):
+                result["error"] = f"exited with status {completed.returncode}"
+                return result
+            with open(result_path) as f:
+                measured = json.load(f)
+    finally:
+        fake.shutdown()
+    result.update(wall_seconds=measured["wall_seconds"], requests=fake.requests,
+                  peak_rss_mb=measured["peak_rss_mb"], import_rss_mb=measured["import_rss_mb"])
+    error = case["check"](fake, size, measured["value"])
+    if error:
+        result["error"] = error
+    return result
+
+
+def result_key(result):
+    return f"{result['case']}[{result['size']}]"
+
+
+def find_regressions(results, baseline, tolerance):
+    """Messages for results worse than the baseline: more requests, or slower / bigger beyond tolerance."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None or "error" in result:
+            continue
+        if "requests" in previous and result["requests"] > previous["requests"]:
+            regressions.append(f"{result_key(result)}: {result['requests']} requests (baseline {previous['requests']})")
+        if ("wall_seconds" in previous and result["wall_seconds"] >
+                previous["wall_seconds"] * (1 + tolerance) + MIN_WALL_SLACK):
+            regressions.append(f"{result_key(result)}: {result['wall_seconds']:.2f}s "
+                               f"(baseline {previous['wall_seconds']:.2f}s)")
+        if ("peak_rss_mb" in previous and result["peak_rss_mb"] >
+                previous["peak_rss_mb"] * (1 + tolerance) + MIN_MEMORY_SLACK_MB):
+            regressions.append(f"{result_key(result)}: {result['peak_rss_mb']:.0f} MB peak "
+                               f"(baseline {previous['peak_rss_mb']:.0f} MB)")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'case':<30} {'size':>12} {'wall s':>9} {'requests':>9} {'peak MB':>8}")
+    for result in results:
+        size = f"{result['size']} {result['unit']}"
+        if "wall_seconds" in result:
+            print(f"{result['case']:<30} {size:>12} {result['wall_seconds']:>9.2f} "
+                  f"{result['requests']:>9} {result['peak_rss_mb']:>8.1f}"
+                  f"{'  FAILED: ' + result['error'] if 'error' in result else ''}")
+        else:
+            print(f"{result['case']:<30} {size:>12}  FAILED: {result['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GH_* entry points against a local fake GitHub API.")
+    parser.add_argument("--scale", choices=SCALES, default="default",
+                        help="quick: smallest size of each case; default: two sizes; full: all (includes 50k PRs)")
+    parser.add_argument("--case", action="append", choices=CASES, help="run only this case (repeatable)")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request, in ms")
+    parser.add_argument("--rate-limit", type=int, default=1_000_000, help="requests per hour before the fake answers 403")
+    parser.add_argument("--baseline", help="JSON results to compare against; regressions make the run fail")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / growth over the baseline")
+    parser.add_argument("--save-baseline", help="write these results as a baseline")
+    parser.add_argument("--output", help="write the full results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the benchmarked code")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        name, size, result_path = args.child
+        run_child(name, int(size), result_path)
+        return 0
+
+    results = []
+    for name in args.case or CASES:
+        for size in CASES[name]["sizes"][:SCALES[args.scale]]:
+            result = run_case(name, size, args.latency / 1000, args.rate_limit, args.verbose)
+            results.append(result)
+            print(f"{result_key(result)}: {'failed' if 'error' in result else 'done'}", file=sys.stderr)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({result_key(result): {field: result[field] for field in ("wall_seconds", "requests", "peak_rss_mb")}
+                       for result in results if "error" not in result}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    failed = [result for result in results if "error" in result]
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+    if failed or regressions:
+        print(f"{len(failed)} failed run(s), {len(regressions)} regression(s)")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
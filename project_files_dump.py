@@ -1,4 +1,23 @@
 import os
+import re
+import sys
+import json
+import time
+import hashlib
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+# Files up to this size are read whole by a worker thread; larger ones are
+# copied into the output in chunks of this size
+CHUNK_SIZE = 1024 * 1024
+MAX_WORKERS = 8
+MANIFEST_SUFFIX = '.manifest.json'
+# Files modified this close to a dump may change again within the same mtime
+# tick, so they are re-hashed next time instead of trusted on stat alone
+RACY_WINDOW_NS = 2 * 10**9
+# Never walked into unless include.txt re-includes them with '!!name/'
+DEFAULT_EXCLUDES = ['.git/', 'node_modules/']
 
 def read_include_file(file_path):
     """Read the list of files from include.txt."""
@@ -10,39 +29,369 @@ def read_include_file(file_path):
         print(f"File {file_path} not found.")
         return []
 
-def read_file_contents(file_path):
-    """Read the contents of a file."""
+def _pattern_regex(pattern):
+    # gitignore glob syntax: '*', '?' and [...] stay within one path segment,
+    # '**/' spans any number of directories and a trailing '/**' everything inside
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i) and i + 2 == n and (i == 0 or pattern[i - 1] == '/'):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[' and pattern.find(']', i + 2) != -1:
+            j = pattern.find(']', i + 2)
+            body = pattern[i + 1:j].replace('\\', '\\\\')
+            out.append(f"[{'^' + body[1:] if body.startswith('!') else body}]")
+            i = j + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+class IgnoreRules:
+    """gitignore-style patterns, compiled once; the last pattern that matches decides.
+
+    All patterns are also folded into one alternation, so a path none of them
+    matches costs a single regex call however many patterns there are.
+    """
+
+    def __init__(self, lines):
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            # A slash anywhere but the end anchors the pattern to the rules' directory
+            anchored = '/' in line
+            line = line.lstrip('/')
+            if not line:
+                continue
+            regex = _pattern_regex(line) if anchored else f"(?:.*/)?{_pattern_regex(line)}"
+            self.rules.append((re.compile(regex), negated, dir_only))
+        self.any = re.compile('|'.join(f"(?:{rule.pattern})" for rule, _, _ in self.rules)) if self.rules else None
+
+    def match(self, rel_path, is_dir):
+        """True if ignored, False if re-included by a '!' pattern, None if nothing matches."""
+        if self.any is None or not self.any.fullmatch(rel_path):
+            return None
+        for regex, negated, dir_only in reversed(self.rules):
+            if (is_dir or not dir_only) and regex.fullmatch(rel_path):
+                return not negated
+        return None
+
+def _gitignore(directory, cache):
+    if directory not in cache:
+        try:
+            with open(os.path.join(directory or '.', '.gitignore'), 'r') as file:
+                cache[directory] = IgnoreRules(file)
+        except OSError:
+            cache[directory] = None
+    return cache[directory]
+
+def _ignored(rel_path, is_dir, rule_sets):
+    # rule_sets: (base directory, rules) from the highest priority down
+    for base, rules in rule_sets:
+        result = rules.match(rel_path[len(base) + 1:] if base else rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+def walk_files(top, excludes, cache, max_depth=None):
+    """Yield the files under top as '/'-separated paths, in sorted order.
+
+    Uses os.scandir, so the type of each entry comes with the listing, and
+    drops ignored directories as they are reached instead of filtering their
+    contents afterwards. excludes (from include.txt) outrank .gitignore files,
+    and deeper .gitignore files outrank shallower ones. Directories more than
+    max_depth segments deep are not entered.
+    """
+    gitignores = []
+    if not (top.startswith('/') or top.startswith('..')):
+        # .gitignore files above the walk apply to it too
+        parts = top.split('/') if top else []
+        for depth in range(len(parts)):
+            directory = '/'.join(parts[:depth])
+            rules = _gitignore(directory, cache)
+            if rules is not None:
+                gitignores.insert(0, (directory, rules))
+    stack = [(top, gitignores)]
+    while stack:
+        directory, gitignores = stack.pop()
+        rules = _gitignore(directory, cache)
+        if rules is not None:
+            gitignores = [(directory, rules)] + gitignores
+        rule_sets = [('', excludes)] + gitignores
+        try:
+            with os.scandir(directory or '.') as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            rel_path = f"{directory}/{entry.name}" if directory else entry.name
+            # Symlinked directories aren't followed, so links can't loop the walk
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if _ignored(rel_path, is_dir, rule_sets):
+                continue
+            if is_dir:
+                if max_depth is None or rel_path.count('/') + 1 <= max_depth:
+                    subdirectories.append((rel_path, gitignores))
+            elif entry.is_file():
+                yield rel_path
+        stack.extend(reversed(subdirectories))
+
+def expand_includes(lines, skip=()):
+    """Turn include.txt lines into file paths, in order.
+
+    A line may be a file path (kept as written, even if excluded), a directory
+    (every file below it) or a glob such as 'src/**/*.py'. Lines starting with
+    '!' are exclude patterns with .gitignore syntax; they and any .gitignore
+    files met along the way prune directory and glob expansion. '#' starts a
+    comment. Paths in skip (the dump's own output and manifest, say) are never
+    produced by directory or glob expansion.
+    """
+    includes = []
+    excludes = list(DEFAULT_EXCLUDES)
+    for line in lines:
+        if line.startswith('#'):
+            continue
+        if line.startswith('!'):
+            excludes.append(line[1:])
+        else:
+            includes.append(line)
+    exclude_rules = IgnoreRules(excludes)
+    cache = {}
+    skipped = set()
+    for path in skip:
+        path = os.path.normpath(path).replace(os.sep, '/')
+        # Including the temporary files they are written through
+        skipped.update((path, f"{path}.tmp"))
+
+    file_paths = []
+    for pattern in includes:
+        if not any(c in pattern for c in '*?['):
+            if os.path.isdir(pattern):
+                top = os.path.normpath(pattern).replace(os.sep, '/')
+                file_paths.extend(path for path in walk_files('' if top == '.' else top, exclude_rules, cache)
+                                  if path not in skipped)
+            else:
+                file_paths.append(pattern)
+            continue
+        parts = os.path.normpath(pattern).replace(os.sep, '/').split('/')
+        first_glob = next(i for i, part in enumerate(parts) if any(c in part for c in '*?['))
+        top = '/'.join(parts[:first_glob])
+        full_pattern = '/'.join(parts)
+        glob = re.compile(_pattern_regex(full_pattern))
+        # Without '**' nothing deeper than the pattern itself can match
+        max_depth = None if '**' in full_pattern else len(parts) - 1
+        file_paths.extend(path for path in walk_files(top if top != '.' else '', exclude_rules, cache, max_depth)
+                          if glob.fullmatch(path) and path not in skipped)
+    return file_paths
+
+def load_manifest(manifest_path):
+    """Load the manifest of the previous dump, or an empty one."""
     try:
-        with open(file_path, 'r') as file:
-            return file.read()
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically next to the template file."""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, manifest_path)
+
+def file_signature(file_path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(file_path)
     except FileNotFoundError:
-        print(f"File {file_path} not found.")
-        return ""
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def hash_file(file_path):
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def _load(file_path):
+    # Runs in a worker: stat plus the whole content for small files, or just
+    # the stat for large ones, which the writer then streams
+    try:
+        with open(file_path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            data = file.read(CHUNK_SIZE + 1)
+    except FileNotFoundError:
+        return None, None
+    return stat, (data if len(data) <= CHUNK_SIZE else None)
+
+def _read_chunks(file_path):
+    with open(file_path, 'rb') as file:
+        yield from iter(lambda: file.read(CHUNK_SIZE), b'')
+
+def _universal_newlines(chunks, digest):
+    # Hash the raw bytes, and turn \r\n and \r into \n as reading in text mode does
+    pending_cr = False
+    for chunk in chunks:
+        digest.update(chunk)
+        if pending_cr:
+            chunk = b'\r' + chunk
+        pending_cr = chunk.endswith(b'\r')
+        if pending_cr:
+            chunk = chunk[:-1]
+        if b'\r' in chunk:
+            chunk = chunk.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        yield chunk
+    if pending_cr:
+        yield b'\n'
+
+def _copy_range(source, destination, offset, length):
+    source.seek(offset)
+    while length:
+        chunk = source.read(min(length, CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("previous template file is shorter than its manifest")
+        destination.write(chunk)
+        length -= len(chunk)
+
+def _output_matches(output_path, manifest):
+    # Sections can only be reused from the exact file the manifest describes
+    return bool(manifest) and file_signature(output_path) == manifest.get('output')
+
+def dump_files(file_paths, output_path, manifest_path=None, incremental=True, max_workers=MAX_WORKERS):
+    """Write the template file, reusing unchanged sections of the previous one.
 
-def write_to_template_file(output_path, file_contents):
-    """Write the collected file contents to the template file."""
-    with open(output_path, 'w') as output_file:
-        for file_path, contents in file_contents.items():
-            output_file.write(f"#file = {file_path}\n")
-            output_file.write(contents)
-            output_file.write("\n\n")
+    Each file's mtime, size, SHA-256 and byte range in the output are kept in
+    a manifest. A file whose stat is unchanged, or whose bytes hash the same,
+    is copied from the previous output instead of being read; if every file is
+    unchanged the output is left alone. Other files are read by a thread pool
+    a bounded window ahead of the writer and streamed into the output, large
+    ones in chunks. Returns the number of files that had to be read.
+    """
+    file_paths = list(dict.fromkeys(file_paths))
+    manifest_path = manifest_path or output_path + MANIFEST_SUFFIX
+    manifest = load_manifest(manifest_path) if incremental else {}
+    reusable = _output_matches(output_path, manifest)
+    old_files = manifest.get('files', {}) if reusable else {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Plain stat calls are cheaper than handing them to the pool
+        signatures = {path: file_signature(path) for path in file_paths}
+        unchanged = {}
+        suspects = []
+        for path, signature in signatures.items():
+            entry = old_files.get(path)
+            if entry is None:
+                continue
+            if signature == entry['signature']:
+                unchanged[path] = entry
+            elif signature is not None and entry['signature'] is not None and signature[1] == entry['signature'][1]:
+                suspects.append(path)
+        # Touched but byte-identical files are unchanged too
+        for path, digest in zip(suspects, executor.map(hash_file, suspects)):
+            if digest == old_files[path]['sha256']:
+                unchanged[path] = dict(old_files[path], signature=signatures[path])
+
+        now = time.time_ns()
+        def settled(signature):
+            return signature if signature is None or now - signature[0] > RACY_WINDOW_NS else [None, signature[1]]
+
+        if reusable and len(unchanged) == len(file_paths) and list(old_files) == file_paths:
+            if suspects:
+                for path, entry in unchanged.items():
+                    entry['signature'] = settled(entry['signature'])
+                manifest['files'] = unchanged
+                save_manifest(manifest_path, manifest)
+            return 0
+
+        new_files = {}
+        loaded = 0
+        queue = deque()
+        pending = iter(file_paths)
+
+        def fill():
+            # Keep a bounded number of reads in flight ahead of the writer
+            while len(queue) < max_workers * 4:
+                path = next(pending, None)
+                if path is None:
+                    return
+                queue.append((path, None if path in unchanged else executor.submit(_load, path)))
+
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'wb') as output_file, \
+                (open(output_path, 'rb') if unchanged else nullcontext()) as previous:
+            fill()
+            while queue:
+                path, future = queue.popleft()
+                fill()
+                offset = output_file.tell()
+                if future is None:
+                    entry = unchanged[path]
+                    _copy_range(previous, output_file, entry['offset'], entry['length'])
+                    new_files[path] = dict(entry, offset=offset, signature=settled(entry['signature']))
+                    continue
+
+                loaded += 1
+                stat, data = future.result()
+                output_file.write(f"#file = {path}\n".encode())
+                digest = hashlib.sha256()
+                if stat is None:
+                    print(f"File {path} not found.")
+                    signature = sha256 = None
+                else:
+                    chunks = [data] if data is not None else _read_chunks(path)
+                    for chunk in _universal_newlines(chunks, digest):
+                        output_file.write(chunk)
+                    signature, sha256 = [stat.st_mtime_ns, stat.st_size], digest.hexdigest()
+                output_file.write(b"\n\n")
+                new_files[path] = {'signature': settled(signature), 'sha256': sha256,
+                                   'offset': offset, 'length': output_file.tell() - offset}
+
+    os.replace(tmp_path, output_path)
+    save_manifest(manifest_path, {'output': file_signature(output_path), 'files': new_files})
+    return loaded
 
 def main():
     include_file_path = 'data/include.txt'
     output_file_path = 'data/templates/project_files'
 
-    # Step 1: Read the include.txt file
-    file_paths = read_include_file(include_file_path)
-
-    # Step 2: Read the contents of each file
-    file_contents = {}
-    for file_path in file_paths:
-        contents = read_file_contents(file_path)
-        file_contents[file_path] = contents
+    # Step 1: Read the include.txt file and expand its directories and globs,
+    # leaving out the template file and manifest this dump writes
+    file_paths = expand_includes(read_include_file(include_file_path),
+                                 skip=(output_file_path, output_file_path + MANIFEST_SUFFIX))
 
-    # Step 3: Write to the template file
-    write_to_template_file(output_file_path, file_contents)
-    print(f"Template file created at {output_file_path}")
+    # Step 2: Stream changed files into the template file (--full ignores the manifest)
+    loaded = dump_files(file_paths, output_file_path, incremental='--full' not in sys.argv[1:])
+    if loaded:
+        print(f"Template file created at {output_file_path} ({loaded} of {len(set(file_paths))} files read)")
+    else:
+        print(f"Template file at {output_file_path} is up to date")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
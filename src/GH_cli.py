@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import argparse
+from GH_daemon import DAEMON_SOCKET, DaemonError, call, serve
+
+# One entry point for the GH_* tools:
+#
+#   python src/GH_cli.py get-file -r owner/repo docs/index.md
+#   python src/GH_cli.py daemon &        # keep clients, caches and indexes warm
+#   python src/GH_cli.py analytics --days 7
+#
+# Command modules are imported only when their command runs. While a daemon is
+# listening, daemon-capable commands are sent to it and run there instead, so
+# a call costs a socket round trip rather than a cold start; --local runs in
+# this process regardless.
+
+
+def _owner_repo(repo):
+    # "owner/repo", else the Owner and Repository variables of the process running the command
+    if repo:
+        owner, _, name = repo.partition("/")
+    else:
+        owner, name = os.getenv("Owner"), os.getenv("Repository")
+    if not owner or not name:
+        print("Error: no repository given. Pass --repo OWNER/REPO or set Owner and Repository.")
+        return None
+    return owner, name
+
+
+def get_file(repo=None, path=None, dest=None, mirror=False):
+    from GH_repo_pathfinder import GITHUB_API_KEY, PATHFINDER_MIRROR, check_repo_and_get_file
+    from GH_repo_mirror import get_mirror
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    use_mirror = get_mirror(*target) if mirror or PATHFINDER_MIRROR else None
+    return 0 if check_repo_and_get_file(*target, path, GITHUB_API_KEY, dest=dest, mirror=use_mirror) is not None else 1
+
+
+def list_dir(repo=None, path="", branch=None):
+    from GH_repo_mirror import get_mirror
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    mirror = get_mirror(*target, branch)
+    children = mirror.list_dir(path)
+    if children is None:
+        print(f"'{path}' is not a directory of {target[0]}/{target[1]}.")
+        return 1
+    for name, entry in children.items():
+        print(f"{name}/" if entry["type"] == "tree" else name)
+    if not mirror.complete:
+        print("(The tree is too large to list in full; entries may be missing.)")
+    return 0
+
+
+def file_exists(repo=None, path=None):
+    from GH_repo_manager import check_file_exists
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    exists = check_file_exists(*target, path)
+    print(f"{path} {'exists' if exists else 'does not exist'} in {target[0]}/{target[1]}.")
+    return 0 if exists else 1
+
+
+def list_prs(repo=None):
+    from GH_pull_requests import list_open_pull_requests
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    return 0 if list_open_pull_requests(*target) is not None else 1
+
+
+def review(repo=None, number=None):
+    from GH_pull_requests import automatic_pr_review
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    return 0 if automatic_pr_review(*target, number) is not None else 1
+
+
+def review_all(repo=None):
+    from GH_pull_requests import review_all_open_pull_requests
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    summary = review_all_open_pull_requests(*target)
+    return 0 if summary is not None and not summary["failed"] and not summary["comment_failed"] else 1
+
+
+def pr_status(repo=None, number=None):
+    from GH_pull_requests import check_pr_status
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    return 0 if check_pr_status(*target, number) else 1
+
+
+def merge(repo=None, number=None):
+    from GH_pull_requests import merge_pull_request
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    return 0 if merge_pull_request(*target, number) else 1
+
+
+def merge_queue(repo=None, numbers=(), method="merge"):
+    from GH_pull_requests import merge_queue as run_merge_queue
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    return 0 if run_merge_queue(*target, list(numbers), method) is not None else 1
+
+
+def analytics(repo=None, days=30, state="all", backend="rest"):
+    from GH_pull_requests import pr_analytics
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    return 0 if pr_analytics(*target, state=state, days=days, backend=backend) is not None else 1
+
+
+def labels(repo=None, number=None, action="list", names=()):
+    from GH_pull_requests import manage_pr_labels
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    manage_pr_labels(*target, number, action, list(names) or None)
+    return 0
+
+
+def update_files(repo=None, content=None, paths=(), atomic=False):
+    from GH_multi_file_updater import update_multiple_files
+    target = _owner_repo(repo)
+    if target is None:
+        return 1
+    update_multiple_files(*target, list(paths), content, atomic=atomic)
+    return 0
+
+
+def provision(manifest=None, workers=None):
+    from GH_client import POOL_SIZE
+    from GH_repo_manager import provision_from_manifest
+    results = provision_from_manifest(manifest, workers or POOL_SIZE)
+    return 0 if results is not None and all(result["status"] != "failed" for result in results) else 1
+
+
+def resolve_conflicts():
+    import GH_conflict_resolver
+    GH_conflict_resolver.main()
+    return 0
+
+
+def metrics(prometheus=False):
+    # Most useful against a daemon, where it covers every call made since it started
+    from GH_metrics import get_metrics
+    print(get_metrics().to_prometheus() if prometheus else json.dumps(get_metrics().to_json(), indent=2))
+    return 0
+
+
+def pr_menu():
+    import GH_pull_requests
+    GH_pull_requests.main()
+    return 0
+
+
+def webhook():
+    import GH_webhook_receiver
+    GH_webhook_receiver.main()
+    return 0
+
+
+# Run by the daemon, keyed by command name
+DAEMON_COMMANDS = {
+    "get-file": get_file, "ls": list_dir, "exists": file_exists, "prs": list_prs, "review": review,
+    "review-all": review_all, "status": pr_status, "merge": merge, "merge-queue": merge_queue,
+    "analytics": analytics, "labels": labels, "update-files": update_files, "provision": provision,
+    "resolve-conflicts": resolve_conflicts, "metrics": metrics,
+}
+# Interactive or long-running; always run in the calling process
+LOCAL_COMMANDS = {"pr-menu": pr_menu, "webhook": webhook}
+
+# Imported when the daemon starts so the first call doesn't pay for them
+WARM_MODULES = ("GH_pull_requests", "GH_repo_manager", "GH_repo_pathfinder", "GH_multi_file_updater",
+                "GH_conflict_resolver", "GH_repo_mirror")
+
+
+def warm_up():
+    for module in WARM_MODULES:
+        __import__(module)
+    from GH_client import get_client
+    get_client()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="GH_cli.py", description="GitHub repository and pull request tools.")
+    parser.add_argument("--local", action="store_true", help="run in this process even if a daemon is listening")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    def add(name, help_text, repo=True):
+        command = commands.add_parser(name, help=help_text)
+        if repo:
+            command.add_argument("-r", "--repo", help="OWNER/REPO (default: the Owner and Repository variables)")
+        return command
+
+    command = add("get-file", "print a file, or stream it to --dest")
+    command.add_argument("path")
+    command.add_argument("--dest", type=os.path.abspath, help="write the file here instead of printing it")
+    command.add_argument("--mirror", action="store_true", help="answer from the local branch mirror")
+    command = add("ls", "list a directory from the branch mirror")
+    command.add_argument("path", nargs="?", default="")
+    command.add_argument("--branch")
+    add("exists", "check whether a file exists").add_argument("path")
+    add("prs", "list open pull requests")
+    add("review", "review one pull request").add_argument("number")
+    add("review-all", "review every open pull request")
+    add("status", "show a pull request's checks and reviews").add_argument("number")
+    add("merge", "merge one pull request").add_argument("number")
+    command = add("merge-queue", "merge pull requests in order")
+    command.add_argument("numbers", nargs="+")
+    command.add_argument("--method", default="merge", choices=("merge", "squash", "rebase"))
+    command = add("analytics", "pull request analytics")
+    command.add_argument("--days", type=int, default=30)
+    command.add_argument("--state", default="all", choices=("open", "closed", "all"))
+    command.add_argument("--backend", default="rest", choices=("rest", "graphql", "store"))
+    command = add("labels", "list, add or remove pull request labels")
+    command.add_argument("number")
+    command.add_argument("action", nargs="?", default="list", choices=("list", "add", "remove"))
+    command.add_argument("names", nargs="*")
+    command = add("update-files", "write the same content to several files on a new branch")
+    command.add_argument("content")
+    command.add_argument("paths", nargs="+")
+    command.add_argument("--atomic", action="store_true", help="commit every file at once")
+    command = add("provision", "create and fill repositories from a JSON or YAML manifest", repo=False)
+    command.add_argument("manifest", type=os.path.abspath)
+    command.add_argument("--workers", type=int)
+    add("resolve-conflicts", "merge main into a new feature branch and open a PR", repo=False)
+    add("metrics", "show request metrics", repo=False).add_argument("--prometheus", action="store_true")
+    add("pr-menu", "interactive pull request menu", repo=False)
+    add("webhook", "run the webhook receiver", repo=False)
+    add("daemon", "serve commands over a Unix socket, keeping caches warm", repo=False)
+    add("stop", "stop the daemon", repo=False)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    name = args.command
+    params = {key: value for key, value in vars(args).items() if key not in ("command", "local")}
+
+    if name == "daemon":
+        serve(DAEMON_COMMANDS, warm_up=warm_up)
+        return 0
+    if name == "stop":
+        try:
+            result = call("shutdown")
+        except DaemonError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(result["output"].strip() if result else f"No daemon is listening on {DAEMON_SOCKET}.")
+        return 0
+    if name in LOCAL_COMMANDS:
+        return LOCAL_COMMANDS[name]()
+
+    if "repo" in params and not params["repo"] and os.getenv("Owner") and os.getenv("Repository"):
+        # This shell's repository wins over the daemon's
+        params["repo"] = f"{os.getenv('Owner')}/{os.getenv('Repository')}"
+    if not args.local:
+        try:
+            result = call(name, params)
+        except DaemonError as e:
+            sys.stdout.write(e.output)
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        if result is not None:
+            sys.stdout.write(result["output"])
+            return result["exit"] or 0
+    return DAEMON_COMMANDS[name](**params) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
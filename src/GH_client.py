@@ -0,0 +1,205 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from GH_http_cache import HTTPCache
+from GH_rate_limiter import RateLimiter, request_resource
+from GH_metrics import get_metrics
+
+load_dotenv()
+
+# Get variables from environment
+GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
+
+# GitHub API base URL (can point at a local stand-in server)
+BASE_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+# Connection pool and timeout defaults
+POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "10"))
+CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "30"))
+
+# Conditional-request cache for GETs ("0" disables it)
+HTTP_CACHE_ENABLED = os.getenv("GITHUB_HTTP_CACHE", "1") != "0"
+
+
+class GitHubClient:
+    """One keep-alive session shared by every GH_* module.
+
+    Paths starting with "/" are resolved against base_url; absolute URLs
+    (e.g. pagination links or comments_url) are used as given. GETs are
+    revalidated against `cache` when one is set; a 304 is answered from disk.
+    Every request goes through `limiter`, which paces it against the token's
+    rate-limit budget and retries throttled responses, and every attempt is
+    recorded in the shared metrics (see GH_metrics).
+    """
+
+    def __init__(self, token=GITHUB_API_KEY, base_url=BASE_URL, pool_size=POOL_SIZE,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), cache=None, limiter=None):
+        self.base_url = base_url.rstrip("/")
+        # GitHub Enterprise serves GraphQL at /api/graphql next to /api/v3
+        if self.base_url.endswith("/api/v3"):
+            self.graphql_url = f"{self.base_url[:-len('/v3')]}/graphql"
+        else:
+            self.graphql_url = f"{self.base_url}/graphql"
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, cache=True, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if method == "GET" and cache and self.cache is not None and not kwargs.get("stream"):
+            return self._cached_get(self.url(path), **kwargs)
+        return self._send(method, self.url(path), **kwargs)
+
+    def _send(self, method, url, **kwargs):
+        metrics = get_metrics()
+        if self.limiter is None:
+            started = time.monotonic()
+            response = self.session.request(method, url, **kwargs)
+            metrics.record(method, url, response, time.monotonic() - started)
+            return response
+        auth = (kwargs.get("headers") or {}).get("Authorization") or self.session.headers.get("Authorization")
+        resource = request_resource(url)
+        attempt = 0
+        while True:
+            if attempt and hasattr(kwargs.get("data"), "seek"):
+                # A streamed body was consumed by the previous attempt
+                kwargs["data"].seek(0)
+            self.limiter.acquire(auth, method, resource)
+            started = time.monotonic()
+            response = self.session.request(method, url, **kwargs)
+            metrics.record(method, url, response, time.monotonic() - started, attempt)
+            self.limiter.update(auth, response, resource)
+            delay = self.limiter.retry_delay(response, attempt, method)
+            if delay is None:
+                return response
+            print(f"Rate limited or server error ({response.status_code}) on {method} {url}. Retrying in {delay:.1f}s...")
+            # Hand the connection back to the pool; a streamed body would otherwise hold it
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def paginate(self, path, params=None, stop=None, per_page=100, items_key=None, **kwargs):
+        """Yield items from a list endpoint one page at a time, following Link: next lazily.
+
+        Iteration ends before the first item for which stop(item) is true, so
+        callers reading a sorted listing only fetch the pages they need.
+        items_key names the list inside object-shaped pages (e.g. "check_runs").
+        Raises requests.HTTPError on a failed page.
+        """
+        params = dict(params or {})
+        params.setdefault("per_page", per_page)
+        url = path
+        while url:
+            response = self.get(url, params=params, **kwargs)
+            response.raise_for_status()
+            page = response.json()
+            items = page[items_key] if items_key else page
+            for item in items:
+                if stop is not None and stop(item):
+                    return
+                yield item
+            url = response.links.get("next", {}).get("url")
+            # The next link already carries the query string
+            params = None
+
+    def graphql(self, query, variables=None, partial=False):
+        """POST a GraphQL query; returns the `data` dict, or None after printing the errors.
+
+        With partial, data that came back alongside errors is still returned;
+        the fields that failed are null in it.
+        """
+        response = self.post(self.graphql_url, json={"query": query, "variables": variables or {}})
+        if response.status_code != 200:
+            print(f"GraphQL request failed. Status code: {response.status_code}")
+            return None
+        result = response.json()
+        if result.get("errors"):
+            print(f"GraphQL errors: {[error.get('message') for error in result['errors']]}")
+            if not partial:
+                return None
+        return result.get("data")
+
+    def budget(self, resource="core"):
+        """Rate-limit budget of one resource for this client's token (None until a response reports it).
+
+        Lets batch jobs size their work.
+        """
+        if self.limiter is None:
+            return None
+        return self.limiter.budget(self.session.headers.get("Authorization"), resource)
+
+    def _cached_get(self, url, params=None, headers=None, **kwargs):
+        url = requests.Request("GET", url, params=params).prepare().url
+        headers = dict(headers or {})
+        auth = headers.get("Authorization") or self.session.headers.get("Authorization")
+        entry = self.cache.lookup(url, auth)
+        if entry is not None:
+            headers.update(self.cache.validators(entry))
+        response = self._send("GET", url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            get_metrics().record_cache_hit("GET", url)
+            return self.cache.to_response(entry, response)
+        if response.status_code == 200:
+            self.cache.store(url, auth, response)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+# Commands may run concurrently (the daemon gives each its own thread)
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GitHubClient(cache=HTTPCache() if HTTP_CACHE_ENABLED else None,
+                                       limiter=RateLimiter())
+    return _client
+
+def set_client(client):
+    """Install a client (e.g. one aimed at a local stand-in server) for all modules."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
+    return client
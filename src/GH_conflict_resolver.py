@@ -1,8 +1,12 @@
 import os
-import requests
+from GH_client import get_client
+from GH_metrics import instrumented
 from dotenv import load_dotenv
 import base64
 import time
+from GH_merge3 import apply_patch, merge3, merge3_many
+from GH_file_transfer import download_bytes, put_file
+from GH_object_store import get_blob, get_object_store, get_tree_listing, git_blob_sha
 
 load_dotenv()
 
@@ -11,33 +15,44 @@ GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
 OWNER = os.getenv("Owner")
 REPO = os.getenv("Repository")
 
-# GitHub API base URL below
-BASE_URL = "https://api.github.com"
-HEADERS = {"Authorization": f"token {GITHUB_API_KEY}"}
+# The compare API lists at most this many changed files
+COMPARE_FILE_LIMIT = 300
 
-def get_file_content(owner, repo, file_path, branch="main"):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
-    response = requests.get(url, headers=HEADERS)
+def get_file_content(owner, repo, file_path, branch="main", sha=None):
+    # With a known blob SHA the content comes from the local object store when possible
+    if sha:
+        data = get_blob(owner, repo, sha)
+        return data.decode("utf-8") if data is not None else None
+    url = f"/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
+    response = get_client().get(url)
     if response.status_code == 200:
-        content = base64.b64decode(response.json()["content"]).decode("utf-8")
-        return content
+        file_data = response.json()
+        if file_data.get("encoding") == "none":
+            # Over 1 MB the contents API leaves "content" empty; stream the blob instead
+            data = download_bytes(owner, repo, sha=file_data["sha"])
+            if data is None:
+                return None
+        else:
+            data = base64.b64decode(file_data["content"])
+        get_object_store().put(file_data["sha"], data)
+        return data.decode("utf-8")
     return None
 
 def create_pull_request(owner, repo, base_branch, head_branch, title, body):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls"
+    url = f"/repos/{owner}/{repo}/pulls"
     data = {
         "title": title,
         "body": body,
         "head": head_branch,
         "base": base_branch
     }
-    response = requests.post(url, headers=HEADERS, json=data)
+    response = get_client().post(url, json=data)
     return response.json() if response.status_code == 201 else None
 
 def create_feature_branch(owner, repo, base_branch="main"):
     # Get the SHA of the latest commit on the base branch
-    url = f"{BASE_URL}/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
-    response = requests.get(url, headers=HEADERS)
+    url = f"/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
+    response = get_client().get(url)
     if response.status_code != 200:
         print(f"Failed to get base branch info. Status code: {response.status_code}")
         return None
@@ -47,12 +62,12 @@ def create_feature_branch(owner, repo, base_branch="main"):
     # Create a new branch
     timestamp = int(time.time())
     new_branch_name = f"feature-branch-{timestamp}"
-    url = f"{BASE_URL}/repos/{owner}/{repo}/git/refs"
+    url = f"/repos/{owner}/{repo}/git/refs"
     data = {
         "ref": f"refs/heads/{new_branch_name}",
         "sha": sha
     }
-    response = requests.post(url, headers=HEADERS, json=data)
+    response = get_client().post(url, json=data)
     if response.status_code == 201:
         print(f"Created new branch: {new_branch_name}")
         return new_branch_name
@@ -61,8 +76,8 @@ def create_feature_branch(owner, repo, base_branch="main"):
         return None
 
 def check_repo_content(owner, repo):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/contents"
-    response = requests.get(url, headers=HEADERS)
+    url = f"/repos/{owner}/{repo}/contents"
+    response = get_client().get(url)
     if response.status_code == 200:
         contents = response.json()
         # Filter out .gitignore and README files
@@ -70,28 +85,87 @@ def check_repo_content(owner, repo):
         return len(significant_files) > 0
     return False
 
-def analyze_conflicts(owner, repo, base_branch, head_branch):
-    compare_url = f"{BASE_URL}/repos/{owner}/{repo}/compare/{base_branch}...{head_branch}"
-    response = requests.get(compare_url, headers=HEADERS)
+def compare_branches(owner, repo, base_branch, head_branch):
+    compare_url = f"/repos/{owner}/{repo}/compare/{base_branch}...{head_branch}"
+    response = get_client().get(compare_url)
     if response.status_code == 200:
-        data = response.json()
-        return data["files"]  # This now includes all changed files with their status
+        return response.json()
+    return None
+
+def get_branch_sha(owner, repo, branch):
+    response = get_client().get(f"/repos/{owner}/{repo}/git/refs/heads/{branch}")
+    if response.status_code != 200:
+        print(f"Failed to get branch {branch}. Status code: {response.status_code}")
+        return None
+    return response.json()["object"]["sha"]
+
+def changed_files(owner, repo, comparison, head_branch):
+    # Past the compare API's file cap the list is rebuilt by diffing the merge-base
+    # and head tree listings; those entries have no patch, so they use blobs. Only
+    # complete listings will do: a path missing from a truncated one isn't removed
+    files = comparison["files"]
+    if len(files) < COMPARE_FILE_LIMIT:
+        return files
+    head_sha = get_branch_sha(owner, repo, head_branch)
+    old_tree = get_tree_listing(owner, repo, comparison["merge_base_commit"]["sha"])
+    new_tree = get_tree_listing(owner, repo, head_sha) if head_sha and old_tree is not None else None
+    if old_tree is None or new_tree is None:
+        # The compare API never lists more than this, even when paginated
+        print(f"Only the first {COMPARE_FILE_LIMIT} changed files could be listed")
+        return files
+    files = []
+    for path, entry in new_tree.items():
+        if entry["type"] != "blob":
+            continue
+        previous = old_tree.get(path)
+        if previous is None:
+            files.append({"filename": path, "status": "added", "sha": entry["sha"]})
+        elif previous["sha"] != entry["sha"]:
+            files.append({"filename": path, "status": "modified", "sha": entry["sha"]})
+    for path, entry in old_tree.items():
+        if entry["type"] == "blob" and path not in new_tree:
+            files.append({"filename": path, "status": "removed", "sha": entry["sha"]})
+    return files
+
+def analyze_conflicts(owner, repo, base_branch, head_branch):
+    data = compare_branches(owner, repo, base_branch, head_branch)
+    if data:
+        return changed_files(owner, repo, data, head_branch)  # This now includes all changed files with their status
     return None
 
-def resolve_conflicts(owner, repo, file_path, base_content, head_content):
-    # This is a very simple conflict resolution strategy
-    # In a real-world scenario, you'd want a more sophisticated approach
-    merged_content = f"<<<<<<< BASE\n{base_content}\n=======\n{head_content}\n>>>>>>> HEAD\n"
+def apply_file_patch(owner, repo, ancestor_content, file):
+    # Rebuild a changed file from the merge-base version and its compare patch. The
+    # result must hash to the file's blob SHA; missing, truncated or non-applying
+    # patches fall back to fetching the blob
+    patch = file.get("patch")
+    if patch is not None:
+        content = apply_patch(ancestor_content, patch)
+        if content is not None and git_blob_sha(content.encode("utf-8")) == file["sha"]:
+            get_object_store().put(file["sha"], content.encode("utf-8"))
+            return content
+    return get_file_content(owner, repo, file["filename"], sha=file["sha"])
+
+def resolve_conflicts(owner, repo, file_path, base_content, head_content, ancestor_content=None, merge_base=None):
+    # Three-way merge against the merge-base version: one-sided changes are applied
+    # and markers only surround regions both branches changed differently
+    if ancestor_content is None and merge_base:
+        ancestor_content = get_file_content(owner, repo, file_path, merge_base)
+    if ancestor_content is None:
+        # No common ancestor version to merge against; leave the whole file for review
+        return f"<<<<<<< BASE\n{base_content}\n=======\n{head_content}\n>>>>>>> HEAD\n"
+    merged_content, conflicts = merge3(ancestor_content, base_content, head_content)
+    if conflicts:
+        print(f"{file_path}: {conflicts} conflicting region(s) left for review")
     return merged_content
 
 def refactor_file(content, old_name, new_name):
     return content.replace(old_name, new_name)
 
 def update_file_in_branch(owner, repo, file_path, branch, content, commit_message):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}"
+    url = f"/repos/{owner}/{repo}/contents/{file_path}"
     
     # First, get the current file to obtain its SHA
-    response = requests.get(url, headers=HEADERS, params={"ref": branch})
+    response = get_client().get(url, params={"ref": branch})
     if response.status_code == 200:
         current_file = response.json()
         sha = current_file["sha"]
@@ -99,29 +173,21 @@ def update_file_in_branch(owner, repo, file_path, branch, content, commit_messag
         print(f"Failed to get current file. Status code: {response.status_code}")
         return False
 
-    # Now, update the file
-    data = {
-        "message": commit_message,
-        "content": base64.b64encode(content.encode()).decode(),
-        "sha": sha,
-        "branch": branch
-    }
-    response = requests.put(url, headers=HEADERS, json=data)
-    if response.status_code == 200:
+    # Now, update the file (streamed; content may also be bytes, a path or a file object)
+    if put_file(owner, repo, file_path, content, commit_message, branch, sha):
         print(f"File {file_path} updated successfully in branch {branch}")
         return True
-    else:
-        print(f"Failed to update file. Status code: {response.status_code}")
-        return False
+    return False
     
-def handle_added_file(owner, repo, file_path, branch):
-    content = get_file_content(owner, repo, file_path, branch)
+def handle_added_file(owner, repo, file_path, branch, sha=None):
+    content = get_file_content(owner, repo, file_path, branch, sha)
     return content  # This content should be added to the feature branch
 
-def handle_removed_file(owner, repo, file_path, base_branch):
-    content = get_file_content(owner, repo, file_path, base_branch)
+def handle_removed_file(owner, repo, file_path, base_branch, sha=None):
+    content = get_file_content(owner, repo, file_path, base_branch, sha)
     return f"# This file was deleted in the base branch. Please review.\n\n{content}"
 
+@instrumented("resolve_branch_conflicts")
 def main():
     if not check_repo_content(OWNER, REPO):
         print("Repository is empty or contains only basic files. No action needed.")
@@ -133,20 +199,69 @@ def main():
         print("Failed to create new feature branch. Exiting.")
         return
 
-    changes = analyze_conflicts(OWNER, REPO, base_branch, new_feature_branch)
+    comparison = compare_branches(OWNER, REPO, base_branch, new_feature_branch)
+    changes = changed_files(OWNER, REPO, comparison, new_feature_branch) if comparison else None
     if changes:
+        merge_base = comparison["merge_base_commit"]["sha"]
+        # Blob SHAs for every path at the base head and the merge base (two cached
+        # listings), so file versions come from the object store instead of by path.
+        # Without a complete listing every version is fetched by path instead
+        base_tree = get_tree_listing(OWNER, REPO, comparison["base_commit"]["sha"]) or {}
+        ancestor_tree = get_tree_listing(OWNER, REPO, merge_base) or {}
+        base_sha = lambda path: base_tree.get(path, {}).get("sha")
+
+        # Only the merge-base version of each modified file is fetched; both branch
+        # versions are rebuilt from compare patches. Everything is merged together
+        # afterwards so large files can be spread over worker processes
+        merge_jobs = []
+        head_contents = {}
+        resolved = {}
+        base_patches = None
         for file in changes:
             if file["status"] == "modified":
-                base_content = get_file_content(OWNER, REPO, file["filename"], base_branch)
-                head_content = get_file_content(OWNER, REPO, file["filename"], new_feature_branch)
+                path = file["filename"]
+                ancestor_sha = ancestor_tree.get(path, {}).get("sha")
+                if ancestor_sha and base_sha(path) == ancestor_sha:
+                    # Unchanged on the base branch: the merge is the feature version as is
+                    continue
+                ancestor_content = get_file_content(OWNER, REPO, path, merge_base, ancestor_sha)
+                if ancestor_content is None:
+                    base_content = get_file_content(OWNER, REPO, path, base_branch, base_sha(path))
+                    head_content = get_file_content(OWNER, REPO, path, new_feature_branch, file.get("sha"))
+                    if base_content and head_content:
+                        head_contents[path] = head_content
+                        resolved[path] = resolve_conflicts(OWNER, REPO, path, base_content, head_content)
+                    continue
+                if base_patches is None:
+                    # Base-side patches come from the reverse comparison, fetched once
+                    reverse = compare_branches(OWNER, REPO, new_feature_branch, base_branch)
+                    base_patches = {f["filename"]: f for f in reverse["files"]} if reverse else {}
+                head_content = apply_file_patch(OWNER, REPO, ancestor_content, file)
+                base_file = base_patches.get(path)
+                if base_file:
+                    base_content = apply_file_patch(OWNER, REPO, ancestor_content, base_file)
+                else:
+                    base_content = get_file_content(OWNER, REPO, path, base_branch, base_sha(path))
                 if base_content and head_content:
-                    merged_content = resolve_conflicts(OWNER, REPO, file["filename"], base_content, head_content)
+                    head_contents[path] = head_content
+                    merge_jobs.append((path, ancestor_content, base_content, head_content))
+        for file_path, (merged_content, conflicts) in merge3_many(merge_jobs).items():
+            if conflicts:
+                print(f"{file_path}: {conflicts} conflicting region(s) left for review")
+            resolved[file_path] = merged_content
+
+        for file in changes:
+            success = True
+            if file["status"] == "modified":
+                merged_content = resolved.get(file["filename"])
+                # Nothing to write if the merge reproduces the feature branch version
+                if merged_content is not None and merged_content != head_contents[file["filename"]]:
                     success = update_file_in_branch(OWNER, REPO, file["filename"], new_feature_branch, merged_content, "Resolve conflicts")
             elif file["status"] == "added":
-                new_content = handle_added_file(OWNER, REPO, file["filename"], base_branch)
+                new_content = handle_added_file(OWNER, REPO, file["filename"], base_branch, base_sha(file["filename"]))
                 success = update_file_in_branch(OWNER, REPO, file["filename"], new_feature_branch, new_content, "Add new file")
             elif file["status"] == "removed":
-                kept_content = handle_removed_file(OWNER, REPO, file["filename"], base_branch)
+                kept_content = handle_removed_file(OWNER, REPO, file["filename"], base_branch, base_sha(file["filename"]))
                 success = update_file_in_branch(OWNER, REPO, file["filename"], new_feature_branch, kept_content, "Keep removed file for review")
             
             if not success:
@@ -0,0 +1,183 @@
+import io
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import threading
+import socketserver
+from contextvars import ContextVar
+
+# Only the standard library is imported here: the client side runs on every CLI
+# invocation and has to stay fast. For the same reason the socket path comes
+# from the process environment alone, not from .env.
+
+# Same default directory as GH_http_cache.CACHE_DIR
+DAEMON_SOCKET = os.getenv("GITHUB_DAEMON_SOCKET", os.path.join(
+    os.getenv("GITHUB_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "agent_github")), "daemon.sock"))
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+SERVER_ERROR = -32000
+
+
+class DaemonError(Exception):
+    """A request the daemon answered with an error; `output` holds what the command printed first."""
+
+    def __init__(self, message, output=""):
+        super().__init__(message)
+        self.output = output
+
+
+# The buffer collecting the current request's output, if any
+_output = ContextVar("daemon_output", default=None)
+
+
+class ContextOutput(io.TextIOBase):
+    """sys.stdout stand-in that sends each request's prints back to the client that made it.
+
+    Output is routed by context, so worker threads started with
+    contextvars.copy_context().run (as review_all_open_pull_requests and
+    provision_repos do) print to their request too; anything else goes to
+    the daemon's own stdout.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        buffer = _output.get()
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self):
+        if _output.get() is None:
+            self.stream.flush()
+
+
+def _connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def call(method, params=None, socket_path=DAEMON_SOCKET):
+    """Run one request in the daemon; returns its result, or None if no daemon is listening.
+
+    Raises DaemonError if the daemon reports an error.
+    """
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rwb") as f:
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+        f.write(json.dumps(request).encode() + b"\n")
+        f.flush()
+        line = f.readline()
+    if not line:
+        raise DaemonError("The daemon closed the connection without answering")
+    response = json.loads(line)
+    if "error" in response:
+        error = response["error"]
+        raise DaemonError(error["message"], (error.get("data") or {}).get("output", ""))
+    return response["result"]
+
+
+def make_handler(commands, server_state):
+    class DaemonHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            # One JSON-RPC request per line; a client may send several on one connection
+            for line in self.rfile:
+                response = self.respond(line)
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+                if server_state.get("stopping"):
+                    # Only once the reply is out: the process exits as soon as serving stops
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+
+        def respond(self, line):
+            try:
+                request = json.loads(line)
+                method, params = request["method"], request.get("params") or {}
+            except (ValueError, KeyError, TypeError) as e:
+                return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": str(e)}}
+            reply = {"jsonrpc": "2.0", "id": request.get("id")}
+            if method == "ping":
+                reply["result"] = {"pid": os.getpid(), "uptime": time.monotonic() - server_state["started"]}
+                return reply
+            if method == "shutdown":
+                server_state["stopping"] = True
+                reply["result"] = {"exit": 0, "output": "Daemon stopping.\n"}
+                return reply
+            if method not in commands:
+                reply["error"] = {"code": METHOD_NOT_FOUND, "message": f"Unknown command '{method}'"}
+                return reply
+
+            buffer = io.StringIO()
+            token = _output.set(buffer)
+            try:
+                reply["result"] = {"exit": commands[method](**params), "output": buffer.getvalue()}
+            except Exception as e:
+                reply["error"] = {"code": SERVER_ERROR, "message": f"{type(e).__name__}: {e}",
+                                  "data": {"output": buffer.getvalue()}}
+            finally:
+                _output.reset(token)
+            return reply
+
+    return DaemonHandler
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(commands, socket_path=DAEMON_SOCKET, warm_up=None):
+    """Answer JSON-RPC requests for `commands` ({name: function(**params) -> exit code}) until shut down.
+
+    Each request runs on its own thread in this one process, so the shared
+    client's connection pool, the HTTP cache, the object store, mirrors and
+    path indexes stay warm from one call to the next. warm_up() runs once
+    before the socket opens. The socket is only accessible to this user.
+    """
+    if _connect(socket_path) is not None:
+        print(f"A daemon is already listening on {socket_path}.")
+        return
+    if os.path.exists(socket_path):
+        # Left behind by a daemon that didn't shut down cleanly
+        os.unlink(socket_path)
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if warm_up is not None:
+        warm_up()
+
+    server_state = {"started": time.monotonic()}
+    previous_umask = os.umask(0o077)
+    try:
+        server = DaemonServer(socket_path, make_handler(commands, server_state))
+    finally:
+        os.umask(previous_umask)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"Daemon listening on {socket_path} (pid {os.getpid()})")
+    sys.stdout.flush()
+    stdout = sys.stdout
+    sys.stdout = ContextOutput(stdout)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout = stdout
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        print("Daemon stopped.")
@@ -0,0 +1,264 @@
+import io
+import os
+import json
+import mmap
+import time
+import base64
+import shutil
+import tempfile
+from dotenv import load_dotenv
+from GH_client import get_client
+
+load_dotenv()
+
+# Bytes read from / written to the network per chunk
+TRANSFER_CHUNK_SIZE = int(os.getenv("GITHUB_TRANSFER_CHUNK_KB", "1024")) * 1024
+
+# Uploads larger than this go through the blobs API and a commit instead of the contents API
+UPLOAD_BLOB_THRESHOLD = int(float(os.getenv("GITHUB_UPLOAD_BLOB_THRESHOLD_MB", "10")) * 1024 * 1024)
+
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _open_raw(owner, repo, file_path=None, ref=None, sha=None, headers=None):
+    # The raw media type returns file bytes directly (up to 100 MB) instead of
+    # base64 inside JSON, which the contents API leaves empty above 1 MB
+    headers = {**(headers or {}), "Accept": RAW_MEDIA_TYPE}
+    if sha:
+        url = f"/repos/{owner}/{repo}/git/blobs/{sha}"
+        params = None
+    else:
+        url = f"/repos/{owner}/{repo}/contents/{file_path}"
+        params = {"ref": ref} if ref else None
+    return get_client().get(url, params=params, headers=headers, stream=True)
+
+
+def download_file(owner, repo, file_path=None, ref=None, dest=None, sha=None, headers=None,
+                  chunk_size=TRANSFER_CHUNK_SIZE):
+    """Stream a file's raw bytes in chunks, so memory use doesn't grow with its size.
+
+    The file is read by blob SHA when one is given, otherwise by path at ref.
+    dest may be a path (written and returned) or a binary file object (written
+    and returned). Without dest the bytes go to an anonymous temporary file and
+    a read-only mmap of it is returned; it slices like bytes. Returns None on
+    failure.
+    """
+    response = _open_raw(owner, repo, file_path, ref, sha, headers)
+    with response:
+        if response.status_code != 200:
+            print(f"Failed to download {sha or file_path}. Status code: {response.status_code}")
+            return None
+        if isinstance(dest, str):
+            tmp_path = f"{dest}.part"
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size):
+                        f.write(chunk)
+                os.replace(tmp_path, dest)
+            except OSError as e:
+                # A dropped connection (requests' errors are OSErrors) or a full disk
+                print(f"Failed to download {sha or file_path}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return None
+            return dest
+        if dest is not None:
+            for chunk in response.iter_content(chunk_size):
+                dest.write(chunk)
+            return dest
+        with tempfile.TemporaryFile() as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+            f.flush()
+            if not f.tell():
+                return b""
+            # The mapping keeps its own handle, so the temporary file can be closed
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def download_bytes(owner, repo, file_path=None, ref=None, sha=None, headers=None):
+    """The whole file as bytes (streamed, so only one copy is ever held)."""
+    data = download_file(owner, repo, file_path, ref, sha=sha, headers=headers)
+    if isinstance(data, mmap.mmap):
+        try:
+            return data[:]
+        finally:
+            data.close()
+    return data
+
+
+def _open_source(content):
+    # (binary file object, bytes left to read, whether we opened it). str is
+    # content, not a path; paths are passed as os.PathLike (e.g. pathlib.Path)
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        return io.BytesIO(content), memoryview(content).nbytes, True
+    if isinstance(content, os.PathLike):
+        f = open(content, "rb")
+        return f, os.fstat(f.fileno()).st_size, True
+    seekable = getattr(content, "seekable", None)
+    if seekable is None or not seekable():
+        # Pipes and sockets have no size and can't be rewound for a retry, so
+        # they are spooled first (in memory up to one chunk, on disk beyond)
+        spool = tempfile.SpooledTemporaryFile(max_size=TRANSFER_CHUNK_SIZE)
+        shutil.copyfileobj(content, spool, TRANSFER_CHUNK_SIZE)
+        size = spool.tell()
+        spool.seek(0)
+        return spool, size, True
+    start = content.tell()
+    size = content.seek(0, os.SEEK_END) - start
+    content.seek(start)
+    return content, size, False
+
+
+class Base64JSONBody:
+    """A JSON request body whose "content" is the base64 of a binary stream, encoded as it is read.
+
+    The length is known up front, so requests sends it with Content-Length
+    while reading it block by block; only one chunk of the source is held in
+    memory. seek(0) rewinds it for a retry.
+    """
+
+    def __init__(self, fields, source, size, chunk_size=TRANSFER_CHUNK_SIZE):
+        self.source = source
+        self.start = source.tell()
+        # Base64 encodes 3 bytes at a time, so chunks are read in multiples of 3
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        head = json.dumps(fields)[:-1]
+        self.prefix = f'{head}{", " if fields else ""}"content": "'.encode()
+        self.suffix = b'"}'
+        self.length = len(self.prefix) + 4 * ((size + 2) // 3) + len(self.suffix)
+        self.seek(0)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("Base64JSONBody can only be rewound to the start")
+        self.source.seek(self.start)
+        self._pending = self.prefix
+        self._offset = 0
+        self._carry = b""
+        self._state = "content"
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        while True:
+            block = self.read(self.chunk_size)
+            if not block:
+                return
+            yield block
+
+    def _refill(self):
+        if self._state == "content":
+            data = self._carry + self.source.read(self.chunk_size)
+            if len(data) > len(self._carry):
+                # Short reads (pipes, sockets) leave a partial 3-byte group for next time
+                cut = len(data) - len(data) % 3
+                self._pending, self._carry = base64.b64encode(data[:cut]), data[cut:]
+            else:
+                self._pending, self._state = base64.b64encode(data) + self.suffix, "done"
+            self._offset = 0
+            return True
+        return False
+
+    def read(self, size=-1):
+        out = bytearray()
+        while size < 0 or len(out) < size:
+            if self._offset >= len(self._pending) and not self._refill():
+                break
+            end = len(self._pending) if size < 0 else self._offset + size - len(out)
+            out += self._pending[self._offset:end]
+            self._offset = min(end, len(self._pending))
+        return bytes(out)
+
+
+def _report(label, size, started):
+    elapsed = time.monotonic() - started
+    if size >= TRANSFER_CHUNK_SIZE:
+        rate = size / elapsed / (1024 * 1024) if elapsed else float("inf")
+        print(f"Uploaded {label}: {size / (1024 * 1024):.1f} MB in {elapsed:.1f}s ({rate:.1f} MB/s)")
+
+
+def upload_blob(owner, repo, content):
+    """Create a blob from str, bytes, an os.PathLike path or a binary file object; returns its SHA."""
+    source, size, opened = _open_source(content)
+    try:
+        body = Base64JSONBody({"encoding": "base64"}, source, size)
+        started = time.monotonic()
+        response = get_client().post(f"/repos/{owner}/{repo}/git/blobs", data=body, headers=JSON_HEADERS)
+        _report("blob", size, started)
+    finally:
+        if opened:
+            source.close()
+    if response.status_code != 201:
+        print(f"Failed to create blob. Status code: {response.status_code}")
+        print(f"Response content: {response.text}")
+        return None
+    return response.json()["sha"]
+
+
+def _default_branch(owner, repo):
+    response = get_client().get(f"/repos/{owner}/{repo}")
+    if response.status_code != 200:
+        print(f"Failed to get repository info. Status code: {response.status_code}")
+        return None
+    return response.json()["default_branch"]
+
+
+def put_file(owner, repo, file_path, content, message, branch=None, sha=None,
+             blob_threshold=UPLOAD_BLOB_THRESHOLD):
+    """Create or update one file, streaming its content; returns True on success.
+
+    content may be str, bytes, an os.PathLike path or a binary file object.
+    sha is the blob being replaced, as the contents API expects when updating.
+    Above blob_threshold the content goes up as a blob and is committed with
+    the Git Data API instead; sha is then checked against the branch head the
+    commit builds on, and the fast-forward of the branch catches any update
+    made after that.
+    """
+    source, size, opened = _open_source(content)
+    try:
+        if size > blob_threshold:
+            # Imported here: GH_multi_file_updater builds its blobs with upload_blob
+            from GH_multi_file_updater import commit_files, contents_entry
+            branch = branch or _default_branch(owner, repo)
+            if branch is None:
+                return False
+            parent_sha = None
+            if sha:
+                response = get_client().get(f"/repos/{owner}/{repo}/git/refs/heads/{branch}")
+                if response.status_code != 200:
+                    print(f"Failed to get branch info. Status code: {response.status_code}")
+                    return False
+                parent_sha = response.json()["object"]["sha"]
+                entry = contents_entry(owner, repo, file_path, parent_sha)
+                if entry is False:
+                    return False
+                if entry is None or entry["sha"] != sha:
+                    print(f"{file_path} in branch {branch} is no longer at {sha}. Not updating it.")
+                    return False
+            return bool(commit_files(owner, repo, branch, {file_path: source}, message,
+                                     parent_sha=parent_sha))
+
+        fields = {"message": message}
+        if branch:
+            fields["branch"] = branch
+        if sha:
+            fields["sha"] = sha
+        body = Base64JSONBody(fields, source, size)
+        started = time.monotonic()
+        response = get_client().put(f"/repos/{owner}/{repo}/contents/{file_path}", data=body, headers=JSON_HEADERS)
+        _report(file_path, size, started)
+    finally:
+        if opened:
+            source.close()
+    if response.status_code not in (200, 201):
+        print(f"Failed to upload {file_path}. Status code: {response.status_code}")
+        print(f"Response content: {response.text}")
+        return False
+    return True
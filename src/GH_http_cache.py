@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache location and bounds
+CACHE_DIR = os.getenv("GITHUB_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "agent_github"))
+HTTP_CACHE_MAX_MB = float(os.getenv("GITHUB_HTTP_CACHE_MAX_MB", "200"))
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_HTTP_CACHE_MAX_ENTRIES", "20000"))
+
+# Response headers worth replaying when a 304 is served from disk
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+class HTTPCache:
+    """On-disk store of 200 responses keyed by URL and token, revalidated with ETag / Last-Modified.
+
+    Entries are evicted least-recently-used first once either max_bytes or
+    max_entries is exceeded.
+    """
+
+    def __init__(self, directory=None, max_bytes=int(HTTP_CACHE_MAX_MB * 1024 * 1024),
+                 max_entries=HTTP_CACHE_MAX_ENTRIES):
+        self.directory = directory or os.path.join(CACHE_DIR, "http")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._index = None  # key -> size, in least-recently-used-first order
+        self._total = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _key(self, url, auth):
+        return hashlib.sha256(f"{auth or ''}\n{url}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_atime, name, stat.st_size))
+        found.sort()
+        self._index = OrderedDict((name, size) for _, name, size in found)
+        self._total = sum(self._index.values())
+
+    def lookup(self, url, auth=None):
+        key = self._key(url, auth)
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._load_index()
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            # Evicted by another thread or process since it was read; the entry is still good
+            pass
+        meta["body"] = body
+        return meta
+
+    def validators(self, entry):
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def store(self, url, auth, response):
+        if not (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            return
+        key = self._key(url, auth)
+        path = self._path(key)
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "headers": {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+            "stored_at": time.time(),
+        }
+        body = response.content
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(body)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._load_index()
+            self._total += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+
+    def _evict(self):
+        while self._index and (self._total > self.max_bytes or len(self._index) > self.max_entries):
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def to_response(self, entry, not_modified):
+        """Build a 200 response from a stored entry, keeping the 304's fresh headers."""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        for name, value in not_modified.headers.items():
+            if name.lower().startswith("x-ratelimit") or name.lower() in ("etag", "last-modified", "date"):
+                response.headers[name] = value
+        response.url = entry["url"]
+        response.encoding = "utf-8"
+        response.request = not_modified.request
+        response.from_cache = True
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._total = 0
@@ -0,0 +1,309 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Merges of files with more lines than this run in worker processes
+MERGE_PROCESS_THRESHOLD = int(os.getenv("GITHUB_MERGE_PROCESS_THRESHOLD", "20000"))
+
+
+def _myers(a, b):
+    """Matching blocks (i, j, n) between two int sequences, from Myers' O(ND) greedy diff.
+
+    Only the 2d+1 live diagonals are kept per step, so the trace is O(D^2)
+    rather than O((N+M) * D).
+    """
+    n, m = len(a), len(b)
+    max_d = n + m
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                trace.append(v[offset - d:offset + d + 1])
+                return _backtrack(trace, n, m)
+        trace.append(v[offset - d:offset + d + 1])
+    return []
+
+
+def _backtrack(trace, n, m):
+    blocks = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        prev = trace[d - 1]  # index k + (d - 1) holds diagonal k of step d - 1
+        k = x - y
+        if k == -d or (k != d and prev[k - 1 + d - 1] < prev[k + 1 + d - 1]):
+            prev_k = k + 1
+            mid_x = prev[prev_k + d - 1]
+        else:
+            prev_k = k - 1
+            mid_x = prev[prev_k + d - 1] + 1
+        if x > mid_x:
+            blocks.append((mid_x, mid_x - k, x - mid_x))
+        x = prev[prev_k + d - 1]
+        y = x - prev_k
+    if x > 0:
+        blocks.append((0, 0, x))
+    blocks.reverse()
+    return blocks
+
+
+def _hunks(blocks, a_len, b_len):
+    # The changed stretches [a_start, a_end, b_start, b_end] between matching blocks
+    hunks = []
+    a_pos = b_pos = 0
+    for i, j, size in blocks + [(a_len, b_len, 0)]:
+        if i > a_pos or j > b_pos:
+            hunks.append([a_pos, i, b_pos, j])
+        a_pos, b_pos = i + size, j + size
+    return hunks
+
+
+def _compact(hunks, a, b):
+    """Slide pure insertions and deletions as far down as repeated lines allow, as git does.
+
+    Within a run like "a a a", deleting the first or the last "a" gives the
+    same file; without a fixed choice the two diffs of a merge can place the
+    same deletion at different lines and both get applied.
+    """
+    compacted = []
+    for k, hunk in enumerate(hunks):
+        a_start, a_end, b_start, b_end = hunk
+        next_a, next_b = (hunks[k + 1][0], hunks[k + 1][2]) if k + 1 < len(hunks) else (len(a), len(b))
+        if a_start == a_end:
+            while b_end < next_b and b[b_start] == b[b_end]:
+                a_start, a_end, b_start, b_end = a_start + 1, a_end + 1, b_start + 1, b_end + 1
+        elif b_start == b_end:
+            while a_end < next_a and a[a_start] == a[a_end]:
+                a_start, a_end, b_start, b_end = a_start + 1, a_end + 1, b_start + 1, b_end + 1
+        if k + 1 < len(hunks) and a_end == next_a and b_end == next_b:
+            # Slid into the next change; the two are one change now
+            hunks[k + 1][0], hunks[k + 1][2] = a_start, b_start
+        else:
+            compacted.append([a_start, a_end, b_start, b_end])
+    return compacted
+
+
+def diff_blocks(a, b):
+    """Matching blocks (i, j, n) between two lists of lines, in order.
+
+    Insertions and deletions inside runs of repeated lines are placed as low
+    as they can go, so diffs of the same base agree on where they are.
+    """
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]:
+        suffix += 1
+
+    # Compare small ints instead of strings inside the O(ND) loop
+    ids = {}
+    a_mid = [ids.setdefault(line, len(ids)) for line in a[prefix:len(a) - suffix]]
+    b_mid = [ids.setdefault(line, len(ids)) for line in b[prefix:len(b) - suffix]]
+
+    blocks = []
+    if prefix:
+        blocks.append((0, 0, prefix))
+    blocks.extend((i + prefix, j + prefix, size) for i, j, size in _myers(a_mid, b_mid))
+    if suffix:
+        blocks.append((len(a) - suffix, len(b) - suffix, suffix))
+
+    compacted = []
+    a_pos = b_pos = 0
+    for a_start, a_end, b_start, b_end in _compact(_hunks(blocks, len(a), len(b)), a, b):
+        if a_start > a_pos:
+            compacted.append((a_pos, b_pos, a_start - a_pos))
+        a_pos, b_pos = a_end, b_end
+    if a_pos < len(a):
+        compacted.append((a_pos, b_pos, len(a) - a_pos))
+    return compacted
+
+
+def _sync_regions(base_len, a_len, b_len, a_blocks, b_blocks):
+    # Stretches of the ancestor that are unchanged on both sides
+    regions = []
+    ia = ib = 0
+    while ia < len(a_blocks) and ib < len(b_blocks):
+        a_base, a_match, a_size = a_blocks[ia]
+        b_base, b_match, b_size = b_blocks[ib]
+        start = max(a_base, b_base)
+        end = min(a_base + a_size, b_base + b_size)
+        if start < end:
+            a_start = a_match + start - a_base
+            b_start = b_match + start - b_base
+            regions.append((start, end, a_start, a_start + end - start, b_start, b_start + end - start))
+        if a_base + a_size < b_base + b_size:
+            ia += 1
+        else:
+            ib += 1
+    regions.append((base_len, base_len, a_len, a_len, b_len, b_len))
+    return regions
+
+
+def _split_lines(text):
+    # Split on "\n" only, as git does (str.splitlines also breaks on \x0c,  , ...)
+    parts = text.split("\n")
+    lines = [part + "\n" for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def _with_newline(lines):
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+def merge3(ancestor, ours, theirs, ours_label="BASE", theirs_label="HEAD"):
+    """Three-way line merge. Returns (merged text, number of conflicting regions).
+
+    Changes made on only one side, or identically on both, are applied
+    automatically; markers are written only around regions both sides changed
+    differently. Where the two diffs could have lined up differently, changes
+    close together are treated as one region, so a merge is only clean when
+    git merge-file would also find it clean.
+    """
+    base_lines = _split_lines(ancestor)
+    a_lines = _split_lines(ours)
+    b_lines = _split_lines(theirs)
+    regions = _sync_regions(len(base_lines), len(a_lines), len(b_lines),
+                            diff_blocks(base_lines, a_lines), diff_blocks(base_lines, b_lines))
+
+    def changed_lines(iz, ia, ib, region):
+        # Every line of the unstable chunk ending at `region`, on any side
+        z_start, _, a_start, _, b_start, _ = region
+        return set(base_lines[iz:z_start]) | set(a_lines[ia:a_start]) | set(b_lines[ib:b_start])
+
+    merged = []
+    conflicts = 0
+    iz = ia = ib = 0
+    k = 0
+    while k < len(regions):
+        # A stable run made only of lines the changes around it also touch could
+        # have been aligned elsewhere (git may see one change where we see two),
+        # so the changes on either side of it are resolved together
+        before = changed_lines(iz, ia, ib, regions[k])
+        while before and k + 1 < len(regions):
+            z_start, z_end, a_start, a_end, b_start, b_end = regions[k]
+            after = changed_lines(z_end, a_end, b_end, regions[k + 1])
+            if not after or not set(base_lines[z_start:z_end]) <= before | after:
+                break
+            before |= after
+            k += 1
+        z_start, z_end, a_start, a_end, b_start, b_end = regions[k]
+        k += 1
+
+        base_chunk = base_lines[iz:z_start]
+        a_chunk = a_lines[ia:a_start]
+        b_chunk = b_lines[ib:b_start]
+        if a_chunk == b_chunk or b_chunk == base_chunk:
+            merged.extend(a_chunk)
+        elif a_chunk == base_chunk:
+            merged.extend(b_chunk)
+        else:
+            conflicts += 1
+            merged.append(f"<<<<<<< {ours_label}\n")
+            merged.extend(_with_newline(a_chunk))
+            merged.append("=======\n")
+            merged.extend(_with_newline(b_chunk))
+            merged.append(f">>>>>>> {theirs_label}\n")
+        merged.extend(a_lines[a_start:a_end])
+        iz, ia, ib = z_end, a_end, b_end
+    return "".join(merged), conflicts
+
+
+def _merge3_job(job):
+    path, ancestor, ours, theirs = job
+    return path, merge3(ancestor, ours, theirs)
+
+
+def merge3_many(jobs, process_threshold=MERGE_PROCESS_THRESHOLD, max_workers=None):
+    """Merge many (path, ancestor, ours, theirs) jobs; returns {path: (text, conflicts)}.
+
+    Files over process_threshold lines are merged in worker processes so a
+    few huge generated files don't hold up the rest.
+    """
+    small = []
+    large = []
+    for job in jobs:
+        lines = max(text.count("\n") for text in job[1:])
+        (large if lines > process_threshold else small).append(job)
+
+    results = {}
+    if large:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = executor.map(_merge3_job, large)
+            for job in small:
+                path, result = _merge3_job(job)
+                results[path] = result
+            for path, result in pending:
+                results[path] = result
+    else:
+        for job in small:
+            path, result = _merge3_job(job)
+            results[path] = result
+    return results
+
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+
+
+def apply_patch(original, patch):
+    """Apply a unified diff (a compare/PR file 'patch') to text. Returns None if it doesn't fit."""
+    source = _split_lines(original)
+    patch_lines = patch.split("\n")
+    result = []
+    position = 0
+    i = 0
+    while i < len(patch_lines):
+        header = HUNK_HEADER.match(patch_lines[i])
+        i += 1
+        if not header:
+            continue
+        old_start, old_length = int(header.group(1)), int(header.group(2) or 1)
+        # An empty old range names the line *after which* the hunk inserts
+        start = old_start - 1 if old_length else old_start
+        if start < position or start > len(source):
+            return None
+        result.extend(source[position:start])
+        position = start
+
+        operations = []
+        while i < len(patch_lines) and not patch_lines[i].startswith("@@"):
+            line = patch_lines[i]
+            i += 1
+            if line.startswith("\\"):
+                # "\ No newline at end of file" refers to the line before it
+                if operations:
+                    operations[-1][1] = operations[-1][1][:-1]
+            elif line == "" and i == len(patch_lines):
+                break
+            else:
+                operations.append([line[:1] or " ", line[1:] + "\n"])
+
+        for operation, text in operations:
+            if operation == "+":
+                result.append(text)
+                continue
+            if position >= len(source) or source[position] != text:
+                return None
+            if operation == " ":
+                result.append(text)
+            position += 1
+    result.extend(source[position:])
+    return "".join(result)
@@ -0,0 +1,295 @@
+import os
+import re
+import json
+import time
+import atexit
+import threading
+import functools
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Write all metrics here at exit: Prometheus text for a .prom file, JSON otherwise
+METRICS_REPORT_PATH = os.getenv("GITHUB_METRICS_REPORT")
+# Print a one-line summary when each instrumented operation finishes ("1" enables it)
+METRICS_SUMMARY = os.getenv("GITHUB_METRICS_SUMMARY", "0") != "0"
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+SHA = re.compile(r"^[0-9a-f]{40}$")
+# Segments after these name a git object, ref or user-supplied value rather than an endpoint
+PLACEHOLDERS = {
+    "blobs": "{sha}", "trees": "{sha}", "commits": "{ref}", "check-runs": "{id}",
+    "tarball": "{ref}", "zipball": "{ref}", "compare": "{basehead}", "heads": "{branch}",
+    "users": "{user}", "orgs": "{org}", "labels": "{name}", "branches": "{branch}",
+}
+
+
+def endpoint_template(url):
+    """'/repos/{owner}/{repo}/pulls/{number}'-style template for a request URL, so calls group by endpoint."""
+    segments = urlsplit(url).path.split("/")
+    if "v3" in segments[:3]:
+        # GitHub Enterprise prefixes the REST paths with /api/v3
+        segments = [""] + segments[segments.index("v3") + 1:]
+    template = []
+    i = 0
+    while i < len(segments):
+        segment = segments[i]
+        previous = segments[i - 1] if i else ""
+        if previous == "repos" and i + 1 < len(segments):
+            template += ["{owner}", "{repo}"]
+            i += 2
+            continue
+        if previous == "contents":
+            template.append("{path}")
+            break
+        if segment.isdigit():
+            template.append("{number}")
+        elif SHA.match(segment):
+            template.append("{sha}")
+        elif previous in PLACEHOLDERS and segment:
+            template.append(PLACEHOLDERS[previous])
+            if previous in ("heads", "compare"):
+                # Branch names and base...head specs may contain slashes
+                break
+        else:
+            template.append(segment)
+        i += 1
+    return "/".join(template) or "/"
+
+
+def _bytes_in(response):
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        return int(length)
+    # Only already-read bodies are measured; touching a stream would consume it
+    return len(response._content) if isinstance(getattr(response, "_content", None), bytes) else 0
+
+
+def _bytes_out(response):
+    request = getattr(response, "request", None)
+    if request is None:
+        return 0
+    return int(request.headers.get("Content-Length") or 0)
+
+
+class Metrics:
+    """Counters for every GitHub call, grouped by method and endpoint template.
+
+    Each endpoint keeps request counts per status, a latency histogram,
+    bytes in and out, retries and the rate-limit points it used (from
+    X-RateLimit-Used deltas). Operations opened with operation() collect the
+    requests made in their context, nested ones included, and report their
+    wall time against the summed request time: a ratio near 1 means the
+    requests ran one after another. Work handed to a thread pool counts
+    toward them when submitted via contextvars.copy_context().run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.rate_limits = {}  # resource -> {limit, remaining, used, reset}
+        self.operations = {}
+
+    def _endpoint(self, method, template):
+        key = (method, template)
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = {
+                "requests": 0, "statuses": {}, "retries": 0, "seconds": 0.0,
+                "buckets": [0] * len(LATENCY_BUCKETS), "bytes_in": 0, "bytes_out": 0,
+                "budget_used": 0, "from_cache": 0,
+            }
+        return stats
+
+    def record(self, method, url, response, seconds, attempt=0):
+        """Record one HTTP attempt (retries are recorded as attempts > 0)."""
+        template = endpoint_template(url)
+        bytes_in, bytes_out = _bytes_in(response), _bytes_out(response)
+        headers = response.headers
+        resource = headers.get("X-RateLimit-Resource")
+        with self._lock:
+            stats = self._endpoint(method, template)
+            stats["requests"] += 1
+            status = str(response.status_code)
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+            stats["retries"] += attempt > 0
+            stats["seconds"] += seconds
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats["buckets"][i] += 1
+                    break
+            budget_used = 0
+            if resource and headers.get("X-RateLimit-Used") is not None:
+                state = {"limit": int(headers.get("X-RateLimit-Limit", 0)),
+                         "remaining": int(headers.get("X-RateLimit-Remaining", 0)),
+                         "used": int(headers["X-RateLimit-Used"]),
+                         "reset": int(headers.get("X-RateLimit-Reset", 0))}
+                last = self.rate_limits.get(resource)
+                if last is None or last["reset"] != state["reset"]:
+                    budget_used = 1 if response.status_code != 304 else 0
+                else:
+                    budget_used = max(0, state["used"] - last["used"])
+                self.rate_limits[resource] = state
+            stats["budget_used"] += budget_used
+            for operation in _active.get():
+                operation["requests"] += 1
+                operation["retries"] += attempt > 0
+                operation["request_seconds"] += seconds
+                operation["bytes_in"] += bytes_in
+                operation["bytes_out"] += bytes_out
+                operation["budget_used"] += budget_used
+                operation["endpoints"][f"{method} {template}"] = operation["endpoints"].get(f"{method} {template}", 0) + 1
+
+    def record_cache_hit(self, method, url):
+        """A response answered from the local cache after a 304."""
+        with self._lock:
+            self._endpoint(method, endpoint_template(url))["from_cache"] += 1
+
+    def operation(self, name):
+        """Context manager collecting the requests made while it is open under `name`."""
+        return _Operation(self, name)
+
+    def _begin(self, name):
+        return {"name": name, "started": time.monotonic(), "requests": 0, "retries": 0,
+                "request_seconds": 0.0, "bytes_in": 0, "bytes_out": 0, "budget_used": 0, "endpoints": {}}
+
+    def _end(self, operation):
+        wall = time.monotonic() - operation["started"]
+        with self._lock:
+            totals = self.operations.setdefault(operation["name"], {
+                "runs": 0, "wall_seconds": 0.0, "requests": 0, "retries": 0, "request_seconds": 0.0,
+                "bytes_in": 0, "bytes_out": 0, "budget_used": 0, "endpoints": {}})
+            totals["runs"] += 1
+            totals["wall_seconds"] += wall
+            for field in ("requests", "retries", "request_seconds", "bytes_in", "bytes_out", "budget_used"):
+                totals[field] += operation[field]
+            for endpoint, count in operation["endpoints"].items():
+                totals["endpoints"][endpoint] = totals["endpoints"].get(endpoint, 0) + count
+        if METRICS_SUMMARY:
+            print(self.format_operation(operation["name"], operation, wall))
+        return wall
+
+    @staticmethod
+    def format_operation(name, stats, wall):
+        serial = stats["request_seconds"] / wall if wall else 0
+        top = sorted(stats["endpoints"].items(), key=lambda item: -item[1])[:3]
+        return (f"[metrics] {name}: {stats['requests']} request(s), {stats['retries']} retried, "
+                f"{wall:.2f}s wall, {stats['request_seconds']:.2f}s in requests (x{serial:.1f}), "
+                f"{stats['bytes_in'] / 1024:.0f} KiB in, {stats['budget_used']} rate-limit point(s); "
+                f"top: {', '.join(f'{endpoint} x{count}' for endpoint, count in top)}")
+
+    def summary(self):
+        """Per-operation totals, as recorded so far."""
+        with self._lock:
+            return json.loads(json.dumps(self.operations))
+
+    def to_json(self):
+        with self._lock:
+            return {
+                "endpoints": [{"method": method, "endpoint": template, **stats,
+                               "buckets": dict(zip((str(b) for b in LATENCY_BUCKETS), stats["buckets"]))}
+                              for (method, template), stats in sorted(self.endpoints.items())],
+                "rate_limits": dict(self.rate_limits),
+                "operations": json.loads(json.dumps(self.operations)),
+            }
+
+    def to_prometheus(self):
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(**values):
+            return "{" + ",".join(f'{key}="{value}"' for key, value in values.items()) + "}"
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            metric("github_requests_total", "counter", "GitHub API requests by endpoint and status.")
+            for (method, template), stats in endpoints:
+                for status, count in sorted(stats["statuses"].items()):
+                    lines.append(f"github_requests_total{labels(method=method, endpoint=template, status=status)} {count}")
+            metric("github_request_duration_seconds", "histogram", "GitHub API request latency.")
+            for (method, template), stats in endpoints:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else str(bound)
+                    lines.append(f"github_request_duration_seconds_bucket{labels(method=method, endpoint=template, le=le)} {cumulative}")
+                lines.append(f"github_request_duration_seconds_sum{labels(method=method, endpoint=template)} {stats['seconds']:.6f}")
+                lines.append(f"github_request_duration_seconds_count{labels(method=method, endpoint=template)} {stats['requests']}")
+            for field, help_text in (("retries", "Retried attempts."), ("bytes_in", "Response bytes received."),
+                                     ("bytes_out", "Request bytes sent."), ("budget_used", "Rate-limit points used."),
+                                     ("from_cache", "Responses served from the local cache.")):
+                metric(f"github_request_{field}_total", "counter", help_text)
+                for (method, template), stats in endpoints:
+                    lines.append(f"github_request_{field}_total{labels(method=method, endpoint=template)} {stats[field]}")
+            metric("github_rate_limit_remaining", "gauge", "Remaining rate-limit points by resource.")
+            for resource, state in sorted(self.rate_limits.items()):
+                lines.append(f"github_rate_limit_remaining{labels(resource=resource)} {state['remaining']}")
+            metric("github_operation_seconds_total", "counter", "Wall time of instrumented operations.")
+            for name, stats in sorted(self.operations.items()):
+                lines.append(f"github_operation_seconds_total{labels(operation=name)} {stats['wall_seconds']:.6f}")
+            metric("github_operation_requests_total", "counter", "Requests made by instrumented operations.")
+            for name, stats in sorted(self.operations.items()):
+                lines.append(f"github_operation_requests_total{labels(operation=name)} {stats['requests']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        text = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.to_json(), indent=2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self.rate_limits.clear()
+            self.operations.clear()
+
+
+class _Operation:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self._operation = self.metrics._begin(self.name)
+        self._token = _active.set(_active.get() + (self._operation,))
+        return self
+
+    def __exit__(self, *exc):
+        _active.reset(self._token)
+        self.wall_seconds = self.metrics._end(self._operation)
+        return False
+
+
+# Operations open in the current context, outermost first
+_active = ContextVar("github_operations", default=())
+_metrics = Metrics()
+
+def get_metrics():
+    """The process-wide metrics every GitHubClient records into."""
+    return _metrics
+
+
+def instrumented(name):
+    """Decorator: run the function as a metrics operation called `name`."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _metrics.operation(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+if METRICS_REPORT_PATH:
+    atexit.register(lambda: _metrics.write(METRICS_REPORT_PATH))
@@ -1,8 +1,10 @@
 import os
 import time
 from dotenv import load_dotenv
-import requests
-import base64
+from GH_client import get_client
+from GH_metrics import instrumented
+from GH_file_transfer import put_file, upload_blob
+from GH_repo_mirror import loaded_path_index
 
 # Load environment variables
 load_dotenv()
@@ -12,13 +14,12 @@ GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
 OWNER = os.getenv("Owner")
 REPO = os.getenv("Repository")
 
-# GitHub API base URL
-BASE_URL = "https://api.github.com"
-HEADERS = {"Authorization": f"token {GITHUB_API_KEY}"}
+# Text up to this size goes into the tree request itself instead of a blob request of its own
+TREE_INLINE_LIMIT = 256 * 1024
 
 def create_branch(owner, repo, base_branch, new_branch_prefix):
-    base_branch_url = f"{BASE_URL}/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
-    response = requests.get(base_branch_url, headers=HEADERS)
+    base_branch_url = f"/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
+    response = get_client().get(base_branch_url)
     if response.status_code != 200:
         print(f"Failed to get base branch info. Status code: {response.status_code}")
         print(f"Response content: {response.text}")
@@ -30,12 +31,12 @@ def create_branch(owner, repo, base_branch, new_branch_prefix):
     timestamp = int(time.time())
     new_branch = f"{new_branch_prefix}-{timestamp}"
 
-    create_branch_url = f"{BASE_URL}/repos/{owner}/{repo}/git/refs"
+    create_branch_url = f"/repos/{owner}/{repo}/git/refs"
     data = {
         "ref": f"refs/heads/{new_branch}",
         "sha": base_sha
     }
-    response = requests.post(create_branch_url, headers=HEADERS, json=data)
+    response = get_client().post(create_branch_url, json=data)
     if response.status_code == 201:
         print(f"Branch {new_branch} created successfully in {owner}/{repo}.")
         return new_branch
@@ -45,8 +46,16 @@ def create_branch(owner, repo, base_branch, new_branch_prefix):
         return None
 
 def update_file_in_branch(owner, repo, file_path, branch, content):
-    file_url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
-    response = requests.get(file_url, headers=HEADERS)
+    # Directories are recognised from the branch's path index, if one is already
+    # loaded, without a contents round trip; the blob SHA still comes from the
+    # contents API so it is current
+    index = loaded_path_index(owner, repo, branch)
+    if index is not None and index.is_dir(file_path):
+        print(f"The path '{file_path}' refers to a directory. Skipping.")
+        return False
+
+    file_url = f"/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
+    response = get_client().get(file_url)
     
     if response.status_code != 200:
         print(f"Failed to get file info. Status code: {response.status_code}")
@@ -59,28 +68,184 @@ def update_file_in_branch(owner, repo, file_path, branch, content):
         print(f"The path '{file_path}' refers to a directory. Skipping.")
         return False
 
-    update_url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}"
-    data = {
-        "message": f"Update file {file_path}",
-        "content": base64.b64encode(content.encode()).decode(),
-        "branch": branch,
-        "sha": response_data["sha"]
-    }
-    
-    response = requests.put(update_url, headers=HEADERS, json=data)
-    if response.status_code in [200, 201]:
+    # content may be str, bytes, a path (os.PathLike) or a binary file object
+    if put_file(owner, repo, file_path, content, f"Update file {file_path}", branch, response_data["sha"]):
         print(f"File {file_path} updated successfully in branch {branch} of {owner}/{repo}.")
         return True
-    else:
-        print(f"Failed to update file {file_path}. Status code: {response.status_code}")
-        print(f"Response content: {response.text}")
+    return False
+
+def create_blob(owner, repo, content):
+    # Streams the base64 body, so bytes, paths and file objects work as well as str
+    return upload_blob(owner, repo, content)
+
+def list_tree(owner, repo, tree_sha):
+    # One recursive listing instead of a contents GET per path
+    tree_url = f"/repos/{owner}/{repo}/git/trees/{tree_sha}"
+    response = get_client().get(tree_url, params={"recursive": 1})
+    if response.status_code != 200:
+        print(f"Failed to list tree {tree_sha}. Status code: {response.status_code}")
+        return None, False
+    tree = response.json()
+    return {entry["path"]: entry for entry in tree["tree"]}, tree.get("truncated", False)
+
+def contents_entry(owner, repo, file_path, ref):
+    # Trees-API-style entry for one path from the contents API: None if it doesn't
+    # exist, False on error. The contents API doesn't report file modes, so
+    # regular files come back as 100644.
+    response = get_client().get(f"/repos/{owner}/{repo}/contents/{file_path}", params={"ref": ref})
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        print(f"Failed to check {file_path} in {owner}/{repo}. Status code: {response.status_code}")
         return False
+    data = response.json()
+    if isinstance(data, list) or data["type"] == "dir":
+        return {"type": "tree", "mode": "040000", "sha": None}
+    if data["type"] == "symlink":
+        return {"type": "blob", "mode": "120000", "sha": data["sha"]}
+    if data["type"] == "submodule":
+        return {"type": "commit", "mode": "160000", "sha": data["sha"]}
+    return {"type": "blob", "mode": "100644", "sha": data["sha"]}
+
+def _inline_text(content):
+    # Small str, or bytes that are valid UTF-8, can ride along in the tree request
+    if isinstance(content, bytes) and len(content) <= TREE_INLINE_LIMIT:
+        try:
+            return content.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    if isinstance(content, str) and len(content) <= TREE_INLINE_LIMIT:
+        return content
+    return None
+
+@instrumented("commit_files")
+def commit_files(owner, repo, branch, files, commit_message, existing_only=False, parent_sha=None):
+    """Write every path in `files` (path -> content, None deletes) as one commit on `branch`.
 
-def update_multiple_files(owner, repo, file_paths, new_content):
+    Content may be str, bytes, a path (os.PathLike) or a binary file object.
+
+    Uses the Git Data API: one tree (small text inline, other content as one
+    blob per distinct content), one commit, then a single fast-forward of the
+    branch ref. parent_sha saves looking up the branch head when the caller
+    has just read it. Returns the list of paths written, or None if the
+    commit could not be made.
+
+    Directories, symlinks and submodules are skipped, as are deletions of
+    paths that don't exist and, with existing_only, new files. Paths a
+    truncated tree listing leaves out are checked through the contents API.
+    """
+    ref_url = f"/repos/{owner}/{repo}/git/refs/heads/{branch}"
+    if parent_sha is None:
+        response = get_client().get(ref_url)
+        if response.status_code != 200:
+            print(f"Failed to get branch info. Status code: {response.status_code}")
+            print(f"Response content: {response.text}")
+            return None
+        parent_sha = response.json()['object']['sha']
+
+    commit_url = f"/repos/{owner}/{repo}/git/commits/{parent_sha}"
+    response = get_client().get(commit_url)
+    if response.status_code != 200:
+        print(f"Failed to get head commit. Status code: {response.status_code}")
+        return None
+    base_tree = response.json()['tree']['sha']
+
+    # Only needed when a path's existence matters: existing_only, or deletions
+    needs_listing = existing_only or any(content is None for content in files.values())
+    entries, truncated = {}, False
+    if needs_listing:
+        entries, truncated = list_tree(owner, repo, base_tree)
+        if entries is None:
+            return None
+
+    tree_items = []
+    blob_shas = {}
+    for file_path, content in files.items():
+        entry = entries.get(file_path)
+        if entry is None and truncated and (existing_only or content is None):
+            entry = contents_entry(owner, repo, file_path, parent_sha)
+            if entry is False:
+                return None
+        if entry is not None and entry["type"] == "tree":
+            print(f"The path '{file_path}' refers to a directory. Skipping.")
+            continue
+        if entry is not None and entry["mode"] in ("120000", "160000"):
+            kind = "symlink" if entry["mode"] == "120000" else "submodule"
+            print(f"The path '{file_path}' refers to a {kind}. Skipping.")
+            continue
+        if entry is None and content is None:
+            print(f"File {file_path} does not exist in branch {branch}; nothing to delete.")
+            continue
+        if existing_only and entry is None:
+            print(f"File {file_path} does not exist in branch {branch}. Skipping.")
+            continue
+
+        mode = entry["mode"] if entry is not None else "100644"
+        if content is None:
+            tree_items.append({"path": file_path, "mode": mode, "type": "blob", "sha": None})
+            continue
+        text = _inline_text(content)
+        if text is not None:
+            tree_items.append({"path": file_path, "mode": mode, "type": "blob", "content": text})
+            continue
+        # Identical str/bytes content shares one blob; other sources are uploaded each
+        key = content if isinstance(content, (str, bytes)) else id(content)
+        if key not in blob_shas:
+            blob_sha = create_blob(owner, repo, content)
+            if not blob_sha:
+                return None
+            blob_shas[key] = blob_sha
+        tree_items.append({"path": file_path, "mode": mode, "type": "blob", "sha": blob_shas[key]})
+
+    if not tree_items:
+        print("Nothing to commit.")
+        return []
+
+    response = get_client().post(f"/repos/{owner}/{repo}/git/trees",
+                                 json={"base_tree": base_tree, "tree": tree_items})
+    if response.status_code != 201:
+        print(f"Failed to create tree. Status code: {response.status_code}")
+        print(f"Response content: {response.text}")
+        return None
+    tree_sha = response.json()["sha"]
+
+    data = {
+        "message": commit_message,
+        "tree": tree_sha,
+        "parents": [parent_sha]
+    }
+    response = get_client().post(f"/repos/{owner}/{repo}/git/commits", json=data)
+    if response.status_code != 201:
+        print(f"Failed to create commit. Status code: {response.status_code}")
+        print(f"Response content: {response.text}")
+        return None
+    new_commit_sha = response.json()["sha"]
+
+    # Fast-forward only: fails instead of clobbering if the branch moved meanwhile
+    response = get_client().patch(ref_url, json={"sha": new_commit_sha, "force": False})
+    if response.status_code != 200:
+        print(f"Failed to update branch {branch}. Status code: {response.status_code}")
+        print(f"Response content: {response.text}")
+        return None
+
+    written = [item["path"] for item in tree_items]
+    print(f"Committed {len(written)} file(s) to branch {branch} of {owner}/{repo} as {new_commit_sha[:7]}.")
+    return written
+
+@instrumented("update_multiple_files")
+def update_multiple_files(owner, repo, file_paths, new_content, atomic=False):
     new_branch = create_branch(owner, repo, "main", "feature-multi-update")
     if not new_branch:
         return
 
+    if atomic:
+        files = {file_path: new_content for file_path in file_paths}
+        written = commit_files(owner, repo, new_branch, files,
+                               f"Update {len(file_paths)} files", existing_only=True)
+        success_count = len(written) if written else 0
+        print(f"Updated {success_count} out of {len(file_paths)} files in branch {new_branch}.")
+        return
+
     success_count = 0
     for file_path in file_paths:
         if update_file_in_branch(owner, repo, file_path, new_branch, new_content):
@@ -103,7 +268,7 @@ def main():
     # Content to write to each file
     new_content = "This is the updated content for multiple files."
 
-    update_multiple_files(OWNER, REPO, files_to_update, new_content)
+    update_multiple_files(OWNER, REPO, files_to_update, new_content, atomic=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from GH_client import get_client
+from GH_http_cache import CACHE_DIR
+from GH_file_transfer import download_bytes
+
+load_dotenv()
+
+# Content-addressed store bounds
+OBJECT_STORE_MAX_MB = float(os.getenv("GITHUB_OBJECT_STORE_MAX_MB", "1024"))
+
+
+def git_blob_sha(data):
+    """The SHA git assigns to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class ObjectStore:
+    """zlib-compressed git objects on disk, keyed by SHA and shared by every module.
+
+    Objects are immutable, so an entry never needs revalidation; the store only
+    evicts least-recently-used entries once it grows past max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=int(OBJECT_STORE_MAX_MB * 1024 * 1024)):
+        self.directory = directory or os.path.join(CACHE_DIR, "objects")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None  # sha -> compressed size, least-recently-used first
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, sha):
+        return os.path.join(self.directory, sha[:2], sha[2:])
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_atime, os.path.basename(root) + name, stat.st_size))
+        found.sort()
+        self._index = OrderedDict((sha, size) for _, sha, size in found)
+        self._total = sum(self._index.values())
+
+    def get(self, sha):
+        try:
+            with open(self._path(sha), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self.misses += 1
+            return None
+        with self._lock:
+            self._load_index()
+            if sha in self._index:
+                self._index.move_to_end(sha)
+            self.hits += 1
+        try:
+            os.utime(self._path(sha))
+        except OSError:
+            # Evicted by another thread or process since it was read; the data is still good
+            pass
+        return data
+
+    def put(self, sha, data):
+        path = self._path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(data))
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._load_index()
+            self._total += size - self._index.pop(sha, 0)
+            self._index[sha] = size
+            while self._index and self._total > self.max_bytes:
+                old_sha, old_size = self._index.popitem(last=False)
+                self._total -= old_size
+                try:
+                    os.remove(self._path(old_sha))
+                except OSError:
+                    pass
+
+    def __contains__(self, sha):
+        return os.path.exists(self._path(sha))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_object_store():
+    """Return the shared object store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ObjectStore()
+    return _store
+
+def set_object_store(store):
+    global _store
+    with _store_lock:
+        _store = store
+    return store
+
+
+def get_blob(owner, repo, sha):
+    """Raw bytes of a blob, from the local store or else the blobs API."""
+    store = get_object_store()
+    data = store.get(sha)
+    if data is not None:
+        return data
+    # Raw bytes rather than base64 JSON, so large blobs aren't held three times over
+    data = download_bytes(owner, repo, sha=sha)
+    if data is None:
+        return None
+    # Only content that really hashes to its key goes in the shared store
+    if git_blob_sha(data) == sha:
+        store.put(sha, data)
+    return data
+
+
+def tree_listing_key(commit_sha):
+    """Object store key of a commit's complete tree listing."""
+    return f"tree-of-{commit_sha}"
+
+
+def fetch_tree_listing(owner, repo, commit_sha):
+    """(listing, complete) for the recursive tree of a commit; listing is None if it can't be read.
+
+    The listing is {path: entry}, each entry with the API's type, mode, sha and
+    (for blobs) size. GitHub truncates very large trees, and complete is False
+    then: paths missing from such a listing may still exist. Commits are
+    immutable, so a complete listing is fetched at most once per commit.
+    """
+    store = get_object_store()
+    key = tree_listing_key(commit_sha)
+    data = store.get(key)
+    if data is not None:
+        return json.loads(data), True
+    response = get_client().get(f"/repos/{owner}/{repo}/git/trees/{commit_sha}", params={"recursive": 1})
+    if response.status_code != 200:
+        print(f"Failed to fetch tree for {commit_sha}. Status code: {response.status_code}")
+        return None, False
+    tree = response.json()
+    listing = {entry["path"]: {field: entry.get(field) for field in ("type", "mode", "sha", "size")}
+               for entry in tree["tree"]}
+    if tree.get("truncated"):
+        return listing, False
+    store.put(key, json.dumps(listing).encode())
+    return listing, True
+
+
+def get_tree_listing(owner, repo, commit_sha):
+    """{path: entry} for the full recursive tree of a commit (see fetch_tree_listing).
+
+    Returns None when the tree can't be read or GitHub truncated it, so
+    callers never mistake a partial listing for the whole tree.
+    """
+    listing, complete = fetch_tree_listing(owner, repo, commit_sha)
+    if listing is not None and not complete:
+        print(f"The tree of {commit_sha[:7]} is too large to list in one request")
+        return None
+    return listing
@@ -0,0 +1,153 @@
+import re
+import bisect
+from array import array
+
+# Git tree entry modes, stored per entry as an index into this tuple
+MODES = ("100644", "100755", "040000", "120000", "160000")
+MODE_TYPES = {"040000": "tree", "160000": "commit"}
+# '/' + 1: every path under "dir/" sorts before "dir0"
+AFTER_SLASH = chr(ord("/") + 1)
+
+
+def _glob_regex(pattern):
+    # '*' and '?' stay within one path segment; '**/' spans directories
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out))
+
+
+class PathIndex:
+    """Every path of one commit's tree in a sorted table, with mode, size and blob SHA.
+
+    Paths are kept as one '\\0'-joined string plus an offsets array, and the
+    per-entry fields as typed arrays, so an entry costs about 37 bytes on top
+    of its path text; a 500k-entry tree fits in a few tens of MB rather than
+    the hundreds a dict of dicts would take. Lookups are binary searches, and
+    everything under a directory is one contiguous run of the table.
+    """
+
+    def __init__(self, paths, modes, sizes, shas):
+        self._text = "".join(f"{path}\0" for path in paths)
+        self._offsets = array("q", [0])
+        position = 0
+        for path in paths:
+            position += len(path) + 1
+            self._offsets.append(position)
+        self._modes = modes
+        self._sizes = sizes
+        self._shas = shas
+
+    @classmethod
+    def from_listing(cls, listing):
+        """Build from a {path: {type, mode, sha, size}} listing (see get_tree_listing)."""
+        paths = sorted(listing)
+        modes = array("b")
+        sizes = array("q")
+        shas = bytearray(20 * len(paths))
+        for i, path in enumerate(paths):
+            entry = listing[path]
+            mode = entry.get("mode") or ("040000" if entry.get("type") == "tree" else "100644")
+            modes.append(MODES.index(mode) if mode in MODES else 0)
+            sizes.append(entry["size"] if entry.get("size") is not None else -1)
+            if entry.get("sha"):
+                shas[20 * i:20 * i + 20] = bytes.fromhex(entry["sha"])
+        return cls(paths, modes, sizes, shas)
+
+    def __len__(self):
+        return len(self._modes)
+
+    def __getitem__(self, i):
+        # Makes the table a sequence of paths, so bisect can search it directly
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._text[self._offsets[i]:self._offsets[i + 1] - 1]
+
+    def _find(self, path):
+        i = bisect.bisect_left(self, path)
+        return i if i < len(self) and self[i] == path else -1
+
+    def _entry(self, i):
+        mode = MODES[self._modes[i]]
+        sha = bytes(self._shas[20 * i:20 * i + 20])
+        return {
+            "type": MODE_TYPES.get(mode, "blob"),
+            "mode": mode,
+            "sha": sha.hex() if any(sha) else None,
+            "size": self._sizes[i] if self._sizes[i] >= 0 else None,
+        }
+
+    def get(self, path):
+        """The entry for a path, or None if the tree has no such path. '' is the root."""
+        path = path.strip("/")
+        if not path:
+            return {"type": "tree", "mode": "040000", "sha": None, "size": None}
+        i = self._find(path)
+        return self._entry(i) if i >= 0 else None
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def is_dir(self, path):
+        entry = self.get(path)
+        return entry is not None and entry["type"] == "tree"
+
+    def _range(self, directory):
+        directory = directory.strip("/")
+        if not directory:
+            return "", 0, len(self)
+        prefix = f"{directory}/"
+        return prefix, bisect.bisect_left(self, prefix), bisect.bisect_left(self, f"{directory}{AFTER_SLASH}")
+
+    def walk(self, directory=""):
+        """Yield (path, entry) for everything below a directory, in path order."""
+        _, lo, hi = self._range(directory)
+        for i in range(lo, hi):
+            yield self[i], self._entry(i)
+
+    def children(self, directory=""):
+        """Yield (name, entry) for the immediate children of a directory, jumping over subtrees."""
+        prefix, i, hi = self._range(directory)
+        while i < hi:
+            name, slash, _ = self[i][len(prefix):].partition("/")
+            if not slash:
+                yield name, self._entry(i)
+                i += 1
+                continue
+            # Inside the subtree of `name`, whose own entry sorted earlier; a partial
+            # listing may lack it, so it is made up from the path
+            if self._find(f"{prefix}{name}") < 0:
+                yield name, {"type": "tree", "mode": "040000", "sha": None, "size": None}
+            i = bisect.bisect_left(self, f"{prefix}{name}{AFTER_SLASH}", i + 1, hi)
+
+    def glob(self, pattern):
+        """Yield (path, entry) for paths matching a glob ('*', '?', '**'), searching only below its literal prefix."""
+        literal = re.split(r"[*?]", pattern, maxsplit=1)[0]
+        directory = literal.rsplit("/", 1)[0] if "/" in literal else ""
+        regex = _glob_regex(pattern)
+        for path, entry in self.walk(directory):
+            if regex.fullmatch(path):
+                yield path, entry
+
+    def items(self):
+        return self.walk("")
+
+    def nbytes(self):
+        return (len(self._text) + self._offsets.itemsize * len(self._offsets)
+                + self._modes.itemsize * len(self._modes) + self._sizes.itemsize * len(self._sizes)
+                + len(self._shas))
@@ -0,0 +1,186 @@
+import time
+import calendar
+from array import array
+from collections import Counter, defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # statistics fall back to pure Python over the same arrays
+    np = None
+
+PERCENTILES = (50, 90, 99)
+WEEK = 7 * 24 * 3600
+# 1970-01-05 was the first Monday after the epoch
+WEEK_OFFSET = 4 * 24 * 3600
+
+
+def parse_timestamp(value):
+    """Seconds since the epoch for GitHub's fixed '%Y-%m-%dT%H:%M:%SZ' format, NaN for None."""
+    if not value:
+        return float('nan')
+    return float(calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                  int(value[11:13]), int(value[14:16]), int(value[17:19]))))
+
+
+class PRColumns:
+    """The handful of PR fields the analytics use, one typed array per field.
+
+    About 50 bytes per PR instead of a full PR JSON dict; author logins are
+    interned in first-seen order.
+    """
+
+    def __init__(self):
+        self.number = array('q')
+        self.is_open = array('b')
+        self.created = array('d')
+        self.updated = array('d')
+        self.merged = array('d')
+        self.author = array('q')
+        self.comments = array('q')
+        self.authors = []
+        self._author_index = {}
+
+    @classmethod
+    def from_prs(cls, prs):
+        columns = cls()
+        for pr in prs:
+            columns.append(pr)
+        return columns
+
+    def append(self, pr):
+        login = pr['user']['login'] if pr.get('user') else 'ghost'
+        index = self._author_index.get(login)
+        if index is None:
+            index = self._author_index[login] = len(self.authors)
+            self.authors.append(login)
+        self.number.append(pr['number'])
+        self.is_open.append(pr['state'] == 'open')
+        self.created.append(parse_timestamp(pr['created_at']))
+        self.updated.append(parse_timestamp(pr['updated_at']))
+        self.merged.append(parse_timestamp(pr['merged_at']))
+        self.author.append(index)
+        self.comments.append(pr.get('comments', 0))
+
+    def __len__(self):
+        return len(self.number)
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in
+                   (self.number, self.is_open, self.created, self.updated,
+                    self.merged, self.author, self.comments))
+
+
+def _week_label(seconds):
+    monday = WEEK_OFFSET + (int(seconds) - WEEK_OFFSET) // WEEK * WEEK
+    year, month, day = time.gmtime(monday)[:3]
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _percentiles(values):
+    # Linear interpolation, matching numpy.percentile's default
+    values = sorted(values)
+    if not values:
+        return {f"p{q}": 0 for q in PERCENTILES}
+    result = {}
+    for q in PERCENTILES:
+        position = (len(values) - 1) * q / 100
+        low = int(position)
+        high = min(low + 1, len(values) - 1)
+        result[f"p{q}"] = values[low] + (values[high] - values[low]) * (position - low)
+    return result
+
+
+def summarize(columns, now):
+    """Analytics over PRColumns; `now` is in the same epoch seconds as the columns."""
+    if np is not None:
+        return _summarize_numpy(columns, now)
+    return _summarize_python(columns, now)
+
+
+def _summarize_numpy(columns, now):
+    # np.frombuffer shares memory with the arrays, so nothing is copied
+    is_open = np.frombuffer(columns.is_open, dtype=np.int8).astype(bool)
+    created = np.frombuffer(columns.created, dtype=np.float64)
+    merged = np.frombuffer(columns.merged, dtype=np.float64)
+    author = np.frombuffer(columns.author, dtype=np.int64)
+    comments = np.frombuffer(columns.comments, dtype=np.int64)
+    n_authors = len(columns.authors)
+
+    is_merged = ~np.isnan(merged)
+    merge_hours = (merged[is_merged] - created[is_merged]) / 3600
+    open_age_hours = (now - created[is_open]) / 3600
+
+    def percentiles(values):
+        if not len(values):
+            return {f"p{q}": 0 for q in PERCENTILES}
+        return {f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+    pr_counts = np.bincount(author, minlength=n_authors)
+    merged_counts = np.bincount(author[is_merged], minlength=n_authors)
+    merge_hour_sums = np.bincount(author[is_merged], weights=merge_hours, minlength=n_authors)
+    # Stable sort keeps first-seen order among ties, like Counter.most_common
+    top = np.argsort(-pr_counts, kind='stable')[:5]
+
+    opened_weeks, opened_counts = np.unique((created - WEEK_OFFSET) // WEEK, return_counts=True)
+    merged_weeks, merged_week_counts = np.unique((merged[is_merged] - WEEK_OFFSET) // WEEK, return_counts=True)
+    per_week = defaultdict(lambda: {'opened': 0, 'merged': 0})
+    for week, count in zip(opened_weeks, opened_counts):
+        per_week[_week_label(week * WEEK + WEEK_OFFSET)]['opened'] = int(count)
+    for week, count in zip(merged_weeks, merged_week_counts):
+        per_week[_week_label(week * WEEK + WEEK_OFFSET)]['merged'] = int(count)
+
+    return {
+        'total_prs': len(columns),
+        'merged_prs': int(is_merged.sum()),
+        'open_prs': int(is_open.sum()),
+        'avg_time_to_merge': float(merge_hours.mean()) if len(merge_hours) else 0,
+        'avg_comments_per_pr': float(comments.mean()) if len(comments) else 0,
+        'top_contributors': {columns.authors[i]: int(pr_counts[i]) for i in top},
+        'time_to_merge_percentiles': percentiles(merge_hours),
+        'open_age_percentiles': percentiles(open_age_hours),
+        'per_author': {
+            login: {
+                'prs': int(pr_counts[i]),
+                'merged': int(merged_counts[i]),
+                'avg_hours_to_merge': float(merge_hour_sums[i] / merged_counts[i]) if merged_counts[i] else 0,
+            } for i, login in enumerate(columns.authors)
+        },
+        'per_week': dict(sorted(per_week.items())),
+    }
+
+
+def _summarize_python(columns, now):
+    merged_idx = [i for i, merged in enumerate(columns.merged) if merged == merged]
+    merge_hours = [(columns.merged[i] - columns.created[i]) / 3600 for i in merged_idx]
+    open_age_hours = [(now - created) / 3600 for created, is_open in zip(columns.created, columns.is_open) if is_open]
+
+    pr_counts = Counter(columns.author)
+    merged_counts = Counter(columns.author[i] for i in merged_idx)
+    merge_hour_sums = defaultdict(float)
+    for i, hours in zip(merged_idx, merge_hours):
+        merge_hour_sums[columns.author[i]] += hours
+
+    per_week = defaultdict(lambda: {'opened': 0, 'merged': 0})
+    for created in columns.created:
+        per_week[_week_label(created)]['opened'] += 1
+    for i in merged_idx:
+        per_week[_week_label(columns.merged[i])]['merged'] += 1
+
+    return {
+        'total_prs': len(columns),
+        'merged_prs': len(merged_idx),
+        'open_prs': sum(columns.is_open),
+        'avg_time_to_merge': sum(merge_hours) / len(merge_hours) if merge_hours else 0,
+        'avg_comments_per_pr': sum(columns.comments) / len(columns) if len(columns) else 0,
+        'top_contributors': {columns.authors[i]: count for i, count in pr_counts.most_common(5)},
+        'time_to_merge_percentiles': _percentiles(merge_hours),
+        'open_age_percentiles': _percentiles(open_age_hours),
+        'per_author': {
+            login: {
+                'prs': pr_counts[i],
+                'merged': merged_counts[i],
+                'avg_hours_to_merge': merge_hour_sums[i] / merged_counts[i] if merged_counts[i] else 0,
+            } for i, login in enumerate(columns.authors)
+        },
+        'per_week': dict(sorted(per_week.items())),
+    }
@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import threading
+from GH_http_cache import CACHE_DIR
+
+# Local PR database shared by incremental analytics runs
+PR_STORE_PATH = os.getenv("GITHUB_PR_STORE", os.path.join(CACHE_DIR, "prs.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prs (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    merged_at TEXT,
+    author TEXT,
+    comments INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner, repo, number)
+);
+CREATE INDEX IF NOT EXISTS prs_updated ON prs (owner, repo, updated_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    high_water TEXT NOT NULL,
+    PRIMARY KEY (owner, repo)
+);
+"""
+
+
+class PRStore:
+    """One row per PR plus the newest `updated_at` seen for each repository.
+
+    Timestamps are kept as GitHub's ISO strings, which sort chronologically,
+    so window filters are plain string comparisons on an indexed column.
+    """
+
+    def __init__(self, path=PR_STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def high_water(self, owner, repo):
+        row = self.conn.execute("SELECT high_water FROM sync_state WHERE owner = ? AND repo = ?",
+                                (owner, repo)).fetchone()
+        return row[0] if row else None
+
+    def save(self, owner, repo, prs, high_water):
+        """Upsert REST-shaped PR dicts (with a 'comments' count) and advance the high-water mark."""
+        rows = [(owner, repo, pr['number'], pr['state'], pr['created_at'], pr['updated_at'],
+                 pr['merged_at'], pr['user']['login'], pr.get('comments', 0)) for pr in prs]
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO prs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if high_water:
+                self.conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (owner, repo, high_water))
+
+    def query(self, owner, repo, state='all', updated_after=None):
+        """PRs as REST-shaped dicts, newest update first."""
+        sql = ("SELECT number, state, created_at, updated_at, merged_at, author, comments "
+               "FROM prs WHERE owner = ? AND repo = ?")
+        args = [owner, repo]
+        if state != 'all':
+            sql += " AND state = ?"
+            args.append(state)
+        if updated_after:
+            sql += " AND updated_at > ?"
+            args.append(updated_after)
+        sql += " ORDER BY updated_at DESC"
+        with self._lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [{
+            'number': number,
+            'state': pr_state,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'merged_at': merged_at,
+            'user': {'login': author},
+            'comments': comments,
+        } for number, pr_state, created_at, updated_at, merged_at, author, comments in rows]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,6 +1,13 @@
 import os
-import requests
-from datetime import datetime, timedelta 
+import time
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from GH_client import get_client, POOL_SIZE
+from GH_metrics import instrumented
+from GH_webhook_receiver import get_pr_view
+from datetime import datetime, timedelta, timezone
+from requests import HTTPError
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,67 +17,124 @@ GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
 OWNER = os.getenv("Owner")
 REPO = os.getenv("Repository")
 
-# GitHub API base URL
-BASE_URL = "https://api.github.com"
-HEADERS = {"Authorization": f"token {GITHUB_API_KEY}"}
-
+@instrumented("list_open_pull_requests")
 def list_open_pull_requests(owner, repo):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls?state=open"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        pull_requests = response.json()
+    view = get_pr_view()
+    pull_requests = view.open_pull_requests(owner, repo) if view else None
+    if pull_requests is not None:
         for pr in pull_requests:
             print(f"PR #{pr['number']}: {pr['title']} by {pr['user']['login']}")
         return pull_requests
-    else:
-        print(f"Failed to fetch pull requests. Status code: {response.status_code}")
+
+    url = f"/repos/{owner}/{repo}/pulls"
+    pull_requests = []
+    try:
+        for pr in get_client().paginate(url, params={"state": "open"}):
+            print(f"PR #{pr['number']}: {pr['title']} by {pr['user']['login']}")
+            pull_requests.append(pr)
+    except HTTPError as e:
+        print(f"Failed to fetch pull requests. Status code: {e.response.status_code}")
         return None
+    return pull_requests
+
+def automatic_pr_review(owner, repo, pr_number, rules=None):
+    review = review_pull_request(owner, repo, pr_number, rules)
+    return review[0] if review else None
 
-def automatic_pr_review(owner, repo, pr_number):
+@instrumented("automatic_pr_review")
+def review_pull_request(owner, repo, pr_number, rules=None):
+    # (issues, whether the issues comment was posted), or None if the PR's files can't be read
     print(f"Reviewing PR #{pr_number}")
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls/{pr_number}/files"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code != 200:
-        print(f"Failed to fetch PR files. Status code: {response.status_code}")
-        return
-
-    files = response.json()
-    issues = []
-
-    for file in files:
-        # Check file size (raise an issue if > 1MB)
-        if file['changes'] > 1000000:
-            issues.append(f"File {file['filename']} is too large ({file['changes']} bytes)")
-
-        # Check naming conventions (assume we want lowercase with underscores)
-        if not file['filename'].islower() or ' ' in file['filename']:
-            issues.append(f"File {file['filename']} doesn't follow naming conventions")
-
-        # Check for TODO comments
-        if 'patch' in file and 'TODO' in file['patch']:
-            issues.append(f"File {file['filename']} contains TODO comments")
-
-    if issues:
-        comment = "Automatic review found the following issues:\n"
-        for issue in issues:
-            comment += f"- {issue}\n"
-        comment_on_pull_request(owner, repo, pr_number, comment)
-        print("Review completed. Issues found and commented on the PR.")
-    else:
-        print("Review completed. No issues found.")
+    url = f"/repos/{owner}/{repo}/pulls/{pr_number}/files"
+    try:
+        files = list(get_client().paginate(url))
+    except HTTPError as e:
+        print(f"Failed to fetch PR files. Status code: {e.response.status_code}")
+        return None
 
-    return issues
-    pass
+    issues = (rules or get_rule_set()).scan(files)
 
-def check_pr_status(owner, repo, pr_number):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls/{pr_number}/checks"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        print(f"Failed to fetch PR status. Status code: {response.status_code}")
+    if not issues:
+        print("Review completed. No issues found.")
+        return issues, True
+    comment = "Automatic review found the following issues:\n"
+    for issue in issues:
+        comment += f"- {issue}\n"
+    if not comment_on_pull_request(owner, repo, pr_number, comment):
+        print(f"Review of PR #{pr_number} found issues, but they could not be posted.")
+        return issues, False
+    print("Review completed. Issues found and commented on the PR.")
+    return issues, True
+
+@instrumented("review_all_open_pull_requests")
+def review_all_open_pull_requests(owner, repo, max_workers=POOL_SIZE):
+    # Review every open PR with bounded concurrency; one PR failing doesn't stop the rest
+    pull_requests = list_open_pull_requests(owner, repo)
+    if pull_requests is None:
         return None
 
-    checks = response.json()['check_runs']
+    start = time.monotonic()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Each review runs in a copy of this context so its requests count toward this operation
+        futures = {executor.submit(contextvars.copy_context().run, review_pull_request, owner, repo, pr['number']): pr['number']
+                   for pr in pull_requests}
+        for future in as_completed(futures):
+            pr_number = futures[future]
+            try:
+                results[pr_number] = future.result()
+            except Exception as e:
+                print(f"Review of PR #{pr_number} failed: {e}")
+                results[pr_number] = None
+
+    failed = sorted(n for n, review in results.items() if review is None)
+    # Scanned, but the comment listing the issues never reached the PR
+    unposted = sorted(n for n, review in results.items() if review is not None and not review[1])
+    flagged = sorted(n for n, review in results.items() if review is not None and review[0] and review[1])
+    reviewed = len(results) - len(failed) - len(unposted)
+    summary = {
+        'reviewed': reviewed,
+        'with_issues': len(flagged),
+        'clean': reviewed - len(flagged),
+        'failed': failed,
+        'comment_failed': unposted,
+        'issues': {n: results[n][0] for n in flagged + unposted},
+        'elapsed_seconds': time.monotonic() - start,
+    }
+
+    print(f"\nReviewed {summary['reviewed']} of {len(results)} open PRs in {summary['elapsed_seconds']:.1f}s")
+    print(f"With issues: {summary['with_issues']}  Clean: {summary['clean']}  Failed: {len(failed)}  "
+          f"Comments not posted: {len(unposted)}")
+    for pr_number in flagged:
+        print(f"  PR #{pr_number}: {len(results[pr_number][0])} issue(s)")
+    if failed:
+        print(f"  Failed PRs: {', '.join(f'#{n}' for n in failed)}")
+    if unposted:
+        print(f"  Issues not posted to: {', '.join(f'#{n}' for n in unposted)}")
+    return summary
+
+def check_pr_status(owner, repo, pr_number):
+    view = get_pr_view()
+
+    # Check runs belong to the head commit, not the pull request
+    head_sha = view.head_sha(owner, repo, pr_number) if view else None
+    if head_sha is None:
+        pr_response = get_client().get(f"/repos/{owner}/{repo}/pulls/{pr_number}")
+        if pr_response.status_code != 200:
+            print(f"Failed to fetch PR status. Status code: {pr_response.status_code}")
+            return None
+        head_sha = pr_response.json()['head']['sha']
+
+    checks = view.check_runs_for(owner, repo, head_sha) if view else None
+    if checks is None:
+        url = f"/repos/{owner}/{repo}/commits/{head_sha}/check-runs"
+        try:
+            checks = list(get_client().paginate(url, items_key='check_runs'))
+        except HTTPError as e:
+            print(f"Failed to fetch PR status. Status code: {e.response.status_code}")
+            return None
+        if view:
+            view.record_check_runs(owner, repo, head_sha, checks)
     
     status_summary = {
         'total': len(checks),
@@ -98,6 +162,7 @@ def check_pr_status(owner, repo, pr_number):
     return status_summary
     pass
 
+@instrumented("merge_pull_request")
 def merge_pull_request(owner, repo, pr_number):
     # First, check the PR status
     status_summary = check_pr_status(owner, repo, pr_number)
@@ -112,27 +177,34 @@ def merge_pull_request(owner, repo, pr_number):
         return False
 
     # Check if the PR has been approved
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls/{pr_number}/reviews"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        print(f"Failed to fetch PR reviews. Status code: {response.status_code}")
-        return False
-
-    reviews = response.json()
-    approved = any(review['state'] == 'APPROVED' for review in reviews)
+    view = get_pr_view()
+    approved = view.approved(owner, repo, pr_number) if view else None
+    if approved is None:
+        url = f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews"
+        try:
+            # any() stops paging at the first approval
+            approved = any(review['state'] == 'APPROVED' for review in get_client().paginate(url))
+        except HTTPError as e:
+            print(f"Failed to fetch PR reviews. Status code: {e.response.status_code}")
+            return False
 
     if not approved:
         print(f"Cannot merge PR #{pr_number}. It has not been approved.")
         return False
 
     # If we've made it this far, attempt to merge the PR
-    merge_url = f"{BASE_URL}/repos/{owner}/{repo}/pulls/{pr_number}/merge"
+    return put_merge(owner, repo, pr_number)
+
+def put_merge(owner, repo, pr_number, head_sha=None, merge_method="merge"):
+    merge_url = f"/repos/{owner}/{repo}/pulls/{pr_number}/merge"
     merge_data = {
-        "merge_method": "merge"  # You can change this to "squash" or "rebase" if preferred
+        "merge_method": merge_method  # "merge", "squash" or "rebase"
     }
+    if head_sha:
+        # Refuse to merge if the PR received new commits since it was evaluated
+        merge_data["sha"] = head_sha
     
-    merge_response = requests.put(merge_url, headers=HEADERS, json=merge_data)
+    merge_response = get_client().put(merge_url, json=merge_data)
     
     if merge_response.status_code == 200:
         print(f"Successfully merged PR #{pr_number}")
@@ -141,20 +213,139 @@ def merge_pull_request(owner, repo, pr_number):
         print(f"Failed to merge PR #{pr_number}. Status code: {merge_response.status_code}")
         print(f"Error message: {merge_response.json().get('message', 'No message provided')}")
         return False
-    pass
+
+MERGE_READINESS_FIELDS = """
+      number
+      state
+      mergeable
+      baseRefName
+      headRefOid
+      reviewDecision
+      commits(last: 1) { nodes { commit { statusCheckRollup { state } } } }
+"""
+
+def evaluate_merge_readiness(owner, repo, pr_numbers, batch_size=50):
+    # Checks, approval and mergeability for many PRs in one aliased GraphQL query per batch.
+    # A PR that can't be read (one that doesn't exist, say) is reported not ready
+    # rather than failing the others in its batch.
+    pr_numbers = list(dict.fromkeys(pr_numbers))
+    readiness = {}
+    for start in range(0, len(pr_numbers), batch_size):
+        batch = pr_numbers[start:start + batch_size]
+        aliases = "\n".join(f"pr{n}: pullRequest(number: {n}) {{{MERGE_READINESS_FIELDS}}}" for n in batch)
+        query = (f"query($owner: String!, $repo: String!) {{ "
+                 f"repository(owner: $owner, name: $repo) {{ {aliases} }} }}")
+        data = get_client().graphql(query, {'owner': owner, 'repo': repo}, partial=True)
+        if data is None or data.get('repository') is None:
+            print("Failed to evaluate merge readiness.")
+            return None
+
+        for n in batch:
+            node = data['repository'].get(f'pr{n}')
+            if node is None:
+                readiness[n] = {'ready': False, 'reason': "It could not be read", 'checks': None,
+                                'approved': False, 'mergeable': None, 'base': None, 'head_sha': None}
+                continue
+            rollup = node['commits']['nodes'][0]['commit']['statusCheckRollup'] if node['commits']['nodes'] else None
+            # No rollup means no checks are configured, which check_pr_status also treats as passing
+            checks = rollup['state'] if rollup else 'SUCCESS'
+            # reviewDecision applies branch protection: null means no review is required
+            decision = node['reviewDecision']
+            approved = decision in ('APPROVED', None)
+            if node['state'] != 'OPEN':
+                reason = f"PR is {node['state'].lower()}"
+            elif checks in ('FAILURE', 'ERROR'):
+                reason = "There are failing checks"
+            elif checks != 'SUCCESS':
+                reason = "There are pending checks"
+            elif decision == 'CHANGES_REQUESTED':
+                reason = "Changes have been requested"
+            elif not approved:
+                reason = "It has not been approved"
+            elif node['mergeable'] == 'CONFLICTING':
+                reason = "It has merge conflicts"
+            elif node['mergeable'] == 'UNKNOWN':
+                reason = "GitHub has not computed mergeability yet"
+            else:
+                reason = None
+            readiness[n] = {
+                'ready': reason is None,
+                'reason': reason,
+                'checks': checks,
+                'approved': approved,
+                'mergeable': node['mergeable'],
+                'base': node['baseRefName'],
+                'head_sha': node['headRefOid'],
+            }
+    return readiness
+
+def settle_mergeability(owner, repo, readiness, attempts=3, delay=1.0):
+    # GitHub computes mergeability in the background; re-ask only for the PRs still UNKNOWN
+    for _ in range(attempts):
+        unknown = [n for n, state in readiness.items() if state['mergeable'] == 'UNKNOWN']
+        if not unknown:
+            break
+        time.sleep(delay)
+        fresh = evaluate_merge_readiness(owner, repo, unknown)
+        if fresh is None:
+            break
+        readiness.update(fresh)
+    return readiness
+
+@instrumented("merge_queue")
+def merge_queue(owner, repo, pr_numbers, merge_method="merge"):
+    # Merge PRs in the given order. All are evaluated up front in batched queries;
+    # after each merge only the remaining PRs targeting the same base are re-evaluated.
+    pr_numbers = list(dict.fromkeys(int(n) for n in pr_numbers))
+    readiness = evaluate_merge_readiness(owner, repo, pr_numbers)
+    if readiness is None:
+        return None
+    settle_mergeability(owner, repo, readiness)
+
+    merged = []
+    skipped = {}
+    stale = set()
+    for i, pr_number in enumerate(pr_numbers):
+        if pr_number in stale:
+            recheck = [n for n in pr_numbers[i:] if n in stale]
+            fresh = evaluate_merge_readiness(owner, repo, recheck)
+            if fresh is None:
+                skipped.update({n: "Re-evaluation failed" for n in pr_numbers[i:]})
+                break
+            readiness.update(settle_mergeability(owner, repo, fresh))
+            stale.clear()
+
+        state = readiness[pr_number]
+        if not state['ready']:
+            print(f"Cannot merge PR #{pr_number}. {state['reason']}.")
+            skipped[pr_number] = state['reason']
+            continue
+
+        if put_merge(owner, repo, pr_number, state['head_sha'], merge_method):
+            merged.append(pr_number)
+            # The base branch moved, so the remaining PRs targeting it need a fresh look
+            stale.update(n for n in pr_numbers[i + 1:] if readiness[n]['base'] == state['base'])
+        else:
+            skipped[pr_number] = "Merge request failed"
+
+    print(f"\nMerge queue finished: {len(merged)} merged, {len(skipped)} skipped.")
+    for pr_number, reason in skipped.items():
+        print(f"  PR #{pr_number}: {reason}")
+    return {'merged': merged, 'skipped': skipped}
 
 def comment_on_pull_request(owner, repo, pr_number, comment):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/issues/{pr_number}/comments"
+    url = f"/repos/{owner}/{repo}/issues/{pr_number}/comments"
     data = {"body": comment}
-    response = requests.post(url, headers=HEADERS, json=data)
+    response = get_client().post(url, json=data)
     if response.status_code == 201:
         print(f"Comment added to PR #{pr_number}")
+        return True
     else:
         print(f"Failed to add comment. Status code: {response.status_code}")
-    pass
+        return False
 
 def update_pull_request(owner, repo, pr_number, title=None, body=None, state=None):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls/{pr_number}"
+    url = f"/repos/{owner}/{repo}/pulls/{pr_number}"
     
     # Prepare the data for the update
     update_data = {}
@@ -174,7 +365,7 @@ def update_pull_request(owner, repo, pr_number, title=None, body=None, state=Non
         return False
     
     # Send the PATCH request to update the pull request
-    response = requests.patch(url, headers=HEADERS, json=update_data)
+    response = get_client().patch(url, json=update_data)
     
     if response.status_code == 200:
         print(f"Successfully updated PR #{pr_number}")
@@ -189,108 +380,176 @@ def update_pull_request(owner, repo, pr_number, title=None, body=None, state=Non
     pass
 
 from datetime import datetime
-from collections import Counter
+from GH_pr_store import PRStore
+from GH_pr_stats import PRColumns, summarize
+from GH_review_rules import get_rule_set
 
-def pr_analytics(owner, repo, state='all', days=30):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/pulls"
+def fetch_prs_rest(owner, repo, state, cutoff_date):
+    # Results are sorted by update time, so paging stops at the first PR older than cutoff_date
+    url = f"/repos/{owner}/{repo}/pulls"
     params = {
         'state': state,
         'sort': 'updated',
-        'direction': 'desc',
-        'per_page': 100
+        'direction': 'desc'
     }
-    
-    all_prs = []
+    # Returns a lazy generator; a failed page raises HTTPError while it is consumed
+    cutoff = cutoff_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return get_client().paginate(url, params=params, stop=lambda pr: pr['updated_at'] <= cutoff)
+
+PR_ANALYTICS_QUERY = """
+query($owner: String!, $repo: String!, $states: [PullRequestState!], $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    pullRequests(first: 100, after: $cursor, states: $states,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        state
+        createdAt
+        updatedAt
+        mergedAt
+        author { login }
+        comments { totalCount }
+      }
+    }
+  }
+}
+"""
+
+GRAPHQL_STATES = {'open': ['OPEN'], 'closed': ['CLOSED', 'MERGED'], 'all': None}
+
+def fetch_prs_graphql(owner, repo, state, cutoff_date):
+    # Returns REST-shaped PR dicts with an extra 'comments' count, newest update first.
+    # Paging stops at the first PR older than cutoff_date (a UTC datetime), or
+    # runs to the end without one.
+    variables = {'owner': owner, 'repo': repo, 'states': GRAPHQL_STATES[state], 'cursor': None}
+    cutoff = cutoff_date.strftime('%Y-%m-%dT%H:%M:%SZ') if cutoff_date else None
+    prs = []
     while True:
-        response = requests.get(url, headers=HEADERS, params=params)
-        if response.status_code != 200:
-            print(f"Failed to fetch PRs. Status code: {response.status_code}")
+        data = get_client().graphql(PR_ANALYTICS_QUERY, variables)
+        if data is None:
+            print("Failed to fetch PRs over GraphQL.")
             return None
-        
-        prs = response.json()
-        if not prs:
-            break
-        
-        all_prs.extend(prs)
-        if 'next' in response.links:
-            url = response.links['next']['url']
-        else:
-            break
+        page = data['repository']['pullRequests']
+        for node in page['nodes']:
+            if cutoff is not None and node['updatedAt'] <= cutoff:
+                return prs
+            prs.append({
+                'number': node['number'],
+                'state': 'open' if node['state'] == 'OPEN' else 'closed',
+                'created_at': node['createdAt'],
+                'updated_at': node['updatedAt'],
+                'merged_at': node['mergedAt'],
+                # Deleted accounts come back as a null author; REST reports them as "ghost"
+                'user': {'login': node['author']['login'] if node['author'] else 'ghost'},
+                'comments': node['comments']['totalCount'],
+            })
+        if not page['pageInfo']['hasNextPage']:
+            return prs
+        variables['cursor'] = page['pageInfo']['endCursor']
+
+@instrumented("sync_pr_store")
+def sync_pr_store(owner, repo, store=None):
+    # Pull only PRs updated since the last sync into the local SQLite store
+    store = store or PRStore()
+    high_water = store.high_water(owner, repo)
+    if high_water:
+        # Step back a second so PRs sharing the high-water timestamp are re-read, not skipped
+        since = (datetime.strptime(high_water, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+                 - timedelta(seconds=1))
+    else:
+        # First sync: every PR
+        since = None
+    prs = fetch_prs_graphql(owner, repo, 'all', since)
+    if prs is None:
+        return None
+    store.save(owner, repo, prs, prs[0]['updated_at'] if prs else None)
+    print(f"Synced {len(prs)} updated PR(s) for {owner}/{repo} into {store.path}")
+    return store
+
+def with_comment_counts(prs):
+    # REST listings carry no comment count; fetch it per PR (GraphQL/store rows already have it)
+    for pr in prs:
+        if 'comments' not in pr:
+            try:
+                pr['comments'] = sum(1 for _ in get_client().paginate(pr['comments_url']))
+            except HTTPError:
+                pr['comments'] = 0
+        yield pr
+
+@instrumented("pr_analytics")
+def pr_analytics(owner, repo, state='all', days=30, backend='rest', store=None):
+    # GitHub's timestamps are UTC, so the cutoff is too
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    cutoff = cutoff_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    if backend == 'graphql':
+        all_prs = fetch_prs_graphql(owner, repo, state, cutoff_date)
+    elif backend == 'store':
+        # A store opened here is closed again; query() returns plain dicts
+        with nullcontext(store) if store is not None else PRStore() as local_store:
+            synced = sync_pr_store(owner, repo, local_store)
+            all_prs = synced.query(owner, repo, state, cutoff) if synced else None
+    else:
+        all_prs = fetch_prs_rest(owner, repo, state, cutoff_date)
+    if all_prs is None:
+        return None
 
-    # Filter PRs updated within the last 'days' days
-    cutoff_date = datetime.now() - timedelta(days=days)
-    recent_prs = [pr for pr in all_prs if datetime.strptime(pr['updated_at'], '%Y-%m-%dT%H:%M:%SZ') > cutoff_date]
+    # Stream PRs updated within the last 'days' days into compact columns;
+    # the full JSON of each PR is dropped as soon as its fields are copied out
+    recent_prs = (pr for pr in all_prs if pr['updated_at'] > cutoff)
+    try:
+        columns = PRColumns.from_prs(with_comment_counts(recent_prs))
+    except HTTPError as e:
+        print(f"Failed to fetch PRs. Status code: {e.response.status_code}")
+        return None
 
-    if not recent_prs:
+    if not len(columns):
         print(f"No PRs updated in the last {days} days.")
         return None
 
     # Calculate analytics
-    total_prs = len(recent_prs)
-    merged_prs = [pr for pr in recent_prs if pr['merged_at']]
-    open_prs = [pr for pr in recent_prs if pr['state'] == 'open']
-    
-    if merged_prs:
-        avg_time_to_merge = sum((datetime.strptime(pr['merged_at'], '%Y-%m-%dT%H:%M:%SZ') - 
-                                 datetime.strptime(pr['created_at'], '%Y-%m-%dT%H:%M:%SZ')).total_seconds() 
-                                for pr in merged_prs) / len(merged_prs) / 3600  # in hours
-    else:
-        avg_time_to_merge = 0
-
-    contributors = Counter(pr['user']['login'] for pr in recent_prs)
-    top_contributors = contributors.most_common(5)
-
-    # Fetch comments for each PR
-    total_comments = 0
-    for pr in recent_prs:
-        comments_url = pr['comments_url']
-        comments_response = requests.get(comments_url, headers=HEADERS)
-        if comments_response.status_code == 200:
-            total_comments += len(comments_response.json())
-
-    avg_comments_per_pr = total_comments / total_prs if total_prs > 0 else 0
+    analytics = summarize(columns, time.time())
 
     # Print analytics
+    merge_percentiles = analytics['time_to_merge_percentiles']
     print(f"\nPull Request Analytics for the last {days} days:")
-    print(f"Total PRs: {total_prs}")
-    print(f"Merged PRs: {len(merged_prs)}")
-    print(f"Open PRs: {len(open_prs)}")
-    print(f"Average time to merge: {avg_time_to_merge:.2f} hours")
-    print(f"Average comments per PR: {avg_comments_per_pr:.2f}")
+    print(f"Total PRs: {analytics['total_prs']}")
+    print(f"Merged PRs: {analytics['merged_prs']}")
+    print(f"Open PRs: {analytics['open_prs']}")
+    print(f"Average time to merge: {analytics['avg_time_to_merge']:.2f} hours")
+    print(f"Time to merge p50/p90/p99: {merge_percentiles['p50']:.2f} / "
+          f"{merge_percentiles['p90']:.2f} / {merge_percentiles['p99']:.2f} hours")
+    print(f"Median open PR age: {analytics['open_age_percentiles']['p50']:.2f} hours")
+    print(f"Average comments per PR: {analytics['avg_comments_per_pr']:.2f}")
     print("\nTop Contributors:")
-    for contributor, count in top_contributors:
+    for contributor, count in analytics['top_contributors'].items():
         print(f"  {contributor}: {count} PRs")
 
-    return {
-        'total_prs': total_prs,
-        'merged_prs': len(merged_prs),
-        'open_prs': len(open_prs),
-        'avg_time_to_merge': avg_time_to_merge,
-        'avg_comments_per_pr': avg_comments_per_pr,
-        'top_contributors': dict(top_contributors)
-    }
-    pass
+    return analytics
 
 def manage_pr_labels(owner, repo, pr_number, action='list', labels=None):
-    url = f"{BASE_URL}/repos/{owner}/{repo}/issues/{pr_number}/labels"
+    url = f"/repos/{owner}/{repo}/issues/{pr_number}/labels"
     
     if action == 'list':
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            current_labels = [label['name'] for label in response.json()]
-            print(f"Current labels for PR #{pr_number}:")
-            for label in current_labels:
-                print(f"- {label}")
-            return current_labels
-        else:
-            print(f"Failed to fetch labels. Status code: {response.status_code}")
-            return None
+        view = get_pr_view()
+        current_labels = view.labels(owner, repo, pr_number) if view else None
+        if current_labels is None:
+            try:
+                current_labels = [label['name'] for label in get_client().paginate(url)]
+            except HTTPError as e:
+                print(f"Failed to fetch labels. Status code: {e.response.status_code}")
+                return None
+        print(f"Current labels for PR #{pr_number}:")
+        for label in current_labels:
+            print(f"- {label}")
+        return current_labels
 
     elif action == 'add':
         if not labels:
             print("No labels specified to add.")
             return False
-        response = requests.post(url, headers=HEADERS, json=labels)
+        response = get_client().post(url, json=labels)
         if response.status_code == 200:
             print(f"Successfully added label(s) to PR #{pr_number}")
             return True
@@ -304,7 +563,7 @@ def manage_pr_labels(owner, repo, pr_number, action='list', labels=None):
             return False
         for label in labels:
             delete_url = f"{url}/{label}"
-            response = requests.delete(delete_url, headers=HEADERS)
+            response = get_client().delete(delete_url)
             if response.status_code == 200:
                 print(f"Successfully removed label '{label}' from PR #{pr_number}")
             else:
@@ -329,9 +588,11 @@ def main():
         print("5. Update a pull request")
         print("6. View PR analytics")
         print("7. Manage PR labels")
-        print("8. Exit")
+        print("8. Review all open pull requests")
+        print("9. Run a merge queue")
+        print("10. Exit")
 
-        choice = input("Enter your choice (1-8): ")
+        choice = input("Enter your choice (1-10): ")
 
         if choice == '1':
             print("\nOpen Pull Requests:")
@@ -363,7 +624,8 @@ def main():
 
         elif choice == '6':
             days = int(input("Enter number of days for analytics (default 30): ") or 30)
-            pr_analytics(OWNER, REPO, state='all', days=days)
+            backend = input("Backend (rest/graphql/store, default rest): ").lower() or 'rest'
+            pr_analytics(OWNER, REPO, state='all', days=days, backend=backend)
 
         elif choice == '7':
             pr_number = input("Enter the PR number: ")
@@ -376,6 +638,19 @@ def main():
                 manage_pr_labels(OWNER, REPO, pr_number)
 
         elif choice == '8':
+            review_all_open_pull_requests(OWNER, REPO)
+
+        elif choice == '9':
+            pr_numbers = input("Enter PR numbers to merge, in order, separated by commas: ").split(',')
+            pr_numbers = [n.strip() for n in pr_numbers if n.strip()]
+            invalid = [n for n in pr_numbers if not n.isdecimal()]
+            if invalid:
+                # The queue's order matters, so nothing is merged from a mistyped list
+                print(f"Not PR numbers: {', '.join(invalid)}. Nothing was merged.")
+            else:
+                merge_queue(OWNER, REPO, [int(n) for n in pr_numbers])
+
+        elif choice == '10':
             print("Exiting the program. Goodbye!")
             break
 
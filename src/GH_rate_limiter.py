@@ -0,0 +1,195 @@
+import os
+import time
+import random
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pacing and retry settings
+RATE_LIMIT_BURST = int(os.getenv("GITHUB_RATE_LIMIT_BURST", "10"))
+# Start pacing once less than this fraction of the budget is left
+PACE_BELOW = float(os.getenv("GITHUB_PACE_BELOW", "0.2"))
+# GitHub's secondary limit allows roughly 80 content-creating requests per minute
+WRITE_RATE_PER_MIN = float(os.getenv("GITHUB_WRITE_RATE_PER_MIN", "80"))
+WRITE_BURST = int(os.getenv("GITHUB_WRITE_BURST", "20"))
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("GITHUB_BACKOFF_MAX", "120"))
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def request_resource(url):
+    """The rate-limit resource (X-RateLimit-Resource) a request to `url` draws on."""
+    path = urlsplit(url).path
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/search/code" in path:
+        return "code_search"
+    if "/search/" in path:
+        return "search"
+    return "core"
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0 or self.rate <= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Tracks the X-RateLimit budget per token and resource and paces requests so it lasts until reset.
+
+    GitHub keeps separate budgets per resource (core, graphql, search, ...),
+    so each (token, resource) pair has its own budget and pacing bucket.
+
+    While the budget is healthy requests go out at full speed. Once less than
+    pace_below of it is left, a token bucket refilling at
+    remaining / seconds-until-reset spreads the rest evenly over the window
+    instead of running into a 403. Writes additionally go through a
+    fixed-rate bucket that stays under the secondary limits.
+    """
+
+    def __init__(self, burst=RATE_LIMIT_BURST, pace_below=PACE_BELOW, write_rate_per_min=WRITE_RATE_PER_MIN,
+                 write_burst=WRITE_BURST, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.burst = burst
+        self.pace_below = pace_below
+        self.write_rate = write_rate_per_min / 60.0
+        self.write_burst = write_burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock_skew = 0.0  # server time minus local time
+        self._lock = threading.Lock()
+        self._budgets = {}
+        self._buckets = {}
+        self._write_buckets = {}
+
+    def _key(self, auth):
+        return hashlib.sha256((auth or "anonymous").encode()).hexdigest()[:12]
+
+    def _server_now(self):
+        return time.time() + self.clock_skew
+
+    def acquire(self, auth, method="GET", resource="core"):
+        """Block until a request with this token may be sent to `resource`."""
+        token = self._key(auth)
+        key = (token, resource)
+        with self._lock:
+            budget = self._budgets.get(key)
+            wait = 0.0
+            if budget and budget["remaining"] <= 0:
+                wait = budget["reset"] - self._server_now()
+                if wait > 0:
+                    # Budget is spent: sleep until the window resets, then start fresh
+                    budget["remaining"] = budget["limit"]
+                    self._buckets.pop(key, None)
+                else:
+                    wait = 0.0
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                wait = max(wait, bucket.reserve())
+            if method in WRITE_METHODS:
+                # Secondary limits cover every resource of a token
+                write_bucket = self._write_buckets.setdefault(token, TokenBucket(self.write_rate, self.write_burst))
+                wait = max(wait, write_bucket.reserve())
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, auth, response, resource="core"):
+        """Record the budget reported by a response; its X-RateLimit-Resource wins over `resource`."""
+        headers = response.headers
+        date = headers.get("Date")
+        if date:
+            try:
+                self.clock_skew = parsedate_to_datetime(date).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        budget = {
+            "limit": int(headers.get("X-RateLimit-Limit", 0)),
+            "remaining": int(headers["X-RateLimit-Remaining"]),
+            "used": int(headers.get("X-RateLimit-Used", 0)),
+            "reset": int(headers.get("X-RateLimit-Reset", 0)),
+            "resource": headers.get("X-RateLimit-Resource", resource),
+        }
+        key = (self._key(auth), budget["resource"])
+        with self._lock:
+            self._budgets[key] = budget
+            if budget["remaining"] > budget["limit"] * self.pace_below:
+                self._buckets.pop(key, None)
+                return
+            seconds_left = max(budget["reset"] - self._server_now(), 1.0)
+            rate = budget["remaining"] / seconds_left
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = TokenBucket(rate, max(1, min(self.burst, budget["remaining"])))
+            else:
+                bucket._refill(time.monotonic())
+                bucket.rate = rate
+
+    def retry_delay(self, response, attempt, method="GET"):
+        """Seconds to wait before retrying `response`, or None if it should not be retried."""
+        if attempt >= self.max_retries:
+            return None
+        status = response.status_code
+        throttled = status in (403, 429)
+        # Server errors are only retried for reads, which are safe to repeat
+        if not throttled and not (status >= 500 and method not in WRITE_METHODS):
+            return None
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        if throttled:
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                # Primary limit: wait exactly until the window resets
+                reset = int(response.headers.get("X-RateLimit-Reset", 0))
+                return max(reset - self._server_now(), 0) + 1
+            if "rate limit" not in response.text.lower():
+                # A plain permission error, not throttling
+                return None
+            # Secondary limit without Retry-After: GitHub asks for at least a minute
+            ceiling = self.backoff_base * 60 * 2 ** attempt
+        else:
+            ceiling = self.backoff_base * 2 ** attempt
+        # Exponential backoff with jitter so parallel workers don't retry in lockstep
+        ceiling = min(self.backoff_max, ceiling)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def budget(self, auth=None, resource="core"):
+        """Current budget for one token (None for unauthenticated requests) and resource, or None if unseen."""
+        with self._lock:
+            budget = self._budgets.get((self._key(auth), resource))
+            return dict(budget) if budget else None
+
+    def all_budgets(self):
+        """Every budget seen, as {token key: {resource: budget}}."""
+        with self._lock:
+            budgets = {}
+            for (token, name), budget in self._budgets.items():
+                budgets.setdefault(token, {})[name] = dict(budget)
+            return budgets
@@ -1,8 +1,23 @@
 import os
-from dotenv import load_dotenv
-import requests
-import base64
+import sys
+import json
 import time
+import pathlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from GH_client import get_client, POOL_SIZE
+from GH_metrics import instrumented
+from GH_file_transfer import put_file
+from GH_multi_file_updater import commit_files, contents_entry
+from GH_object_store import fetch_tree_listing, git_blob_sha
+from GH_repo_mirror import loaded_path_index
+
+try:
+    import yaml
+except ImportError:  # only needed for YAML manifests
+    yaml = None
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,46 +28,58 @@ OWNER = os.getenv("Owner")
 REPO = os.getenv("Repository")
 FILE_PATH = os.getenv("Repo_File_Path")
 
-# GitHub API base URL
-BASE_URL = "https://api.github.com"
-HEADERS = {"Authorization": f"token {GITHUB_API_KEY}"}
-
 def check_repo_exists(owner, repo):
-    repo_url = f"{BASE_URL}/repos/{owner}/{repo}"
-    response = requests.get(repo_url, headers=HEADERS)
+    repo_url = f"/repos/{owner}/{repo}"
+    response = get_client().get(repo_url)
     return response.status_code == 200
 
-def create_repo(owner, repo):
-    create_url = f"{BASE_URL}/user/repos"
-    data = {"name": repo, "private": False}
-    response = requests.post(create_url, headers=HEADERS, json=data)
+_login = None
+_login_lock = threading.Lock()
+
+def authenticated_login():
+    # The token's own account; repositories for any other owner are created in that organization
+    global _login
+    with _login_lock:
+        if _login is None:
+            response = get_client().get("/user")
+            if response.status_code == 200:
+                _login = response.json()["login"]
+    return _login
+
+def create_repo(owner, repo, private=False, description=None, auto_init=False, org=None):
+    # Under the authenticated user unless org names the organization to create it in
+    create_url = f"/orgs/{org}/repos" if org else "/user/repos"
+    data = {"name": repo, "private": private}
+    if description:
+        data["description"] = description
+    if auto_init:
+        data["auto_init"] = True
+    response = get_client().post(create_url, json=data)
     if response.status_code == 201:
         print(f"Repository {owner}/{repo} created successfully.")
+        return response.json()
     else:
         print(f"Failed to create repository. Status code: {response.status_code}")
         print(f"Response content: {response.text}")
+        return None
 
 def check_file_exists(owner, repo, file_path):
-    file_url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}"
-    response = requests.get(file_url, headers=HEADERS)
+    # Answered from the default branch's path index when one is already loaded
+    index = loaded_path_index(owner, repo)
+    if index is not None:
+        return file_path in index
+    file_url = f"/repos/{owner}/{repo}/contents/{file_path}"
+    response = get_client().get(file_url)
     return response.status_code == 200
 
 def create_file(owner, repo, file_path, content):
-    create_file_url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}"
-    data = {
-        "message": "Add new file",
-        "content": base64.b64encode(content.encode()).decode()
-    }
-    response = requests.put(create_file_url, headers=HEADERS, json=data)
-    if response.status_code == 201:
+    # content may be str, bytes, a path (os.PathLike) or a binary file object
+    if put_file(owner, repo, file_path, content, "Add new file"):
         print(f"File {file_path} created successfully in {owner}/{repo}.")
-    else:
-        print(f"Failed to create file. Status code: {response.status_code}")
-        print(f"Response content: {response.text}")
 
 def create_branch(owner, repo, base_branch, new_branch_prefix):
-    base_branch_url = f"{BASE_URL}/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
-    response = requests.get(base_branch_url, headers=HEADERS)
+    base_branch_url = f"/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
+    response = get_client().get(base_branch_url)
     if response.status_code != 200:
         print(f"Failed to get base branch info. Status code: {response.status_code}")
         print(f"Response content: {response.text}")
@@ -64,12 +91,12 @@ def create_branch(owner, repo, base_branch, new_branch_prefix):
     timestamp = int(time.time())
     new_branch = f"{new_branch_prefix}-{timestamp}"
 
-    create_branch_url = f"{BASE_URL}/repos/{owner}/{repo}/git/refs"
+    create_branch_url = f"/repos/{owner}/{repo}/git/refs"
     data = {
         "ref": f"refs/heads/{new_branch}",
         "sha": base_sha
     }
-    response = requests.post(create_branch_url, headers=HEADERS, json=data)
+    response = get_client().post(create_branch_url, json=data)
     if response.status_code == 201:
         print(f"Branch {new_branch} created successfully in {owner}/{repo}.")
         return new_branch
@@ -79,8 +106,19 @@ def create_branch(owner, repo, base_branch, new_branch_prefix):
         return None
 
 def update_file_in_branch(owner, repo, file_path, branch, content):
-    file_url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
-    response = requests.get(file_url, headers=HEADERS)
+    # Directories are recognised from the branch's path index, if one is already
+    # loaded, without a contents round trip; the blob SHA still comes from the
+    # contents API so it is current
+    index = loaded_path_index(owner, repo, branch)
+    if index is not None and index.is_dir(file_path):
+        print(f"The path '{file_path}' refers to a directory. Contents:")
+        for name, item in index.children(file_path):
+            print(f"- {name} ({'directory' if item['type'] == 'tree' else 'file'})")
+        print("Please specify a file path, not a directory.")
+        return
+
+    file_url = f"/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
+    response = get_client().get(file_url)
     
     if response.status_code != 200:
         print(f"Failed to get file info. Status code: {response.status_code}")
@@ -96,22 +134,220 @@ def update_file_in_branch(owner, repo, file_path, branch, content):
         print("Please specify a file path, not a directory.")
         return
 
-    update_url = f"{BASE_URL}/repos/{owner}/{repo}/contents/{file_path}"
-    data = {
-        "message": "Update file",
-        "content": base64.b64encode(content.encode()).decode(),
-        "branch": branch,
-        "sha": response_data["sha"]
-    }
-    
-    response = requests.put(update_url, headers=HEADERS, json=data)
-    if response.status_code in [200, 201]:
+    if put_file(owner, repo, file_path, content, "Update file", branch, response_data["sha"]):
         print(f"File {file_path} updated successfully in branch {branch} of {owner}/{repo}.")
+
+def load_manifest(path):
+    """Repository specs from a JSON or YAML manifest, or None after printing why it can't be used.
+
+    The manifest looks like:
+
+        owner: my-org              # default owner (else the Owner variable)
+        private: true              # defaults for every repo: private, description,
+        message: Bootstrap         #   message (the commit message) and overwrite
+        files:                     # files every repo gets
+          LICENSE: {source: templates/LICENSE}
+        repos:
+          - name: service-a
+            files:
+              README.md: "# service-a"
+          - service-b              # a bare name takes all the defaults
+
+    File values are literal text, or {source: path} for a local file relative
+    to the manifest. Existing files are left alone unless overwrite is true,
+    in which case files whose content differs are rewritten.
+    """
+    try:
+        with open(path) as f:
+            if path.endswith((".yml", ".yaml")):
+                if yaml is None:
+                    print("YAML manifests need PyYAML (pip install pyyaml); use JSON otherwise.")
+                    return None
+                manifest = yaml.safe_load(f)
+            else:
+                manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Failed to read manifest {path}: {e}")
+        return None
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("repos"), list):
+        print(f"Manifest {path} must be a mapping with a 'repos' list.")
+        return None
+    if not isinstance(manifest.get("files", {}), dict):
+        print(f"Manifest {path} has a 'files' entry that is not a mapping of paths to contents.")
+        return None
+
+    base_dir = pathlib.Path(path).resolve().parent
+    defaults = {key: manifest[key] for key in ("owner", "private", "description", "message", "overwrite")
+                if key in manifest}
+    specs = []
+    for entry in manifest["repos"]:
+        entry = {"name": entry} if isinstance(entry, str) else entry
+        if not isinstance(entry, dict):
+            print(f"Skipping manifest entry that is neither a name nor a mapping: {entry!r}")
+            continue
+        if not isinstance(entry.get("files", {}), dict):
+            print(f"Skipping manifest entry whose 'files' is not a mapping: {entry.get('name')}")
+            continue
+        spec = {**defaults, **entry}
+        spec["owner"] = spec.get("owner") or OWNER
+        if not spec.get("name") or not spec["owner"]:
+            print(f"Skipping manifest entry without a name or owner: {entry}")
+            continue
+        files = {**manifest.get("files", {}), **entry.get("files", {})}
+        spec["files"] = {file_path: _manifest_content(value, base_dir) for file_path, value in files.items()}
+        specs.append(spec)
+    return specs
+
+def _manifest_content(value, base_dir):
+    # Literal text stays a str; {source: path} becomes a Path, which commit_files streams
+    if isinstance(value, dict):
+        if "source" in value:
+            return base_dir / value["source"]
+        return value.get("content", "")
+    return value
+
+def _content_sha(content):
+    if isinstance(content, os.PathLike):
+        with open(content, "rb") as f:
+            return git_blob_sha(f.read())
+    return git_blob_sha(content.encode("utf-8") if isinstance(content, str) else content)
+
+def _missing_files(owner, repo, commit_sha, spec, result):
+    # The spec's files that commit_sha lacks (or that differ, with overwrite); None after recording a failure
+    listing, complete = fetch_tree_listing(owner, repo, commit_sha)
+    if listing is None:
+        result.update(status="failed", error="could not list the repository's files")
+        return None
+    missing = {}
+    for file_path, content in spec["files"].items():
+        entry = listing.get(file_path)
+        if entry is None and not complete:
+            # Past the end of a truncated listing; only the contents API can tell
+            entry = contents_entry(owner, repo, file_path, commit_sha)
+            if entry is False:
+                result.update(status="failed", error=f"could not check {file_path}")
+                return None
+        if entry is None:
+            missing[file_path] = content
+        elif entry["type"] != "blob":
+            print(f"The path '{file_path}' refers to a directory in {owner}/{repo}. Skipping.")
+        elif spec.get("overwrite") and entry["sha"] != _content_sha(content):
+            missing[file_path] = content
+        else:
+            result["present"] += 1
+    return missing
+
+def provision_repo(spec):
+    """Bring one repository up to its spec: create it if needed, then commit whatever files are missing."""
+    owner, repo = spec["owner"], spec["name"]
+    result = {"repo": f"{owner}/{repo}", "status": "unchanged", "written": [], "present": 0, "error": None}
+    started = time.monotonic()
+    response = get_client().get(f"/repos/{owner}/{repo}")
+    parent_sha, empty = None, False
+    if response.status_code == 404:
+        # auto_init gives the repository a first commit for the files to go on top of;
+        # an owner other than the token's user is taken to be an organization
+        login = authenticated_login()
+        org = owner if login is not None and login.lower() != owner.lower() else None
+        created = create_repo(owner, repo, spec.get("private", False), spec.get("description"),
+                              auto_init=True, org=org)
+        if created is None:
+            result.update(status="failed", error="could not create the repository")
+            return result
+        result["status"] = "created"
+        branch = spec.get("branch") or created["default_branch"]
+        missing = dict(spec["files"])
+    elif response.status_code == 200:
+        branch = spec.get("branch") or response.json()["default_branch"]
+        # The head is read afresh, never from a mirror that may trust an older one
+        response = get_client().get(f"/repos/{owner}/{repo}/git/ref/heads/{branch}")
+        if response.status_code == 409:
+            # An empty repository (GitHub's "Git Repository is empty"): every file is missing
+            empty, missing = True, dict(spec["files"])
+        elif response.status_code != 200:
+            result.update(status="failed", error=f"could not read branch {branch}")
+            return result
+        else:
+            parent_sha = response.json()["object"]["sha"]
+            missing = _missing_files(owner, repo, parent_sha, spec, result)
+            if missing is None:
+                return result
     else:
-        print(f"Failed to update file. Status code: {response.status_code}")
-        print(f"Response content: {response.text}")
+        result.update(status="failed", error=f"status code {response.status_code} reading the repository")
+        return result
+
+    message = spec.get("message", "Provision repository files")
+    if missing and empty:
+        # The Git Data API can't write to an empty repository; its first file
+        # goes through the contents API, which creates the branch
+        first_path = next(iter(missing))
+        if not put_file(owner, repo, first_path, missing.pop(first_path), message, branch=branch,
+                        blob_threshold=float("inf")):
+            result.update(status="failed", error=f"could not create the first commit on {branch}")
+            return result
+        result.update(status="updated", written=[first_path])
+    if missing:
+        written = commit_files(owner, repo, branch, missing, message, parent_sha=parent_sha)
+        if written is None:
+            result.update(status="failed", error=f"could not commit {len(missing)} file(s)")
+            return result
+        result["written"] += written
+        if result["status"] == "unchanged":
+            result["status"] = "updated"
+    result["seconds"] = time.monotonic() - started
+    return result
+
+@instrumented("provision_repos")
+def provision_repos(specs, max_workers=POOL_SIZE):
+    """Provision every spec with bounded concurrency; returns one result per spec, in order.
+
+    Each repository costs one existence check and, when it already exists, a
+    head lookup and one (cached) tree listing to find what is missing; missing
+    files then go up as a single commit. Repositories that are already
+    complete are left untouched.
+    """
+    start = time.monotonic()
+    results = [None] * len(specs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Run in copies of this context so each repo's requests count toward this operation
+        futures = {executor.submit(contextvars.copy_context().run, provision_repo, spec): i
+                   for i, spec in enumerate(specs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                spec = specs[i]
+                results[i] = {"repo": f"{spec['owner']}/{spec['name']}", "status": "failed",
+                              "written": [], "present": 0, "error": str(e)}
+
+    counts = {status: sum(1 for result in results if result["status"] == status)
+              for status in ("created", "updated", "unchanged", "failed")}
+    print(f"\nProvisioned {len(results)} repositories in {time.monotonic() - start:.1f}s: "
+          f"{counts['created']} created, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['failed']} failed")
+    for result in results:
+        if result["status"] == "failed":
+            print(f"  {result['repo']}: failed ({result['error']})")
+        else:
+            print(f"  {result['repo']}: {result['status']}, {len(result['written'])} file(s) written, "
+                  f"{result['present']} already present")
+    return results
+
+def provision_from_manifest(path, max_workers=POOL_SIZE):
+    specs = load_manifest(path)
+    if specs is None:
+        return None
+    return provision_repos(specs, max_workers)
 
 def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--manifest":
+        if not GITHUB_API_KEY:
+            print("Error: GITHUB_API_KEY is not set. Please check your .env file.")
+            return
+        provision_from_manifest(sys.argv[2])
+        return
+
     if not all([GITHUB_API_KEY, OWNER, REPO, FILE_PATH]):
         print("Error: Missing required environment variables. Please check your .env file.")
         return
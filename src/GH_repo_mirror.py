@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import tarfile
+import threading
+from dotenv import load_dotenv
+from GH_client import get_client
+from GH_object_store import fetch_tree_listing, get_blob, get_object_store, git_blob_sha, tree_listing_key
+from GH_path_index import PathIndex
+
+load_dotenv()
+
+# Seconds a mirror trusts its branch head before asking GitHub again
+MIRROR_MAX_AGE = float(os.getenv("GITHUB_MIRROR_MAX_AGE", "60"))
+
+
+class RepoMirror:
+    """Read-through local copy of one branch, keyed by the commit SHA at its head.
+
+    Paths come from one recursive tree listing per commit, held as a compact
+    PathIndex, and file contents from the shared object store, fetched as blobs on first read or all at
+    once by prefetch(), which streams a single tarball. The head is re-checked
+    at most every max_age seconds (a conditional request when the HTTP cache
+    is on), and the mirror switches commits only when it has moved.
+
+    `complete` is False while the index holds only part of a truncated tree
+    (the tarball that completes it couldn't be read); a path missing from
+    such an index may still exist.
+
+    Mirrors are shared between threads (daemon commands run concurrently), so
+    refresh() and prefetch() hold a per-mirror lock; readers see the index
+    swapped in whole.
+    """
+
+    def __init__(self, owner, repo, branch=None, max_age=MIRROR_MAX_AGE):
+        self.owner = owner
+        self.repo = repo
+        self.branch = branch
+        self.max_age = max_age
+        self.sha = None
+        self.index = None
+        self.complete = False
+        self.checked_at = 0.0
+        # Reentrant: refresh() calls prefetch(), which refreshes first
+        self._lock = threading.RLock()
+
+    def refresh(self, force=False):
+        """Follow the branch head; returns its SHA, or None if the repository can't be read."""
+        if not force and self.sha and time.monotonic() - self.checked_at < self.max_age:
+            return self.sha
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if not force and self.sha and time.monotonic() - self.checked_at < self.max_age:
+                return self.sha
+            return self._refresh()
+
+    def _refresh(self):
+        client = get_client()
+        if self.branch is None:
+            response = client.get(f"/repos/{self.owner}/{self.repo}")
+            if response.status_code != 200:
+                print(f"Repository not found or access denied. Status code: {response.status_code}")
+                return None
+            self.branch = response.json()["default_branch"]
+        # git/ref (singular) matches the branch exactly rather than by prefix
+        response = client.get(f"/repos/{self.owner}/{self.repo}/git/ref/heads/{self.branch}")
+        if response.status_code != 200:
+            print(f"Failed to get branch {self.branch}. Status code: {response.status_code}")
+            return None
+        sha = response.json()["object"]["sha"]
+        if sha != self.sha:
+            listing, complete = fetch_tree_listing(self.owner, self.repo, sha)
+            if listing is None:
+                return None
+            self.sha, self.index, self.complete = sha, PathIndex.from_listing(listing), complete
+            self.checked_at = time.monotonic()
+            # A truncated listing is completed from the tarball
+            if not complete and not self.prefetch():
+                print(f"Only {len(self.index)} paths of {self.owner}/{self.repo} at {sha[:7]} could be listed; "
+                      f"the mirror is incomplete")
+        self.checked_at = time.monotonic()
+        return self.sha
+
+    def prefetch(self):
+        """Store every file of the head commit from one streamed tarball download."""
+        with self._lock:
+            return self._prefetch()
+
+    def _prefetch(self):
+        if self.refresh() is None:
+            return False
+        response = get_client().get(f"/repos/{self.owner}/{self.repo}/tarball/{self.sha}", stream=True)
+        with response:
+            if response.status_code != 200:
+                print(f"Failed to download tarball for {self.sha[:7]}. Status code: {response.status_code}")
+                return False
+            response.raw.decode_content = True
+            store = get_object_store()
+            listing = {}
+            with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+                for member in archive:
+                    # Every entry sits under one "<owner>-<repo>-<short sha>/" directory
+                    path = member.name.partition("/")[2]
+                    if not path:
+                        continue
+                    if member.isdir():
+                        listing[path] = {"type": "tree", "mode": "040000", "sha": None, "size": None}
+                        continue
+                    if member.issym():
+                        data, mode = member.linkname.encode(), "120000"
+                    elif member.isfile():
+                        data = archive.extractfile(member).read()
+                        mode = "100755" if member.mode & 0o111 else "100644"
+                    else:
+                        continue
+                    sha = git_blob_sha(data)
+                    if sha not in store:
+                        store.put(sha, data)
+                    listing[path] = {"type": "blob", "mode": mode, "sha": sha, "size": len(data)}
+        # Entries from the trees API (with tree SHAs and submodules) win over the tarball's
+        listing.update(self.index.items() if self.index is not None else ())
+        self.index = PathIndex.from_listing(listing)
+        self.complete = True
+        store.put(tree_listing_key(self.sha), json.dumps(listing).encode())
+        return True
+
+    def entry(self, path):
+        """The listing entry (type, mode, sha, size) for a path, or None if it doesn't exist."""
+        if self.refresh() is None:
+            return None
+        return self.index.get(path)
+
+    def exists(self, path):
+        return self.entry(path) is not None
+
+    def is_dir(self, path):
+        entry = self.entry(path)
+        return entry is not None and entry["type"] == "tree"
+
+    def list_dir(self, path=""):
+        """{name: entry} for the immediate children of a directory, or None if it isn't one."""
+        if not self.is_dir(path):
+            return None
+        return dict(self.index.children(path))
+
+    def read(self, path):
+        """File bytes from the object store (fetched as a blob on first use), or None."""
+        entry = self.entry(path)
+        if entry is None or entry["type"] != "blob":
+            return None
+        return get_blob(self.owner, self.repo, entry["sha"])
+
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+def get_mirror(owner, repo, branch=None):
+    """The shared mirror of a branch (the default branch when None), created on first use."""
+    key = (owner.lower(), repo.lower(), branch)
+    with _mirrors_lock:
+        if key not in _mirrors:
+            _mirrors[key] = RepoMirror(owner, repo, branch)
+        return _mirrors[key]
+
+def get_path_index(owner, repo, branch=None):
+    """Complete PathIndex of a branch head (the default branch when None), or None if it can't be read."""
+    mirror = get_mirror(owner, repo, branch)
+    return mirror.index if mirror.refresh() is not None and mirror.complete else None
+
+def loaded_path_index(owner, repo, branch=None):
+    """PathIndex of a mirror that is already loaded, complete and fresh, else None. Sends no request.
+
+    For single lookups, where loading a mirror first (a repo, a ref and a tree
+    request) would cost more than asking the contents API directly.
+    """
+    mirror = _mirrors.get((owner.lower(), repo.lower(), branch))
+    if mirror is None or not mirror.complete or time.monotonic() - mirror.checked_at >= mirror.max_age:
+        return None
+    return mirror.index
@@ -1,27 +1,79 @@
 import os
 from dotenv import load_dotenv
-import requests
+from GH_client import get_client
+from GH_metrics import instrumented
+from GH_file_transfer import download_file
+from GH_repo_mirror import get_mirror
 import base64
 
 # Load environment variables from .env file
 load_dotenv()
 
-def check_repo_and_get_file(owner, repo, file_path, token):
-    # GitHub API base URL
-    base_url = "https://api.github.com"
+# Serve lookups from a local mirror of the default branch ("1" enables it)
+PATHFINDER_MIRROR = os.getenv("GITHUB_PATHFINDER_MIRROR", "0") != "0"
+
+def _write_or_decode(file_path, data, dest):
+    if isinstance(dest, str):
+        with open(dest, "wb") as f:
+            f.write(data)
+        print(f"Wrote {len(data)} bytes of '{file_path}' to {dest}.")
+        return dest
+    if dest is not None:
+        dest.write(data)
+        return dest
+    try:
+        decoded_content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        print(f"Binary file ({len(data)} bytes).")
+        return data
+    print(f"File content:\n{decoded_content}")
+    return decoded_content
+
+def get_file_from_mirror(mirror, file_path, dest=None):
+    # Same results as check_repo_and_get_file, but from the mirror: no requests
+    # at all while the branch head is unchanged and the blob is already stored
+    if mirror.refresh() is None:
+        return None
+    entry = mirror.entry(file_path)
+    if entry is None:
+        print(f"Failed to retrieve file. '{file_path}' does not exist at {mirror.sha[:7]}.")
+        return None
+    if entry["type"] == "tree":
+        print(f"The path '{file_path}' refers to a directory. Contents:")
+        for name, item in mirror.list_dir(file_path).items():
+            print(f"- {name} ({'directory' if item['type'] == 'tree' else 'file'})")
+        return None
+    data = mirror.read(file_path)
+    if data is None:
+        return None
+    return _write_or_decode(file_path, data, dest)
+
+@instrumented("check_repo_and_get_file")
+def check_repo_and_get_file(owner, repo, file_path, token, dest=None, mirror=None):
+    # With dest (a path or binary file object) the file is streamed there and dest
+    # is returned; files over the contents API's 1 MB inline limit are always
+    # streamed, to an mmap when no dest is given. Binary files come back as bytes.
+    # With a RepoMirror the lookup is answered locally instead.
+    if mirror is not None:
+        if mirror.refresh() is None:
+            return None
+        # An incomplete mirror can't tell a missing path from an unlisted one; those go to the API
+        if mirror.complete or mirror.exists(file_path):
+            return get_file_from_mirror(mirror, file_path, dest)
+    client = get_client()
 
     # Check if the repository exists
-    repo_url = f"{base_url}/repos/{owner}/{repo}"
+    repo_url = f"/repos/{owner}/{repo}"
     headers = {"Authorization": f"token {token}"}
     
-    response = requests.get(repo_url, headers=headers)
+    response = client.get(repo_url, headers=headers)
     
     if response.status_code == 200:
         print(f"Repository {owner}/{repo} exists.")
         
         # Get the file content
-        file_url = f"{base_url}/repos/{owner}/{repo}/contents/{file_path}"
-        file_response = requests.get(file_url, headers=headers)
+        file_url = f"/repos/{owner}/{repo}/contents/{file_path}"
+        file_response = client.get(file_url, headers=headers)
         
         if file_response.status_code == 200:
             file_data = file_response.json()
@@ -29,11 +81,14 @@ def check_repo_and_get_file(owner, repo, file_path, token):
                 print(f"The path '{file_path}' refers to a directory. Contents:")
                 for item in file_data:
                     print(f"- {item['name']} ({'directory' if item['type'] == 'dir' else 'file'})")
+            elif isinstance(file_data, dict) and (dest is not None or file_data.get("encoding") == "none"):
+                data = download_file(owner, repo, sha=file_data["sha"], dest=dest, headers=headers)
+                if data is not None:
+                    print(f"Downloaded {file_data['size']} bytes of '{file_path}'"
+                          f"{f' to {dest}' if isinstance(dest, str) else ''}.")
+                return data
             elif isinstance(file_data, dict) and "content" in file_data:
-                content = file_data["content"]
-                decoded_content = base64.b64decode(content).decode("utf-8")
-                print(f"File content:\n{decoded_content}")
-                return decoded_content
+                return _write_or_decode(file_path, base64.b64decode(file_data["content"]), None)
             else:
                 print(f"Unexpected response format. Response data: {file_data}")
         else:
@@ -45,25 +100,30 @@ def check_repo_and_get_file(owner, repo, file_path, token):
         return None
 
 # Get variables from environment
-github_api_key = os.getenv("GITHUB_API_KEY")
-owner = os.getenv("Owner")
-repo = os.getenv("Repository")
-file_path = os.getenv("Repo_File_Path")
+GITHUB_API_KEY = os.getenv("GITHUB_API_KEY")
+OWNER = os.getenv("Owner")
+REPO = os.getenv("Repository")
+FILE_PATH = os.getenv("Repo_File_Path")
 
-# Check if all required environment variables are set
+def main():
+    # Check if all required environment variables are set
+    if not all([GITHUB_API_KEY, OWNER, REPO, FILE_PATH]):
+        print("Error: Missing required environment variables. Please check your .env file.")
+        print(f"GITHUB_API_KEY: {'Set' if GITHUB_API_KEY else 'Not Set'}")
+        print(f"Owner: {'Set' if OWNER else 'Not Set'}")
+        print(f"Repository: {'Set' if REPO else 'Not Set'}")
+        print(f"Repo_File_Path: {'Set' if FILE_PATH else 'Not Set'}")
+        return
 
-if not all([github_api_key, owner, repo, file_path]):
-    print("Error: Missing required environment variables. Please check your .env file.")
-    print(f"GITHUB_API_KEY: {'Set' if github_api_key else 'Not Set'}")
-    print(f"Owner: {'Set' if owner else 'Not Set'}")
-    print(f"Repository: {'Set' if repo else 'Not Set'}")
-    print(f"Repo_File_Path: {'Set' if file_path else 'Not Set'}")
-else:
     try:
-        check_repo_and_get_file(owner, repo, file_path, github_api_key)
+        mirror = get_mirror(OWNER, REPO) if PATHFINDER_MIRROR else None
+        check_repo_and_get_file(OWNER, REPO, FILE_PATH, GITHUB_API_KEY, mirror=mirror)
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         print("Please check your .env file and ensure all variables are set correctly.")
-        print(f"Owner: {owner}")
-        print(f"Repository: {repo}")
-        print(f"Repo_File_Path: {file_path}")
\ No newline at end of file
+        print(f"Owner: {OWNER}")
+        print(f"Repository: {REPO}")
+        print(f"Repo_File_Path: {FILE_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import fnmatch
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Optional JSON file with a list of rules; the defaults below are used otherwise
+REVIEW_RULES_PATH = os.getenv("GITHUB_REVIEW_RULES")
+
+# Equivalent to the original hard-coded checks. Size is measured in changed
+# lines, which is what the files API reports in 'changes'.
+DEFAULT_RULES = [
+    {"name": "size", "kind": "size", "max_changes": 1000, "message": "is too large"},
+    {"name": "naming", "kind": "lowercase", "message": "doesn't follow naming conventions"},
+    {"name": "todo", "kind": "literal", "pattern": "TODO", "message": "contains TODO comments"},
+]
+
+CONTENT_KINDS = ("literal", "regex")
+PATH_KINDS = ("path", "path_regex")
+# Rules without a pattern: "size" (over max_changes changed lines) and "lowercase"
+# (paths that str.islower() rejects, so capitals in any script, or with a space)
+PLAIN_KINDS = ("size", "lowercase")
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+class RuleSet:
+    """Review rules compiled once and applied to the files of a pull request.
+
+    Literal and regex rules are folded into one alternation that is run over
+    each patch in a single pass; only lines it hits are checked against the
+    individual rules, so clean patches cost one C-level scan no matter how
+    many rules there are. Patterns with capturing groups, backreferences or
+    inline flags would change meaning inside the alternation, so those are
+    matched on their own. Only added lines are scanned, and hits are reported
+    with their line numbers in the new file.
+
+    Rules are validated when the set is built; a malformed rule raises ValueError.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        if not isinstance(rules, list):
+            raise ValueError("Review rules must be a list")
+        self.rules = rules
+        self.size_rules = []
+        self.lowercase_rules = []
+        # (rule, pattern, separate): separate rules are kept out of the combined matcher
+        self.content_rules = []
+        self.path_rules = []
+        names = set()
+        for rule in rules:
+            self._validate(rule, names)
+            if rule["kind"] == "size":
+                self.size_rules.append(rule)
+                continue
+            if rule["kind"] == "lowercase":
+                self.lowercase_rules.append(rule)
+                continue
+            if rule["kind"] == "literal":
+                source = re.escape(rule["pattern"])
+            elif rule["kind"] == "path":
+                source = fnmatch.translate(rule["pattern"])
+            else:
+                source = rule["pattern"]
+            try:
+                pattern = re.compile(source)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern in rule '{rule['name']}': {e}") from None
+            entry = (rule, pattern, not self._combinable(pattern))
+            (self.content_rules if rule["kind"] in CONTENT_KINDS else self.path_rules).append(entry)
+        self.content_matcher = self._combine(self.content_rules, re.MULTILINE)
+        self.path_matcher = self._combine(self.path_rules)
+        # Multi-line prefilters for the separate content rules, run over the whole patch
+        self.separate_matchers = {rule["name"]: re.compile(pattern.pattern, re.MULTILINE)
+                                  for rule, pattern, separate in self.content_rules if separate}
+
+    @staticmethod
+    def _validate(rule, names):
+        if not isinstance(rule, dict) or not isinstance(rule.get("name"), str) or not rule["name"]:
+            raise ValueError(f"Review rule without a name: {rule}")
+        name = rule["name"]
+        if name in names:
+            raise ValueError(f"Duplicate review rule name '{name}'")
+        names.add(name)
+        if rule.get("kind") not in CONTENT_KINDS + PATH_KINDS + PLAIN_KINDS:
+            raise ValueError(f"Unknown rule kind '{rule.get('kind')}' in rule '{name}'")
+        if not isinstance(rule.get("message"), str):
+            raise ValueError(f"Rule '{name}' needs a message")
+        if rule["kind"] == "size":
+            if not isinstance(rule.get("max_changes"), int):
+                raise ValueError(f"Size rule '{name}' needs an integer max_changes")
+        elif rule["kind"] != "lowercase" and (not isinstance(rule.get("pattern"), str) or not rule["pattern"]):
+            raise ValueError(f"Rule '{name}' needs a pattern")
+
+    @staticmethod
+    def _combinable(pattern):
+        # Groups would be renumbered (and named ones clash) and inline flags
+        # would apply to every alternative, so only plain patterns are folded in
+        return pattern.groups == 0 and pattern.flags == re.UNICODE
+
+    @staticmethod
+    def _combine(compiled, flags=0):
+        patterns = [pattern.pattern for _, pattern, separate in compiled if not separate]
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), flags)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r") as f:
+            try:
+                return cls(json.load(f))
+            except ValueError as e:
+                raise ValueError(f"Review rules in {path}: {e}") from None
+
+    def scan_file(self, file):
+        filename = file["filename"]
+        issues = []
+
+        for rule in self.size_rules:
+            if file.get("changes", 0) > rule["max_changes"]:
+                issues.append(f"File {filename} {rule['message']} ({file['changes']} changed lines)")
+
+        if self.lowercase_rules and (not filename.islower() or " " in filename):
+            issues.extend(f"File {filename} {rule['message']}" for rule in self.lowercase_rules)
+
+        path_hit = self.path_matcher is not None and self.path_matcher.search(filename)
+        for rule, pattern, separate in self.path_rules:
+            if (separate or path_hit) and (pattern.match if rule["kind"] == "path" else pattern.search)(filename):
+                issues.append(f"File {filename} {rule['message']}")
+
+        patch = file.get("patch")
+        if not patch or not self.content_rules:
+            return issues
+        added = list(self._added_lines(patch))
+        text = "\n".join(line for _, line in added)
+        candidates = []
+        if self.content_matcher is not None and self.content_matcher.search(text):
+            candidates = [(line_number, line) for line_number, line in added if self.content_matcher.search(line)]
+        for rule, pattern, separate in self.content_rules:
+            if separate:
+                if not self.separate_matchers[rule["name"]].search(text):
+                    continue
+                lines = added
+            else:
+                lines = candidates
+            hits = [line_number for line_number, line in lines if pattern.search(line)]
+            if hits:
+                issues.append(f"File {filename} {rule['message']} (line{'s' if len(hits) > 1 else ''} "
+                              f"{', '.join(str(n) for n in hits)})")
+        return issues
+
+    def scan(self, files):
+        issues = []
+        for file in files:
+            issues.extend(self.scan_file(file))
+        return issues
+
+    @staticmethod
+    def _added_lines(patch):
+        # Yields (line number in the new file, text) for each '+' line of a unified diff
+        new_line = 0
+        lines = patch.split("\n")
+        if lines[-1] == "":
+            # The patch's final newline, not an empty context line
+            lines.pop()
+        for line in lines:
+            if line.startswith("@@"):
+                header = HUNK_HEADER.match(line)
+                if header:
+                    new_line = int(header.group(1))
+            elif line.startswith("+"):
+                yield new_line, line[1:]
+                new_line += 1
+            elif line.startswith(" ") or line == "":
+                new_line += 1
+
+
+_default_rule_set = None
+_rule_set_lock = threading.Lock()
+
+def get_rule_set():
+    """The configured rule set, compiled on first use."""
+    global _default_rule_set
+    with _rule_set_lock:
+        if _default_rule_set is None:
+            _default_rule_set = RuleSet.from_file(REVIEW_RULES_PATH) if REVIEW_RULES_PATH else RuleSet()
+    return _default_rule_set
@@ -0,0 +1,333 @@
+import os
+import sys
+import hmac
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests import HTTPError
+from dotenv import load_dotenv
+from GH_client import get_client
+
+load_dotenv()
+
+# Receiver settings
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+WEBHOOK_HOST = os.getenv("GITHUB_WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("GITHUB_WEBHOOK_PORT", "8787"))
+SNAPSHOT_PATH = os.getenv("GITHUB_WEBHOOK_SNAPSHOT")
+SNAPSHOT_INTERVAL = float(os.getenv("GITHUB_WEBHOOK_SNAPSHOT_INTERVAL", "30"))
+# "1" accepts unsigned deliveries when no secret is set; for local testing only
+WEBHOOK_INSECURE = os.getenv("GITHUB_WEBHOOK_INSECURE") == "1"
+
+HANDLED_EVENTS = ("pull_request", "check_run", "pull_request_review", "label")
+
+
+def verify_signature(secret, body, signature_header):
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body; never true without a secret."""
+    if not secret:
+        return False
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header[len("sha256="):])
+
+
+class PRStateView:
+    """In-memory PR state for tracked repositories, kept current by webhook events.
+
+    A repository is answered from the view only after track() has seeded its
+    open PRs, or assume_tracked() declared its events enough (as when
+    replaying a recording). Check runs are known completely for a head SHA
+    only once its PR's opened/synchronize event arrived (every run for it
+    comes later) or a REST fetch was recorded; likewise reviews for PRs
+    opened after tracking.
+    Lookups return None when the view can't answer, so callers fall back to REST.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tracked = set()
+        self.prs = {}  # "owner/repo#number" -> PR fields
+        self.check_runs = {}  # "owner/repo@sha" -> {check name: {status, conclusion}}
+        self.complete_shas = set()
+        self.dirty = False
+
+    @staticmethod
+    def _repo_key(owner, repo):
+        return f"{owner}/{repo}".lower()
+
+    def _pr_key(self, repo_key, number):
+        return f"{repo_key}#{int(number)}"
+
+    def track(self, owner, repo):
+        """Seed open PRs from one paginated listing; the view answers for this repo from then on."""
+        repo_key = self._repo_key(owner, repo)
+        try:
+            prs = list(get_client().paginate(f"/repos/{owner}/{repo}/pulls", params={"state": "open"}))
+        except HTTPError as e:
+            print(f"Failed to seed PR view for {owner}/{repo}. Status code: {e.response.status_code}")
+            return False
+        with self._lock:
+            for pr in prs:
+                self._store_pr(repo_key, pr, reviews_known=False)
+            self.tracked.add(repo_key)
+            self.dirty = True
+        print(f"Tracking {owner}/{repo} with {len(prs)} open PR(s)")
+        return True
+
+    def assume_tracked(self, owner, repo):
+        """Answer for a repository from events alone, without seeding it from the API."""
+        with self._lock:
+            self.tracked.add(self._repo_key(owner, repo))
+
+    def _store_pr(self, repo_key, pr, reviews_known):
+        key = self._pr_key(repo_key, pr["number"])
+        previous = self.prs.get(key, {})
+        self.prs[key] = {
+            "number": pr["number"],
+            "title": pr["title"],
+            "state": pr["state"],
+            "merged": bool(pr.get("merged") or pr.get("merged_at")),
+            "user": {"login": pr["user"]["login"]},
+            "head_sha": pr["head"]["sha"],
+            "base": pr["base"]["ref"],
+            "labels": [label["name"] for label in pr.get("labels", [])],
+            "reviews": previous.get("reviews", {}),
+            "reviews_known": previous.get("reviews_known", reviews_known),
+        }
+        return self.prs[key]
+
+    def apply(self, event, payload):
+        """Update the view from one webhook delivery. Returns True if it changed anything."""
+        repository = payload.get("repository")
+        if event not in HANDLED_EVENTS or not repository:
+            return False
+        repo_key = repository["full_name"].lower()
+        with self._lock:
+            if repo_key not in self.tracked:
+                return False
+            if event == "pull_request":
+                action = payload["action"]
+                pr = self._store_pr(repo_key, payload["pull_request"], reviews_known=(action == "opened"))
+                if action in ("opened", "synchronize", "reopened"):
+                    # Every check run for this head arrives after this event
+                    self.complete_shas.add(f"{repo_key}@{pr['head_sha']}")
+            elif event == "pull_request_review":
+                pr = self._store_pr(repo_key, payload["pull_request"], reviews_known=False)
+                review = payload["review"]
+                # A plain comment doesn't change a reviewer's earlier verdict
+                if review["state"].lower() != "commented":
+                    pr["reviews"][review["user"]["login"]] = review["state"].upper()
+            elif event == "label":
+                # Repository label renames/deletions: keep attached PR labels consistent
+                if payload["action"] in ("edited", "deleted"):
+                    old_name = payload.get("changes", {}).get("name", {}).get("from", payload["label"]["name"])
+                    for key, pr in self.prs.items():
+                        if key.startswith(f"{repo_key}#") and old_name in pr["labels"]:
+                            pr["labels"].remove(old_name)
+                            if payload["action"] == "edited":
+                                pr["labels"].append(payload["label"]["name"])
+            elif event == "check_run":
+                run = payload["check_run"]
+                runs = self.check_runs.setdefault(f"{repo_key}@{run['head_sha']}", {})
+                runs[run["name"]] = {"status": run["status"], "conclusion": run.get("conclusion")}
+            self.dirty = True
+        return True
+
+    def record_check_runs(self, owner, repo, head_sha, checks):
+        """Store a complete REST listing of check runs so later status queries stay local."""
+        repo_key = self._repo_key(owner, repo)
+        with self._lock:
+            if repo_key not in self.tracked:
+                return
+            key = f"{repo_key}@{head_sha}"
+            self.check_runs[key] = {check["name"]: {"status": check["status"], "conclusion": check.get("conclusion")}
+                                    for check in checks}
+            self.complete_shas.add(key)
+            self.dirty = True
+
+    def open_pull_requests(self, owner, repo):
+        repo_key = self._repo_key(owner, repo)
+        with self._lock:
+            if repo_key not in self.tracked:
+                return None
+            return sorted((dict(pr) for key, pr in self.prs.items()
+                           if key.startswith(f"{repo_key}#") and pr["state"] == "open"),
+                          key=lambda pr: -pr["number"])
+
+    def get_pr(self, owner, repo, pr_number):
+        repo_key = self._repo_key(owner, repo)
+        with self._lock:
+            if repo_key not in self.tracked:
+                return None
+            return self.prs.get(self._pr_key(repo_key, pr_number))
+
+    def labels(self, owner, repo, pr_number):
+        pr = self.get_pr(owner, repo, pr_number)
+        return list(pr["labels"]) if pr else None
+
+    def approved(self, owner, repo, pr_number):
+        pr = self.get_pr(owner, repo, pr_number)
+        if not pr or not pr["reviews_known"]:
+            return None
+        return any(state == "APPROVED" for state in pr["reviews"].values())
+
+    def head_sha(self, owner, repo, pr_number):
+        pr = self.get_pr(owner, repo, pr_number)
+        return pr["head_sha"] if pr else None
+
+    def check_runs_for(self, owner, repo, head_sha):
+        """Check runs for a head commit as REST-shaped dicts, or None if the view may be missing some."""
+        key = f"{self._repo_key(owner, repo)}@{head_sha}"
+        with self._lock:
+            if key not in self.complete_shas:
+                return None
+            return [{"name": name, **run} for name, run in self.check_runs.get(key, {}).items()]
+
+    def save(self, path):
+        with self._lock:
+            # Serialized under the lock: handler threads keep changing these dicts
+            data = json.dumps({
+                "tracked": sorted(self.tracked),
+                "prs": self.prs,
+                "check_runs": self.check_runs,
+                "complete_shas": sorted(self.complete_shas),
+            })
+            self.dirty = False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        view = cls()
+        with open(path, "r") as f:
+            data = json.load(f)
+        view.tracked = set(data["tracked"])
+        view.prs = data["prs"]
+        view.check_runs = data["check_runs"]
+        view.complete_shas = set(data["complete_shas"])
+        return view
+
+
+_view = None
+
+def get_pr_view():
+    """The installed view, or None when modules should go to the API."""
+    return _view
+
+def set_pr_view(view):
+    global _view
+    _view = view
+    return view
+
+
+def replay(view, path, repos=None):
+    """Apply recorded deliveries, one JSON object {"event": ..., "payload": ...} per line.
+
+    Nothing is fetched: every repository in the recording is treated as
+    tracked, or only those in `repos` ("owner/repo" names) when given.
+    """
+    for full_name in repos or ():
+        view.assume_tracked(*full_name.split("/", 1))
+    applied = 0
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                delivery = json.loads(line)
+                repository = delivery["payload"].get("repository")
+                if repos is None and repository:
+                    view.assume_tracked(*repository["full_name"].split("/", 1))
+                applied += view.apply(delivery["event"], delivery["payload"])
+    return applied
+
+
+def make_handler(view, secret, insecure=False):
+    # insecure skips verification, and only applies while no secret is set
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            unverified = insecure and not secret
+            if not unverified and not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256")):
+                self.send_response(401)
+                self.end_headers()
+                return
+            event = self.headers.get("X-GitHub-Event", "")
+            try:
+                view.apply(event, json.loads(body))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Not JSON, or missing fields the event type requires
+                self.send_response(400)
+                self.end_headers()
+                return
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+def _refuse_unsigned(secret, insecure):
+    if secret:
+        return False
+    if insecure:
+        print("Warning: GITHUB_WEBHOOK_SECRET is not set; accepting unsigned deliveries (GITHUB_WEBHOOK_INSECURE=1).")
+        return False
+    print("Error: GITHUB_WEBHOOK_SECRET is not set, so deliveries can't be verified. "
+          "Set it, or GITHUB_WEBHOOK_INSECURE=1 to accept unsigned deliveries for local testing.")
+    return True
+
+def serve(view, host=WEBHOOK_HOST, port=WEBHOOK_PORT, secret=WEBHOOK_SECRET, snapshot_path=SNAPSHOT_PATH,
+          insecure=WEBHOOK_INSECURE):
+    """Run the receiver until interrupted, snapshotting the view every SNAPSHOT_INTERVAL seconds.
+
+    Refuses to start without a secret unless insecure is set.
+    """
+    if _refuse_unsigned(secret, insecure):
+        return
+    server = ThreadingHTTPServer((host, port), make_handler(view, secret, insecure))
+    stop = threading.Event()
+
+    def snapshot_loop():
+        while not stop.wait(SNAPSHOT_INTERVAL):
+            if view.dirty:
+                view.save(snapshot_path)
+
+    if snapshot_path:
+        threading.Thread(target=snapshot_loop, daemon=True).start()
+    print(f"Listening for GitHub webhooks on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if snapshot_path:
+            view.save(snapshot_path)
+
+
+def main():
+    view = PRStateView.load(SNAPSHOT_PATH) if SNAPSHOT_PATH and os.path.exists(SNAPSHOT_PATH) else PRStateView()
+    set_pr_view(view)
+    if len(sys.argv) == 3 and sys.argv[1] == "--replay":
+        # Offline: the recording is the only source, so no repository is seeded from the API
+        print(f"Applied {replay(view, sys.argv[2])} recorded event(s)")
+        if SNAPSHOT_PATH:
+            view.save(SNAPSHOT_PATH)
+        return
+    if not WEBHOOK_SECRET and not WEBHOOK_INSECURE:
+        # Checked before seeding from the API, which would be wasted if serve() refuses
+        _refuse_unsigned(WEBHOOK_SECRET, WEBHOOK_INSECURE)
+        return
+    owner, repo = os.getenv("Owner"), os.getenv("Repository")
+    if owner and repo and view._repo_key(owner, repo) not in view.tracked:
+        view.track(owner, repo)
+    serve(view)
+
+if __name__ == "__main__":
+    main()
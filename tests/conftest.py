@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The modules import each other by bare name, as when run from src/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def fake_github(tmp_path):
+    """A FakeGitHub server with the shared client and object store pointed at it."""
+    from fake_github import FakeGitHub
+    from GH_client import GitHubClient, set_client
+    from GH_http_cache import HTTPCache
+    from GH_object_store import ObjectStore, set_object_store
+    from GH_rate_limiter import RateLimiter
+    import GH_repo_mirror
+
+    fake = FakeGitHub()
+    url = fake.serve()
+    set_client(GitHubClient(token="test-token", base_url=url, cache=HTTPCache(str(tmp_path / "http")),
+                            limiter=RateLimiter(write_rate_per_min=0, backoff_base=0.01)))
+    set_object_store(ObjectStore(str(tmp_path / "objects")))
+    GH_repo_mirror._mirrors.clear()
+    yield fake
+    set_client(None)
+    set_object_store(None)
+    GH_repo_mirror._mirrors.clear()
+    fake.shutdown()
@@ -0,0 +1,56 @@
+from GH_client import GitHubClient, get_client
+from GH_rate_limiter import RateLimiter
+
+
+def test_get_revalidates_with_etag(fake_github):
+    fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    client = get_client()
+    first = client.get("/repos/octo/widgets")
+    second = client.get("/repos/octo/widgets")
+    assert first.status_code == second.status_code == 200
+    assert getattr(second, "from_cache", False)
+    assert second.json() == first.json()
+    # The 304 didn't spend any budget
+    assert client.budget()["used"] == 1
+
+
+def test_paginate_follows_next_links(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    fake_github.seed_pulls(repo, 5)
+    fake_github.reset_counters()
+    numbers = [pull["number"] for pull in get_client().paginate("/repos/octo/widgets/pulls",
+                                                                  params={"state": "all"}, per_page=2)]
+    assert sorted(numbers) == sorted(pull[0] for pull in repo.pulls)
+    assert fake_github.requests == 3
+    fake_github.reset_counters()
+    assert len(list(get_client().paginate("/repos/octo/widgets/pulls", per_page=2, stop=lambda pr: True))) == 0
+    assert fake_github.requests == 1
+
+
+def test_retried_responses_are_closed(fake_github):
+    fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    client = get_client()
+    closed = []
+    send = client.session.request
+
+    def request(*args, **kwargs):
+        response = send(*args, **kwargs)
+        close = response.close
+        response.close = lambda: (closed.append(response.status_code), close())
+        return response
+    client.session.request = request
+
+    fake_github.fail_next(2)
+    response = client.get("/repos/octo/widgets/tarball/main", stream=True)
+    assert closed == [502, 502]
+    assert response.status_code == 404  # the fake serves no tarballs, but it got past the outage
+
+
+def test_budget_without_a_token_is_one_budget(fake_github):
+    client = GitHubClient(token=None, base_url=fake_github.base_url, limiter=RateLimiter())
+    assert client.budget() is None
+    fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    client.get("/repos/octo/widgets")
+    budget = client.budget()
+    assert budget["resource"] == "core" and budget["remaining"] == budget["limit"] - 1
+    assert client.budget("graphql") is None
@@ -0,0 +1,34 @@
+from GH_conflict_resolver import COMPARE_FILE_LIMIT, changed_files, compare_branches
+from GH_object_store import fetch_tree_listing, get_tree_listing
+
+
+def diverge(fake, changed):
+    # main holds 20 more files than get changed on feature, so the changes pass the compare cap
+    files = {f"src/file{i}.txt": f"version 1 of {i}\n" for i in range(changed + 20)}
+    repo = fake.create_repo("octo", "widgets", files)
+    repo.refs["feature"] = repo.refs["main"]
+    repo.commit_files("feature", {f"src/file{i}.txt": f"version 2 of {i}\n" for i in range(changed)}, "Edit")
+    return repo
+
+
+def test_changes_past_the_compare_cap_come_from_tree_listings(fake_github):
+    diverge(fake_github, COMPARE_FILE_LIMIT + 10)
+    comparison = compare_branches("octo", "widgets", "main", "feature")
+    assert len(comparison["files"]) == COMPARE_FILE_LIMIT
+    files = changed_files("octo", "widgets", comparison, "feature")
+    assert len(files) == COMPARE_FILE_LIMIT + 10
+    assert {file["status"] for file in files} == {"modified"}
+
+
+def test_truncated_tree_is_never_read_as_removed_files(fake_github):
+    repo = diverge(fake_github, COMPARE_FILE_LIMIT + 10)
+    fake_github.tree_limit = 100
+    listing, complete = fetch_tree_listing("octo", "widgets", repo.refs["feature"])
+    assert len(listing) == 100 and not complete
+    assert get_tree_listing("octo", "widgets", repo.refs["feature"]) is None
+
+    comparison = compare_branches("octo", "widgets", "main", "feature")
+    files = changed_files("octo", "widgets", comparison, "feature")
+    # Falls back to the compare API's own (capped, but accurate) list
+    assert files == comparison["files"]
+    assert all(file["status"] == "modified" for file in files)
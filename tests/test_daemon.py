@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import subprocess
+import time
+
+import pytest
+
+from GH_daemon import call
+from GH_repo_mirror import get_mirror
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "src", "GH_cli.py")
+
+
+@pytest.fixture
+def daemon():
+    # Unix socket paths are limited to about 100 bytes, so not under pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix="ghd")
+    socket_path = os.path.join(directory, "daemon.sock")
+    env = dict(os.environ, GITHUB_DAEMON_SOCKET=socket_path, GITHUB_CACHE_DIR=directory,
+               GITHUB_API_URL="http://127.0.0.1:9", GITHUB_API_KEY="test-token")
+    process = subprocess.Popen([sys.executable, CLI, "daemon"], env=env, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True)
+    deadline = time.monotonic() + 20
+    while call("ping", socket_path=socket_path) is None:
+        assert process.poll() is None and time.monotonic() < deadline, process.stdout.read()
+        time.sleep(0.05)
+    yield socket_path, env
+    call("shutdown", socket_path=socket_path)
+    process.wait(timeout=10)
+    process.stdout.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_socket_round_trip(daemon):
+    socket_path, env = daemon
+    assert call("ping", socket_path=socket_path)["pid"] > 0
+    result = call("metrics", socket_path=socket_path)
+    assert result["exit"] == 0 and isinstance(json.loads(result["output"]), dict)
+    # The CLI forwards commands to the daemon and prints what they printed there
+    completed = subprocess.run([sys.executable, CLI, "metrics"], env=env, capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0
+    assert json.loads(completed.stdout) == json.loads(call("metrics", socket_path=socket_path)["output"])
+
+
+def test_concurrent_commands_share_one_mirror(fake_github):
+    fake_github.create_repo("octo", "widgets", {f"src/file{i}.py": f"{i}\n" for i in range(100)})
+    fake_github.reset_counters()
+    barrier = threading.Barrier(8)
+    mirrors, shas = [], []
+
+    def command():
+        barrier.wait()
+        mirror = get_mirror("octo", "widgets")
+        mirrors.append(mirror)
+        shas.append(mirror.refresh())
+
+    threads = [threading.Thread(target=command) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(mirror) for mirror in mirrors}) == 1
+    assert len(set(shas)) == 1 and shas[0] is not None
+    # One repo, one ref and one tree request between them
+    assert fake_github.requests == 3
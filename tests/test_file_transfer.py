@@ -0,0 +1,67 @@
+import os
+import threading
+
+import requests
+
+import GH_file_transfer
+from GH_file_transfer import download_file, put_file, upload_blob
+
+
+def _pipe(data):
+    read_fd, write_fd = os.pipe()
+
+    def write():
+        with open(write_fd, "wb") as f:
+            f.write(data)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    return open(read_fd, "rb"), writer
+
+
+def test_pipes_are_uploaded(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"a.txt": "a\n"})
+    data = os.urandom(300_000)
+    source, writer = _pipe(data)
+    with source:
+        sha = upload_blob("octo", "widgets", source)
+    writer.join()
+    assert repo.blobs[sha] == data
+
+    source, writer = _pipe(b"from a pipe\n")
+    with source:
+        assert put_file("octo", "widgets", "b.txt", source, "Add b")
+    writer.join()
+    assert repo.blobs[repo.files_at("main")["b.txt"][1]] == b"from a pipe\n"
+
+
+def test_large_put_checks_sha(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"a.txt": "a\n"})
+    current = repo.files_at("main")["a.txt"][1]
+    assert not put_file("octo", "widgets", "a.txt", b"x" * 64, "Stale", sha="0" * 40, blob_threshold=16)
+    assert repo.files_at("main")["a.txt"][1] == current
+    assert not put_file("octo", "widgets", "new.txt", b"x" * 64, "Missing", sha=current, blob_threshold=16)
+    assert "new.txt" not in repo.files_at("main")
+    assert put_file("octo", "widgets", "a.txt", b"x" * 64, "Update", sha=current, blob_threshold=16)
+    assert repo.blobs[repo.files_at("main")["a.txt"][1]] == b"x" * 64
+
+
+class _BrokenDownload:
+    status_code = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield b"partial"
+        raise requests.exceptions.ChunkedEncodingError("connection dropped")
+
+
+def test_failed_download_leaves_no_part_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(GH_file_transfer, "_open_raw", lambda *args: _BrokenDownload())
+    dest = tmp_path / "big.bin"
+    assert download_file("octo", "widgets", "big.bin", dest=str(dest)) is None
+    assert list(tmp_path.iterdir()) == []
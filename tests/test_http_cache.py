@@ -0,0 +1,33 @@
+import requests
+
+from GH_http_cache import HTTPCache
+
+
+def response(status, headers, body=b""):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers)
+    result._content = body
+    return result
+
+
+def test_not_modified_headers_refresh_entry_in_any_case(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://api.github.com/x", "token", response(200, {"ETag": '"v1"', "Content-Type": "text/plain"}, b"hi"))
+    entry = cache.lookup("https://api.github.com/x", "token")
+    fresh = cache.to_response(entry, response(304, {"etag": '"v2"', "date": "Sat, 17 Oct 2026 10:00:00 GMT",
+                                                     "x-ratelimit-remaining": "41"}))
+    assert fresh.text == "hi"
+    assert fresh.headers["ETag"] == '"v2"'
+    assert fresh.headers["Date"] == "Sat, 17 Oct 2026 10:00:00 GMT"
+    assert fresh.headers["X-RateLimit-Remaining"] == "41"
+
+
+def test_lookup_survives_eviction_after_read(tmp_path, monkeypatch):
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://api.github.com/x", None, response(200, {"ETag": '"v1"'}, b"hi"))
+
+    def evicted(path, *args):
+        raise FileNotFoundError(path)
+    monkeypatch.setattr("os.utime", evicted)
+    assert cache.lookup("https://api.github.com/x")["body"] == b"hi"
@@ -0,0 +1,106 @@
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from GH_merge3 import merge3
+
+needs_git = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+CODE_LINES = ["", "}", "    return x", "    pass"] * 3 + [f"line {i}" for i in range(30)]
+
+
+def text(lines):
+    return "".join(line + "\n" for line in lines)
+
+
+def git_merge_file(tmp_path, ancestor, ours, theirs):
+    paths = []
+    for name, content in (("ours", ours), ("base", ancestor), ("theirs", theirs)):
+        path = os.path.join(tmp_path, name)
+        with open(path, "w", newline="") as f:
+            f.write(content)
+        paths.append(path)
+    result = subprocess.run(["git", "merge-file", "-p", *paths], capture_output=True, text=True)
+    return result.stdout, result.returncode
+
+
+def mutate(rng, lines, alphabet):
+    lines = list(lines)
+    for _ in range(rng.randint(1, 3)):
+        operation, at = rng.random(), rng.randint(0, len(lines))
+        if operation < 0.35 and lines:
+            del lines[min(at, len(lines) - 1)]
+        elif operation < 0.7:
+            lines.insert(at, rng.choice(alphabet))
+        elif lines:
+            lines[min(at, len(lines) - 1)] = rng.choice(alphabet)
+    return lines
+
+
+def random_cases(seed, count, alphabet, min_lines, max_lines):
+    rng = random.Random(seed)
+    for _ in range(count):
+        base = [rng.choice(alphabet) for _ in range(rng.randint(min_lines, max_lines))]
+        yield text(base), text(mutate(rng, base, alphabet)), text(mutate(rng, base, alphabet))
+
+
+def test_one_sided_changes_merge_cleanly():
+    base = text(["a", "b", "c", "d", "e"])
+    merged, conflicts = merge3(base, text(["A", "b", "c", "d", "e"]), text(["a", "b", "c", "d", "E"]))
+    assert (merged, conflicts) == (text(["A", "b", "c", "d", "E"]), 0)
+
+
+def test_overlapping_changes_conflict():
+    merged, conflicts = merge3(text(["a", "b"]), text(["x", "b"]), text(["y", "b"]))
+    assert conflicts == 1
+    assert merged == text(["<<<<<<< BASE", "x", "=======", "y", ">>>>>>> HEAD", "b"])
+
+
+def test_same_deletion_in_a_run_is_applied_once():
+    merged, conflicts = merge3(text("a b b d a a a d".split()), text("b p d a a d".split()),
+                               text("a b b d a a d".split()))
+    assert (merged, conflicts) == (text("b p d a a d".split()), 0)
+
+
+def test_only_newlines_split_lines():
+    # To git \x0c is an ordinary character, so both sides changed the same line
+    merged, conflicts = merge3("a\x0cx\x0cb\n", "A\x0cx\x0cb\n", "a\x0cx\x0cB\n")
+    assert conflicts == 1
+
+
+@needs_git
+@pytest.mark.parametrize("seed", range(3))
+def test_agrees_with_git_merge_file(tmp_path, seed):
+    for ancestor, ours, theirs in random_cases(seed, 150, CODE_LINES, 5, 40):
+        merged, conflicts = merge3(ancestor, ours, theirs)
+        expected, git_conflicts = git_merge_file(tmp_path, ancestor, ours, theirs)
+        if git_conflicts:
+            assert conflicts, (ancestor, ours, theirs)
+        elif not conflicts:
+            assert merged == expected, (ancestor, ours, theirs)
+
+
+@needs_git
+@pytest.mark.parametrize("seed", range(3))
+def test_clean_merges_of_repetitive_text_match_git(tmp_path, seed):
+    # Few distinct lines make many equally short diffs; a clean merge must
+    # still be the one git produces
+    for ancestor, ours, theirs in random_cases(seed, 150, "abcdp", 0, 10):
+        merged, conflicts = merge3(ancestor, ours, theirs)
+        if not conflicts:
+            expected, git_conflicts = git_merge_file(tmp_path, ancestor, ours, theirs)
+            assert git_conflicts == 0 and merged == expected, (ancestor, ours, theirs)
+
+
+def test_apply_patch_round_trips_difflib():
+    import difflib
+    from GH_merge3 import apply_patch
+    before = "".join(f"line {i}\n" for i in range(40))
+    after = before.replace("line 3\n", "line three\n").replace("line 30\n", "") + "tail\n"
+    patch = "".join(difflib.unified_diff(before.splitlines(True), after.splitlines(True), n=3))
+    assert apply_patch(before, patch) == after
+    # A patch made for other text doesn't apply
+    assert apply_patch(before.replace("line 2\n", "changed\n"), patch) is None
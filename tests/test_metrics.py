@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+from GH_metrics import LATENCY_BUCKETS, Metrics, endpoint_template
+
+
+def response(status=200, body=b"{}", used=None, reset=1000, sent=0):
+    headers = {"Content-Length": str(len(body))}
+    if used is not None:
+        headers.update({"X-RateLimit-Resource": "core", "X-RateLimit-Limit": "5000",
+                        "X-RateLimit-Remaining": str(5000 - used), "X-RateLimit-Used": str(used),
+                        "X-RateLimit-Reset": str(reset)})
+    request = SimpleNamespace(headers={"Content-Length": str(sent)} if sent else {})
+    return SimpleNamespace(status_code=status, headers=headers, _content=body, request=request)
+
+
+@pytest.mark.parametrize("url, template", [
+    ("https://api.github.com/repos/octo/widgets/pulls/12", "/repos/{owner}/{repo}/pulls/{number}"),
+    ("https://ghe.example.com/api/v3/repos/octo/widgets/contents/a/b.txt?ref=main",
+     "/repos/{owner}/{repo}/contents/{path}"),
+    ("/repos/octo/widgets/git/refs/heads/feature/x", "/repos/{owner}/{repo}/git/refs/heads/{branch}"),
+    ("/repos/octo/widgets/git/blobs/" + "a" * 40, "/repos/{owner}/{repo}/git/blobs/{sha}"),
+])
+def test_endpoint_templates(url, template):
+    assert endpoint_template(url) == template
+
+
+def test_latency_histogram_buckets():
+    metrics = Metrics()
+    # On a bound counts toward that bucket; past the last finite bound lands in +Inf
+    for seconds in (0.001, 0.005, 0.3, 0.3, 60):
+        metrics.record("GET", "/repos/octo/widgets/pulls/1", response(), seconds)
+    buckets = dict(zip(LATENCY_BUCKETS, metrics.endpoints[("GET", "/repos/{owner}/{repo}/pulls/{number}")]["buckets"]))
+    assert buckets[0.005] == 2 and buckets[0.5] == 2 and buckets[float("inf")] == 1
+    assert sum(buckets.values()) == 5
+
+
+def test_rate_limit_points_come_from_used_deltas():
+    metrics = Metrics()
+    url = "/repos/octo/widgets"
+    metrics.record("GET", url, response(used=10), 0.01)
+    metrics.record("GET", url, response(status=304, used=10), 0.01)
+    metrics.record("GET", url, response(used=13), 0.01, attempt=1)
+    # A new window starts counting again
+    metrics.record("GET", url, response(used=1, reset=2000), 0.01)
+    stats = metrics.endpoints[("GET", "/repos/{owner}/{repo}")]
+    assert stats["budget_used"] == 1 + 0 + 3 + 1
+    assert stats["retries"] == 1 and stats["statuses"] == {"200": 3, "304": 1}
+    assert metrics.rate_limits["core"]["remaining"] == 4999
+
+
+def test_prometheus_export():
+    metrics = Metrics()
+    with metrics.operation("sync"):
+        metrics.record("GET", "/repos/octo/widgets/pulls/1", response(body=b"x" * 100), 0.02)
+        metrics.record("GET", "/repos/octo/widgets/pulls/2", response(status=404), 2.0)
+        metrics.record("POST", "/repos/octo/widgets/git/blobs", response(status=201, sent=64), 0.2)
+    lines = metrics.to_prometheus().splitlines()
+    pulls = 'method="GET",endpoint="/repos/{owner}/{repo}/pulls/{number}"'
+
+    assert "# TYPE github_request_duration_seconds histogram" in lines
+    assert f'github_requests_total{{{pulls},status="200"}} 1' in lines
+    assert f'github_requests_total{{{pulls},status="404"}} 1' in lines
+    # Buckets are cumulative and end at +Inf with the request count
+    assert f'github_request_duration_seconds_bucket{{{pulls},le="0.01"}} 0' in lines
+    assert f'github_request_duration_seconds_bucket{{{pulls},le="0.025"}} 1' in lines
+    assert f'github_request_duration_seconds_bucket{{{pulls},le="1"}} 1' in lines
+    assert f'github_request_duration_seconds_bucket{{{pulls},le="2.5"}} 2' in lines
+    assert f'github_request_duration_seconds_bucket{{{pulls},le="+Inf"}} 2' in lines
+    assert f"github_request_duration_seconds_sum{{{pulls}}} 2.020000" in lines
+    assert f"github_request_duration_seconds_count{{{pulls}}} 2" in lines
+    assert f"github_request_bytes_in_total{{{pulls}}} 102" in lines
+    assert 'github_request_bytes_out_total{method="POST",endpoint="/repos/{owner}/{repo}/git/blobs"} 64' in lines
+    assert 'github_operation_requests_total{operation="sync"} 3' in lines
+    # Every sample belongs to a declared metric
+    declared = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    for line in lines:
+        if not line.startswith("#"):
+            name = line.split("{")[0]
+            assert name in declared or name.rsplit("_", 1)[0] in declared
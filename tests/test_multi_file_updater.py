@@ -0,0 +1,30 @@
+from GH_multi_file_updater import commit_files
+
+
+def test_existing_only_checks_paths_a_truncated_listing_leaves_out(fake_github):
+    files = {f"docs/page{i}.md": f"page {i}\n" for i in range(50)}
+    repo = fake_github.create_repo("octo", "widgets", files)
+    fake_github.tree_limit = 10
+    written = commit_files("octo", "widgets", "main", {"docs/page49.md": "new\n", "docs/missing.md": "new\n"},
+                           "Edit", existing_only=True)
+    assert written == ["docs/page49.md"]
+    assert "docs/missing.md" not in repo.files_at("main")
+
+
+def test_deleting_missing_paths_is_dropped(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"a.txt": "a\n", "b.txt": "b\n"})
+    written = commit_files("octo", "widgets", "main", {"a.txt": None, "gone.txt": None}, "Delete")
+    assert written == ["a.txt"]
+    assert set(repo.files_at("main")) == {"b.txt"}
+    assert commit_files("octo", "widgets", "main", {"gone.txt": None}, "Delete") == []
+
+
+def test_symlinks_and_submodules_are_skipped(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"a.txt": "a\n"})
+    tree = dict(repo.trees[repo.commits[repo.refs["main"]]["tree"]])
+    tree["link"] = ("120000", repo.add_blob(b"a.txt"))
+    tree["vendor"] = ("160000", repo.add_blob(b"submodule"))
+    repo.refs["main"] = repo.add_commit(repo.add_tree(tree), [repo.refs["main"]], "Add link")
+    files = {"link": "text\n", "vendor": None, "a.txt": "b\n"}
+    assert commit_files("octo", "widgets", "main", files, "Edit", existing_only=True) == ["a.txt"]
+    assert repo.files_at("main")["link"][0] == "120000"
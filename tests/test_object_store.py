@@ -0,0 +1,13 @@
+from GH_object_store import ObjectStore, git_blob_sha
+
+
+def test_get_survives_eviction_after_read(tmp_path, monkeypatch):
+    store = ObjectStore(str(tmp_path))
+    sha = git_blob_sha(b"hello\n")
+    store.put(sha, b"hello\n")
+
+    def evicted(path, *args):
+        raise FileNotFoundError(path)
+    monkeypatch.setattr("os.utime", evicted)
+    assert store.get(sha) == b"hello\n"
+    assert store.hits == 1
@@ -0,0 +1,36 @@
+from GH_path_index import PathIndex
+
+LISTING = {
+    "README.md": {"type": "blob", "mode": "100644", "sha": "a" * 40, "size": 6},
+    "src": {"type": "tree", "mode": "040000", "sha": "b" * 40, "size": None},
+    "src/app.py": {"type": "blob", "mode": "100755", "sha": "c" * 40, "size": 9},
+    "src/lib": {"type": "tree", "mode": "040000", "sha": "d" * 40, "size": None},
+    "src/lib/util.py": {"type": "blob", "mode": "100644", "sha": "e" * 40, "size": 3},
+    "src0.txt": {"type": "blob", "mode": "100644", "sha": "f" * 40, "size": 1},
+    "vendor": {"type": "commit", "mode": "160000", "sha": "1" * 40, "size": None},
+}
+
+
+def test_lookups_round_trip_the_listing():
+    index = PathIndex.from_listing(LISTING)
+    assert len(index) == len(LISTING)
+    for path, entry in LISTING.items():
+        assert index.get(path) == entry
+    assert index.get("/src/app.py/") == LISTING["src/app.py"]
+    assert index.get("src/missing.py") is None
+    assert index.is_dir("") and index.is_dir("src/lib") and not index.is_dir("src/app.py")
+    assert "vendor" in index and "ven" not in index
+
+
+def test_directory_walks_stay_inside_the_directory():
+    index = PathIndex.from_listing(LISTING)
+    assert [path for path, _ in index.walk("src")] == ["src/app.py", "src/lib", "src/lib/util.py"]
+    assert [name for name, _ in index.children()] == ["README.md", "src", "src0.txt", "vendor"]
+    assert [name for name, _ in index.children("src")] == ["app.py", "lib"]
+    assert [path for path, _ in index.glob("src/**/*.py")] == ["src/app.py", "src/lib/util.py"]
+    assert [path for path, _ in index.glob("*.md")] == ["README.md"]
+
+
+def test_partial_listing_still_lists_directories():
+    index = PathIndex.from_listing({path: LISTING[path] for path in ("README.md", "src/lib/util.py")})
+    assert dict(index.children())["src"]["type"] == "tree"
@@ -0,0 +1,64 @@
+import random
+import time
+
+import pytest
+
+import GH_pr_stats
+from GH_pr_stats import PRColumns, _summarize_python, parse_timestamp, summarize
+
+
+def iso(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def sample_prs(count, seed=0):
+    rng = random.Random(seed)
+    now = 1_700_000_000
+    prs = []
+    for number in range(1, count + 1):
+        created = now - rng.randrange(90 * 86400)
+        merged = created + rng.randrange(1, 14 * 86400) if rng.random() < 0.6 else None
+        state = "closed" if merged or rng.random() < 0.3 else "open"
+        prs.append({
+            "number": number, "state": state,
+            "created_at": iso(created), "updated_at": iso(merged or created),
+            "merged_at": iso(merged) if merged else None,
+            # A few authors so top contributors tie; None is a deleted account
+            "user": {"login": f"user{rng.randrange(8)}"} if rng.random() < 0.95 else None,
+            "comments": rng.randrange(6),
+        })
+    return prs, now
+
+
+def assert_close(actual, expected):
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected)
+        for key in expected:
+            assert_close(actual[key], expected[key])
+    else:
+        assert actual == pytest.approx(expected)
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1970-01-02T00:00:01Z") == 86401.0
+    assert parse_timestamp(None) != parse_timestamp(None)
+
+
+@pytest.mark.parametrize("count", [0, 1, 250])
+def test_numpy_and_python_summaries_agree(count):
+    pytest.importorskip("numpy")
+    prs, now = sample_prs(count)
+    columns = PRColumns.from_prs(prs)
+    assert_close(GH_pr_stats._summarize_numpy(columns, now), _summarize_python(columns, now))
+
+
+def test_summarize_falls_back_without_numpy(monkeypatch):
+    prs, now = sample_prs(50, seed=1)
+    columns = PRColumns.from_prs(prs)
+    monkeypatch.setattr(GH_pr_stats, "np", None)
+    summary = summarize(columns, now)
+    assert summary["total_prs"] == 50
+    assert summary["merged_prs"] == sum(1 for pr in prs if pr["merged_at"])
+    assert summary["open_prs"] == sum(1 for pr in prs if pr["state"] == "open")
+    assert sum(week["opened"] for week in summary["per_week"].values()) == 50
+    assert "ghost" in summary["per_author"]
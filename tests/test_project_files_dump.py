@@ -0,0 +1,83 @@
+import json
+import os
+import time
+
+from project_files_dump import MANIFEST_SUFFIX, dump_files, expand_includes
+
+
+def test_dump_output_is_never_expanded_into_itself(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "templates").mkdir(parents=True)
+    output = "data/templates/project_files"
+    for path in ("data/include.txt", output, output + MANIFEST_SUFFIX, output + ".tmp"):
+        (tmp_path / path).write_text("x\n")
+    skip = (output, output + MANIFEST_SUFFIX)
+    assert expand_includes(["data"], skip=skip) == ["data/include.txt"]
+    assert expand_includes(["data/**"], skip=skip) == ["data/include.txt"]
+    assert expand_includes(["./data/templates/*"], skip=skip) == []
+
+
+def _sections(output):
+    # {path: section text} of a template file
+    text = output.read_text()
+    return {chunk.split("\n", 1)[0]: chunk for chunk in text.split("#file = ")[1:]}
+
+
+def _settle(*paths, age=100):
+    # Old enough mtimes that the manifest trusts them on stat alone
+    stamp = time.time() - age
+    for path in paths:
+        os.utime(path, (stamp, stamp))
+
+
+def test_incremental_dump_rewrites_only_changed_sections(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    names = ["a.txt", "b.txt", "c.txt"]
+    for name in names:
+        (tmp_path / name).write_text(f"{name} contents\n")
+    _settle(*names)
+    output = tmp_path / "project_files"
+    manifest = tmp_path / ("project_files" + MANIFEST_SUFFIX)
+
+    assert dump_files(names, str(output)) == 3
+    first = _sections(output)
+    assert set(first) == set(names)
+    assert json.loads(manifest.read_text())["files"]["a.txt"]["signature"][0] is not None
+
+    # Nothing changed: the manifest is enough and the output is left alone
+    written = output.stat().st_mtime_ns
+    assert dump_files(names, str(output)) == 0
+    assert output.stat().st_mtime_ns == written
+
+    (tmp_path / "b.txt").write_text("b.txt was edited and is longer\n")
+    _settle("b.txt")
+    assert dump_files(names, str(output)) == 1
+    second = _sections(output)
+    assert second["a.txt"] == first["a.txt"] and second["c.txt"] == first["c.txt"]
+    assert "was edited" in second["b.txt"]
+
+    # Same size, new mtime: re-hashed, and reused only when the bytes match
+    _settle("a.txt", age=50)
+    assert dump_files(names, str(output)) == 0
+    (tmp_path / "c.txt").write_text("C.TXT CONTENTS\n")
+    _settle("c.txt", age=50)
+    assert dump_files(names, str(output)) == 1
+    assert _sections(output)["c.txt"] == "c.txt\nC.TXT CONTENTS\n\n\n"
+
+    # Files dropped from the list or deleted from disk lose their content
+    assert dump_files(["b.txt", "c.txt"], str(output)) == 0
+    assert set(_sections(output)) == {"b.txt", "c.txt"}
+    (tmp_path / "b.txt").unlink()
+    assert dump_files(["b.txt", "c.txt"], str(output)) == 1
+    assert _sections(output)["b.txt"] == "b.txt\n\n\n"
+
+
+def test_edited_output_invalidates_the_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.txt").write_text("a\n")
+    _settle("a.txt")
+    output = tmp_path / "project_files"
+    assert dump_files(["a.txt"], str(output)) == 1
+    output.write_text("edited by hand\n")
+    assert dump_files(["a.txt"], str(output)) == 1
+    assert _sections(output) == {"a.txt": "a.txt\na\n\n\n"}
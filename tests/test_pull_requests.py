@@ -0,0 +1,120 @@
+import pytest
+
+from GH_pull_requests import evaluate_merge_readiness
+
+
+def test_unreadable_pull_requests_fail_alone(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    fake_github.seed_pulls(repo, 3)
+    numbers = [pull[0] for pull in repo.pulls]
+    missing = max(numbers) + 100
+    readiness = evaluate_merge_readiness("octo", "widgets", [numbers[0], missing, numbers[0], numbers[1]])
+    assert list(readiness) == [numbers[0], missing, numbers[1]]
+    assert readiness[missing]["ready"] is False
+    assert readiness[missing]["reason"] == "It could not be read"
+    for number in (numbers[0], numbers[1]):
+        state = readiness[number]
+        assert state["mergeable"] == "MERGEABLE" and state["head_sha"] == repo.refs["main"]
+
+
+def test_store_backend_closes_the_store_it_opens(fake_github, monkeypatch):
+    from GH_pr_store import PRStore
+    from GH_pull_requests import pr_analytics
+
+    opened = []
+
+    class TrackedStore(PRStore):
+        def __init__(self):
+            super().__init__(":memory:")
+            self.closed = False
+            opened.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr("GH_pull_requests.PRStore", TrackedStore)
+    repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    fake_github.seed_pulls(repo, 5, days=10)
+    assert pr_analytics("octo", "widgets", days=30, backend="store")["total_prs"] == 5
+    assert len(opened) == 1 and opened[0].closed
+
+    # A store passed in stays open for the caller
+    with PRStore(":memory:") as store:
+        assert pr_analytics("octo", "widgets", days=30, backend="store", store=store)["total_prs"] == 5
+        assert store.query("octo", "widgets")
+
+
+def test_review_decision_gates_readiness(fake_github):
+    repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    fake_github.seed_pulls(repo, 40)
+    approved, changes, required, optional = sorted(pull[0] for pull in repo.pulls if pull[1] == "open")[:4]
+    repo.review_decisions.update({changes: "CHANGES_REQUESTED", required: "REVIEW_REQUIRED", optional: None})
+    readiness = evaluate_merge_readiness("octo", "widgets", [approved, changes, required, optional])
+    assert readiness[approved]["ready"] and readiness[optional]["ready"]
+    assert readiness[changes]["reason"] == "Changes have been requested"
+    assert readiness[required]["reason"] == "It has not been approved"
+    assert not readiness[required]["approved"]
+
+
+def test_menu_rejects_mistyped_merge_queue(fake_github, monkeypatch, capsys):
+    import GH_pull_requests
+
+    answers = iter(["9", "12,x, 3", "10"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    monkeypatch.setattr(GH_pull_requests, "merge_queue", lambda *args: pytest.fail("merge_queue was called"))
+    GH_pull_requests.main()
+    assert "Not PR numbers: x. Nothing was merged." in capsys.readouterr().out
+
+
+def test_first_sync_reads_every_pull_request(fake_github):
+    from GH_pr_store import PRStore
+    from GH_pull_requests import sync_pr_store
+
+    repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    fake_github.seed_pulls(repo, 30, days=20 * 365)
+    with PRStore(":memory:") as store:
+        assert sync_pr_store("octo", "widgets", store) is store
+        assert len(store.query("octo", "widgets", "all", "1970-01-01T00:00:00Z")) == 30
+
+
+@pytest.mark.parametrize("backend", ["rest", "graphql"])
+def test_analytics_cutoff_is_utc(fake_github, backend):
+    import os
+    import time
+
+    from GH_pull_requests import pr_analytics
+
+    # Twelve hours ahead of UTC: a local-time cutoff would drop a PR updated 18 hours ago
+    saved = os.environ.get("TZ")
+    os.environ["TZ"] = "Etc/GMT-12"
+    time.tzset()
+    try:
+        repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+        updated = time.time() - 18 * 3600
+        repo.add_pulls([(1, "open", updated - 3600, updated, None, "octocat", 0, 1)])
+        analytics = pr_analytics("octo", "widgets", days=1, backend=backend)
+    finally:
+        if saved is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = saved
+        time.tzset()
+    assert analytics is not None and analytics["total_prs"] == 1
+
+
+def test_review_all_reports_comments_that_were_not_posted(fake_github, monkeypatch, capsys):
+    import GH_pull_requests
+    from GH_pull_requests import review_all_open_pull_requests
+
+    repo = fake_github.create_repo("octo", "widgets", {"README.md": "hello\n"})
+    fake_github.seed_pulls(repo, 40)
+    numbers = sorted(pull[0] for pull in repo.pulls if pull[1] == "open")
+    post = GH_pull_requests.comment_on_pull_request
+    monkeypatch.setattr(GH_pull_requests, "comment_on_pull_request",
+                        lambda owner, name, number, comment: number != numbers[0] and post(owner, name, number, comment))
+    summary = review_all_open_pull_requests("octo", "widgets", max_workers=2)
+    assert summary["comment_failed"] == [numbers[0]]
+    assert summary["reviewed"] == len(numbers) - 1 and summary["with_issues"] == len(numbers) - 1
+    assert numbers[0] in summary["issues"] and numbers[0] not in repo.comments
+    assert f"Issues not posted to: #{numbers[0]}" in capsys.readouterr().out
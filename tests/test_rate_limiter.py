@@ -0,0 +1,32 @@
+import requests
+
+from GH_rate_limiter import RateLimiter, request_resource
+
+
+def response(resource, remaining, limit=5000):
+    result = requests.Response()
+    result.status_code = 200
+    result.headers.update({"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+                           "X-RateLimit-Reset": "0", "X-RateLimit-Resource": resource})
+    return result
+
+
+def test_resources_are_budgeted_separately():
+    limiter = RateLimiter()
+    limiter.update("token a", response("core", 4000))
+    limiter.update("token a", response("search", 29, limit=30), "search")
+    limiter.update("token b", response("core", 10))
+    assert limiter.budget("token a")["remaining"] == 4000
+    assert limiter.budget("token a", "search")["remaining"] == 29
+    assert limiter.budget("token a", "graphql") is None
+    assert limiter.budget("token b")["remaining"] == 10
+    # Only token b's core budget is low enough to be paced
+    assert len(limiter._buckets) == 1
+    assert sorted(len(budgets) for budgets in limiter.all_budgets().values()) == [1, 2]
+
+
+def test_request_resource():
+    assert request_resource("https://api.github.com/graphql") == "graphql"
+    assert request_resource("https://api.github.com/search/issues?q=x") == "search"
+    assert request_resource("https://api.github.com/search/code?q=x") == "code_search"
+    assert request_resource("https://api.github.com/repos/octo/widgets") == "core"
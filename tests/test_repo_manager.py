@@ -0,0 +1,43 @@
+import json
+
+from GH_repo_manager import create_repo, load_manifest, provision_repo
+
+
+def spec(files, **options):
+    return {"owner": "octo", "name": "widgets", "files": files, **options}
+
+
+def test_truncated_listing_never_overwrites_unlisted_files(fake_github):
+    files = {f"docs/page{i}.md": f"page {i}\n" for i in range(50)}
+    repo = fake_github.create_repo("octo", "widgets", files)
+    fake_github.tree_limit = 10
+    result = provision_repo(spec({"docs/page49.md": "replaced\n", "docs/new.md": "new\n"}))
+    assert result["status"] == "updated"
+    assert result["written"] == ["docs/new.md"]
+    assert result["present"] == 1
+    assert repo.blobs[repo.files_at("main")["docs/page49.md"][1]] == b"page 49\n"
+
+
+def test_empty_repository_gets_its_first_commit(fake_github):
+    repo = fake_github.create_repo("octo", "widgets")
+    result = provision_repo(spec({"README.md": "# widgets\n", "src/app.py": "print(1)\n"}))
+    assert result["status"] == "updated"
+    assert sorted(result["written"]) == ["README.md", "src/app.py"]
+    assert set(repo.files_at("main")) == {"README.md", "src/app.py"}
+    assert provision_repo(spec({"README.md": "# widgets\n"}))["status"] == "unchanged"
+
+
+def test_manifest_entries_of_the_wrong_shape_are_skipped(tmp_path):
+    path = tmp_path / "repos.json"
+    path.write_text(json.dumps({"owner": "octo", "files": {"LICENSE": "MIT\n"},
+                                "repos": ["a", 7, None, ["b"], {"name": "c", "files": ["x"]}, {"name": "d"}]}))
+    assert [spec["name"] for spec in load_manifest(str(path))] == ["a", "d"]
+    path.write_text(json.dumps({"owner": "octo", "files": "LICENSE", "repos": ["a"]}))
+    assert load_manifest(str(path)) is None
+
+
+def test_repositories_go_to_the_user_unless_an_org_is_named(fake_github):
+    create_repo("someone-else", "mine")
+    assert ("bench", "mine") in fake_github.repos
+    provision_repo({"owner": "acme", "name": "service", "files": {"a.txt": "a\n"}})
+    assert ("acme", "service") in fake_github.repos
@@ -0,0 +1,31 @@
+from GH_repo_manager import check_file_exists
+from GH_repo_mirror import get_mirror, get_path_index, loaded_path_index
+
+
+def test_single_lookups_skip_loading_a_mirror(fake_github):
+    fake_github.create_repo("octo", "widgets", {"README.md": "hello\n", "src/app.py": "print(1)\n"})
+    fake_github.reset_counters()
+    assert check_file_exists("octo", "widgets", "src/app.py")
+    assert not check_file_exists("octo", "widgets", "src/missing.py")
+    assert fake_github.requests == 2
+
+    # Once a complete mirror is loaded, lookups are answered from its index
+    assert get_path_index("octo", "widgets") is not None
+    assert loaded_path_index("octo", "widgets") is not None
+    fake_github.reset_counters()
+    assert check_file_exists("octo", "widgets", "README.md")
+    assert fake_github.requests == 0
+
+
+def test_truncated_tree_leaves_mirror_marked_incomplete(fake_github):
+    files = {f"docs/page{i}.md": f"page {i}\n" for i in range(50)}
+    fake_github.create_repo("octo", "widgets", files)
+    fake_github.tree_limit = 10
+    mirror = get_mirror("octo", "widgets")
+    # The fake serves no tarballs, so the listing can't be completed
+    assert mirror.refresh() is not None
+    assert not mirror.complete
+    assert get_path_index("octo", "widgets") is None
+    assert loaded_path_index("octo", "widgets") is None
+    # Paths past the truncation are still found through the contents API
+    assert check_file_exists("octo", "widgets", "docs/page49.md")
@@ -0,0 +1,70 @@
+import pytest
+
+from GH_review_rules import RuleSet
+
+
+def patch(*lines):
+    return "@@ -1,0 +1,%d @@\n" % len(lines) + "\n".join(f"+{line}" for line in lines)
+
+
+def test_grouped_patterns_match_on_their_own():
+    rules = RuleSet([
+        {"name": "repeat", "kind": "regex", "pattern": r"(\w+) \1", "message": "repeats a word"},
+        {"name": "dup", "kind": "regex", "pattern": r"(?P<word>x+)-(?P=word)", "message": "repeats x"},
+        {"name": "again", "kind": "regex", "pattern": r"(?P<word>y+)!", "message": "shouts y"},
+        {"name": "case", "kind": "regex", "pattern": r"(?i)fixme", "message": "has a FIXME"},
+        {"name": "todo", "kind": "literal", "pattern": "TODO", "message": "has a TODO"},
+    ])
+    assert rules.content_matcher.pattern == "(?:TODO)"
+    issues = rules.scan_file({"filename": "a.py", "patch": patch("the the", "xx-xx", "ok", "yy!", "FixMe TODO")})
+    assert issues == ["File a.py repeats a word (line 1)", "File a.py repeats x (line 2)",
+                      "File a.py shouts y (line 4)", "File a.py has a FIXME (line 5)", "File a.py has a TODO (line 5)"]
+
+
+def test_clean_patch_has_no_issues():
+    rules = RuleSet([{"name": "repeat", "kind": "regex", "pattern": r"(\w+) \1", "message": "repeats a word"}])
+    assert rules.scan_file({"filename": "a.py", "patch": patch("one two", "three")}) == []
+
+
+@pytest.mark.parametrize("rule", [
+    {"kind": "literal", "pattern": "TODO", "message": "has a TODO"},
+    {"name": "bad", "kind": "regex", "pattern": "(", "message": "broken"},
+    {"name": "bad", "kind": "glob", "pattern": "*", "message": "unknown kind"},
+    {"name": "bad", "kind": "regex", "message": "no pattern"},
+    {"name": "bad", "kind": "size", "message": "no limit"},
+    {"name": "bad", "kind": "literal", "pattern": "x"},
+])
+def test_malformed_rules_are_rejected_when_loaded(rule):
+    with pytest.raises(ValueError):
+        RuleSet([rule])
+
+
+def test_duplicate_rule_names_are_rejected():
+    rule = {"name": "todo", "kind": "literal", "pattern": "TODO", "message": "has a TODO"}
+    with pytest.raises(ValueError):
+        RuleSet([rule, dict(rule)])
+
+
+@pytest.mark.parametrize("filename, flagged", [
+    ("src/app.py", False),
+    ("docs/café.md", False),
+    ("docs/Ébauche.md", True),
+    ("src/ΑΡΧΕΙΟ.py", True),
+    ("src/README.md", True),
+    ("src/my file.py", True),
+    ("2024/01", True),
+])
+def test_default_naming_rule_matches_islower(filename, flagged):
+    issues = RuleSet().scan_file({"filename": filename, "changes": 1, "patch": patch("ok")})
+    assert (f"File {filename} doesn't follow naming conventions" in issues) is flagged
+
+
+def test_added_line_numbers_skip_the_final_newline():
+    diff = "@@ -1,3 +1,4 @@\n a\n+b\n\n+c\n"
+    assert list(RuleSet._added_lines(diff)) == [(2, "b"), (4, "c")]
+    assert list(RuleSet._added_lines("@@ -0,0 +1 @@\n+only\n")) == [(1, "only")]
+
+
+def test_lowercase_rules_need_no_pattern():
+    rules = RuleSet([{"name": "case", "kind": "lowercase", "message": "has capitals"}])
+    assert rules.scan_file({"filename": "Makefile"}) == ["File Makefile has capitals"]
@@ -0,0 +1,138 @@
+import hmac
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+
+import requests
+
+from GH_webhook_receiver import PRStateView, make_handler, replay, serve
+
+REPOSITORY = {"full_name": "octo/widgets"}
+
+
+def pull_request(number, action="opened", sha="a" * 40, labels=()):
+    return {"event": "pull_request", "payload": {
+        "action": action, "repository": REPOSITORY,
+        "pull_request": {"number": number, "title": f"PR {number}", "state": "closed" if action == "closed" else "open",
+                         "user": {"login": "dev"}, "head": {"sha": sha}, "base": {"ref": "main"},
+                         "labels": [{"name": name} for name in labels]},
+    }}
+
+
+def check_run(name, sha="a" * 40, conclusion="success"):
+    return {"event": "check_run", "payload": {
+        "action": "completed", "repository": REPOSITORY,
+        "check_run": {"name": name, "head_sha": sha, "status": "completed", "conclusion": conclusion},
+    }}
+
+
+def review(number, state, sha="a" * 40, labels=()):
+    delivery = pull_request(number, sha=sha, labels=labels)
+    delivery["event"] = "pull_request_review"
+    delivery["payload"].update(action="submitted", review={"state": state, "user": {"login": "lead"}})
+    return delivery
+
+
+def write_recording(path, deliveries):
+    with open(path, "w") as f:
+        for delivery in deliveries:
+            f.write(json.dumps(delivery) + "\n")
+    return str(path)
+
+
+def test_replay_into_fresh_view_tracks_recorded_repositories(tmp_path, monkeypatch):
+    monkeypatch.setattr("GH_webhook_receiver.get_client", lambda: None)  # any API call fails
+    recording = write_recording(tmp_path / "events.jsonl", [
+        pull_request(1, labels=["bug"]), pull_request(2), check_run("tests"), check_run("lint", conclusion="failure"),
+        review(1, "approved", labels=["bug"]), pull_request(2, action="closed"),
+    ])
+    view = PRStateView()
+    assert replay(view, recording) == 6
+    assert [pr["number"] for pr in view.open_pull_requests("octo", "widgets")] == [1]
+    assert view.labels("Octo", "Widgets", 1) == ["bug"]
+    assert view.approved("octo", "widgets", 1) is True
+    checks = {run["name"]: run["conclusion"] for run in view.check_runs_for("octo", "widgets", "a" * 40)}
+    assert checks == {"tests": "success", "lint": "failure"}
+
+
+def test_replay_limited_to_given_repositories(tmp_path):
+    other = pull_request(7)
+    other["payload"]["repository"] = {"full_name": "octo/other"}
+    recording = write_recording(tmp_path / "events.jsonl", [pull_request(1), other])
+    view = PRStateView()
+    assert replay(view, recording, repos=["octo/widgets"]) == 1
+    assert view.open_pull_requests("octo", "other") is None
+
+
+def test_snapshot_round_trip_while_events_arrive(tmp_path):
+    view = PRStateView()
+    view.assume_tracked("octo", "widgets")
+
+    def deliver():
+        for number in range(5000):
+            delivery = check_run(f"check {number}", sha=f"{number:040d}")
+            view.apply(delivery["event"], delivery["payload"])
+
+    thread = threading.Thread(target=deliver)
+    thread.start()
+    while thread.is_alive():
+        view.save(tmp_path / "view.json")
+    thread.join()
+    view.save(tmp_path / "view.json")
+    loaded = PRStateView.load(tmp_path / "view.json")
+    assert loaded.tracked == {"octo/widgets"}
+    assert len(loaded.check_runs) == 5000
+
+
+SECRET = "webhook secret"
+
+
+def signed(body, secret=SECRET):
+    return {"X-GitHub-Event": "pull_request",
+            "X-Hub-Signature-256": "sha256=" + hmac.new(secret.encode(), body.encode(), hashlib.sha256).hexdigest()}
+
+
+@contextmanager
+def receiver(view, secret=SECRET, insecure=False):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(view, secret, insecure))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_malformed_deliveries_get_400():
+    view = PRStateView()
+    view.assume_tracked("octo", "widgets")
+    with receiver(view) as url:
+        broken = json.dumps({"action": "opened", "repository": REPOSITORY, "pull_request": {"number": 1}})
+        assert requests.post(url, data=broken, headers=signed(broken)).status_code == 400
+        assert requests.post(url, data="not json", headers=signed("not json")).status_code == 400
+        body = json.dumps(pull_request(3)["payload"])
+        assert requests.post(url, data=body, headers=signed(body)).status_code == 204
+        assert view.head_sha("octo", "widgets", 3) == "a" * 40
+
+
+def test_unsigned_or_forged_deliveries_get_401():
+    view = PRStateView()
+    view.assume_tracked("octo", "widgets")
+    body = json.dumps(pull_request(3)["payload"])
+    with receiver(view) as url:
+        assert requests.post(url, data=body, headers={"X-GitHub-Event": "pull_request"}).status_code == 401
+        assert requests.post(url, data=body, headers=signed(body, "wrong secret")).status_code == 401
+        assert requests.post(url, data=body + " ", headers=signed(body)).status_code == 401
+    # No secret means nothing verifies, unless unsigned deliveries were explicitly allowed
+    with receiver(view, secret=None) as url:
+        assert requests.post(url, data=body, headers={"X-GitHub-Event": "pull_request"}).status_code == 401
+    assert view.head_sha("octo", "widgets", 3) is None
+    with receiver(view, secret=None, insecure=True) as url:
+        assert requests.post(url, data=body, headers={"X-GitHub-Event": "pull_request"}).status_code == 204
+
+
+def test_serve_refuses_to_start_without_a_secret(capsys):
+    serve(PRStateView(), port=0, secret=None, snapshot_path=None, insecure=False)
+    assert "GITHUB_WEBHOOK_SECRET is not set" in capsys.readouterr().out